@@ -1,22 +1,25 @@
 # agent.py
 
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_groq import ChatGroq
-from tools import summarize_food_logs  # Add this import at the top
-from memory import save_message, get_contextual_memory
+from tools import summarize_food_logs, summarize_gym_logs
+from memory import save_message
+from context_builder import assemble_context, build_context, gather_context, index_messages, stats_summary
+from intent_router import route_intent
+from persistence import get_persist_queue
+from timers import get_timer_service
+from tracing import Trace, count, span
 from tools import (
-    detect_gym_trigger,
-    detect_food_trigger,
     log_gym_session,
     log_food_entry,
-    detect_graph_command,
-    detect_pie_command,
     plot_gym_sessions,
     plot_food_pie_chart,
-    detect_timer_command,
     parse_timer_command,
     handle_recipe_query
 )
@@ -60,72 +63,261 @@ Your role is to help users track and reflect on their gym workouts and food habi
 chain = prompt | llm
 
 
-def run_habit_agent(user_input, chat_history, user_id="default"):
-    # Save incoming message
-    save_message(user_id, "user", user_input)
-
+def _run_tool(intent, user_input, user_id, save=save_message):
+    # Runs the tool for this intent; returns its reply (or None).
     tool_response = None
-
-    # Run tool-based logic if triggers match
-    if detect_gym_trigger(user_input):
+    if intent == "gym":
         tool_response = log_gym_session(user_input, user_id)
-        save_message(user_id, "assistant", tool_response)
+        save(user_id, "assistant", tool_response)
 
-    elif detect_food_trigger(user_input):
+    elif intent == "food":
         tool_response = log_food_entry(user_input, user_id)
-        save_message(user_id, "assistant", tool_response)
+        save(user_id, "assistant", tool_response)
 
-    elif detect_graph_command(user_input):
-        plot_gym_sessions()
+    elif intent == "graph":
+        plot_gym_sessions(user_id)
         tool_response = "📊 Showing your gym progress chart!"
 
-    elif detect_pie_command(user_input):
-        plot_food_pie_chart()
+    elif intent == "pie":
+        plot_food_pie_chart(user_id)
         tool_response = "🥧 Here's your food intake breakdown."
 
-    elif detect_timer_command(user_input):
+    elif intent == "timer":
         result = parse_timer_command(user_input)
         if result:
             duration, task = result
+            get_timer_service().start(user_id, task, duration)
             tool_response = f"⏱️ Timer started for {task} — {duration} seconds."
         else:
             tool_response = "❌ Couldn't parse timer info."
 
-    # If not a direct tool match, try recipe handler
-    elif not tool_response:
+    elif intent == "recipe":
         response = handle_recipe_query(user_input)
-        if response and "🍽️" in response or "🔥" in response:
+        if response and ("🍽️" in response or "🔥" in response):
             tool_response = response
+    return tool_response
+
 
-    # Prepare memory + conversation history
-        # Prepare memory + conversation history
-    memory_context = get_contextual_memory(user_id)
+def _routed_tool(user_input, user_id, save=save_message):
+    # Classify every intent in one local pass (LLM only for unclear messages)
+    with span("route_intent") as info:
+        intent = info["intent"] = route_intent(user_input)["intent"]
 
-    memory_as_messages = []
-    for line in [m["content"] for m in memory_context if "content" in m]:
-        if line.startswith("user:"):
-            memory_as_messages.append(HumanMessage(content=line[5:].strip()))
-        elif line.startswith("assistant:"):
-            memory_as_messages.append(AIMessage(content=line[9:].strip()))
+    # Run tool-based logic if triggers match
+    with span(f"tool.{intent}"):
+        return _run_tool(intent, user_input, user_id, save)
 
-    full_history = memory_as_messages + [HumanMessage(content=user_input)]
 
+def _food_summary(user_input, user_id):
     # Auto-analyze if user query contains food analysis keywords
     if "analyze food" in user_input.lower() or "diet analysis" in user_input.lower():
-        food_summary = summarize_food_logs()
-        user_input += f"\n\nHere is the food data summary for your analysis:\n{food_summary}"
+        with span("tool.food_summary"):
+            return f"\n\nHere is the food data summary for your analysis:\n{summarize_food_logs(user_id)}"
+    return ""
+
+
+def _gym_summary(user_input, user_id):
+    # ...and the same for gym analysis
+    if "analyze gym" in user_input.lower() or "workout analysis" in user_input.lower():
+        with span("tool.gym_summary"):
+            return f"\n\nHere is the gym data summary for your analysis:\n{summarize_gym_logs(user_id)}"
+    return ""
 
 
-    # Run main LLM reasoning
-    response = chain.invoke({
-        "input": user_input,
+def _chain_inputs(user_input, context, summaries):
+    full_history = [
+        HumanMessage(content=content) if role == "user" else AIMessage(content=content)
+        for role, content in context["history"]
+    ]
+    return {
+        "input": user_input + summaries,
         "chat_history": full_history,
-        "context": memory_context
-    })
+        "context": context["context"]
+    }
+
+
+def _prepare_turn(user_input, user_id):
+    # Runs the tools for this message and assembles the LLM inputs, one step after another.
+    # Returns (tool_response, chain inputs).
+    tool_response = _routed_tool(user_input, user_id)
+
+    # Recent turns + relevant older messages + stats, packed into the token budget
+    with span("context.build") as info:
+        context = build_context(user_id, user_input, extra=[tool_response] if tool_response else None)
+        info.update(tokens=context["tokens"], saved_tokens=context["saved_tokens"])
+
+    summaries = _food_summary(user_input, user_id) + _gym_summary(user_input, user_id)
+    return tool_response, _chain_inputs(user_input, context, summaries)
+
+
+async def _aprepare_turn(user_input, user_id):
+    # Same result as _prepare_turn, but the independent steps overlap: the user's
+    # message is queued for writing, and intent routing + the tool run on a worker
+    # thread beside the recent-message and semantic-hit retrieval. The stats and
+    # data summaries read the event store, so they wait for the tool's write.
+    writes = get_persist_queue()
+    writes.submit(user_id, save_message, user_id, "user", user_input)
+
+    def save_later(*args):
+        writes.submit(user_id, save_message, *args)
+
+    async def gather_sources():
+        with span("context.gather"):
+            return await asyncio.to_thread(gather_context, user_id, user_input, stats=False)
+
+    async def tool_then_stats():
+        tool_response = await asyncio.to_thread(_routed_tool, user_input, user_id, save_later)
+        with span("context.stats"):
+            stats, food, gym = await asyncio.gather(
+                asyncio.to_thread(stats_summary, user_id),
+                asyncio.to_thread(_food_summary, user_input, user_id),
+                asyncio.to_thread(_gym_summary, user_input, user_id),
+            )
+        return tool_response, stats, food + gym
+
+    (tool_response, stats, summaries), sources = await asyncio.gather(tool_then_stats(), gather_sources())
+    sources["stats"] = stats
+    with span("context.build") as info:
+        context = assemble_context(sources, user_input, extra=[tool_response] if tool_response else None)
+        info.update(tokens=context["tokens"], saved_tokens=context["saved_tokens"])
+    return tool_response, _chain_inputs(user_input, context, summaries)
+
+
+def _record_stream(turn, stream_start, first_token_at, chunks, usage):
+    # The LLM stream spans generator yields, so it is recorded by hand rather than with span().
+    now = time.perf_counter()
+    ttft = (first_token_at - stream_start) if first_token_at is not None else None
+    turn.record("llm.stream", stream_start, now - stream_start, chunks=chunks,
+                ttft=round(ttft, 6) if ttft is not None else None)
+    with turn.active():
+        count("llm_calls", kind="chat")
+        if usage:
+            count("llm_prompt_tokens", usage.get("input_tokens", 0), kind="chat")
+            count("llm_completion_tokens", usage.get("output_tokens", 0), kind="chat")
 
+
+def _finish_turn(user_id, message, reply):
     # Save LLM output
-    save_message(user_id, "assistant", response.content)
+    save_message(user_id, "assistant", reply)
+    index_messages(user_id, [("user", message), ("assistant", reply)])
+
+
+def stream_habit_agent(user_input, chat_history, user_id="default"):
+    # Yields the reply as it is produced: the tool result first, then LLM deltas.
+    turn = Trace("agent.turn", user_id=user_id)
+    try:
+        with turn.active():
+            # Replies from arun_habit_agent may still be queued; history must include them.
+            get_persist_queue().flush(user_id)
+            save_message(user_id, "user", user_input)
+            tool_response, inputs = _prepare_turn(user_input, user_id)
+        if tool_response:
+            yield f"{tool_response}\n\nAssistant: "
+
+        parts, first_token_at, usage = [], None, None
+        stream_start = time.perf_counter()
+        for chunk in chain.stream(inputs):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if not chunk.content:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(chunk.content)
+            yield chunk.content
+        _record_stream(turn, stream_start, first_token_at, len(parts), usage)
+
+        with turn.active(), span("persist"):
+            _finish_turn(user_id, user_input, "".join(parts))
+    finally:
+        turn.finish()
+
+
+async def astream_habit_agent(user_input, chat_history, user_id="default"):
+    # Async twin of stream_habit_agent, built on chain.astream.
+    turn = Trace("agent.turn", user_id=user_id)
+    try:
+        # to_thread copies the context, so the worker threads record into this turn.
+        with turn.active():
+            await asyncio.to_thread(get_persist_queue().flush, user_id)
+            tool_response, inputs = await _aprepare_turn(user_input, user_id)
+        if tool_response:
+            yield f"{tool_response}\n\nAssistant: "
+
+        parts, first_token_at, usage = [], None, None
+        stream_start = time.perf_counter()
+        async for chunk in chain.astream(inputs):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if not chunk.content:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(chunk.content)
+            yield chunk.content
+        _record_stream(turn, stream_start, first_token_at, len(parts), usage)
+
+        _queue_finish(user_id, user_input, "".join(parts))
+    finally:
+        turn.finish()
+
 
-    if tool_response:
-        return f"{tool_response}\n\nAssistant: {response.content}"
-    return response.content
+def _queue_finish(user_id, message, reply):
+    # Fire-and-forget: the reply is saved and indexed by the persistence worker
+    # (after the user message queued earlier); flushed before the user's next turn.
+    get_persist_queue().submit(user_id, _finish_turn, user_id, message, reply)
+
+
+async def arun_habit_agent(user_input, chat_history, user_id="default"):
+    # One whole turn without streaming: concurrent preparation, chain.ainvoke,
+    # then the reply is returned while its persistence is still queued.
+    turn = Trace("agent.turn", user_id=user_id, mode="async")
+    with turn.active():
+        try:
+            await asyncio.to_thread(get_persist_queue().flush, user_id)
+            tool_response, inputs = await _aprepare_turn(user_input, user_id)
+
+            with span("llm.invoke") as info:
+                result = await chain.ainvoke(inputs)
+                count("llm_calls", kind="chat")
+                usage = getattr(result, "usage_metadata", None)
+                if usage:
+                    info.update(prompt_tokens=usage.get("input_tokens", 0),
+                                completion_tokens=usage.get("output_tokens", 0))
+                    count("llm_prompt_tokens", usage.get("input_tokens", 0), kind="chat")
+                    count("llm_completion_tokens", usage.get("output_tokens", 0), kind="chat")
+            reply = result.content
+            _queue_finish(user_id, user_input, reply)
+        finally:
+            turn.finish()
+    return f"{tool_response}\n\nAssistant: {reply}" if tool_response else reply
+
+
+# ---------- One Event Loop for Sync Callers ----------
+# chain.ainvoke / astream go through the module-level ChatGroq, whose async HTTP
+# client keeps its connection pool bound to the loop it first ran on. A fresh
+# asyncio.run() per call would close that loop and break the next request, so
+# every sync entry point runs its coroutine on this one long-lived loop instead.
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def run_coroutine(coro):
+    # Runs coro on the shared agent loop and blocks for its result; safe to call
+    # from any thread, including one that is itself running another event loop.
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-loop", daemon=True).start()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        coro.close()
+        raise RuntimeError("run_coroutine() would block the agent loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+def run_habit_agent(user_input, chat_history, user_id="default"):
+    # Blocking form of arun_habit_agent, for callers without an event loop.
+    return run_coroutine(arun_habit_agent(user_input, chat_history, user_id))
@@ -0,0 +1,44 @@
+# auth.py
+#
+# Login accounts -> user ids. Every store, timer and chart is keyed by the user id
+# returned here. The original account keeps the "default" id so its existing
+# history stays attached; more accounts come from HABIT_USERS, e.g.
+#   HABIT_USERS="asha:secret1,ravi:secret2"
+
+import hmac
+import os
+import re
+
+LEGACY_ACCOUNT = ("hrushikesh mama", "mamamami", "default")
+
+
+def normalize_username(username):
+    return re.sub(r"\s+", " ", (username or "").strip().lower())
+
+
+def user_id_for(username):
+    # Stable, filesystem/SQL-friendly id derived from the login name.
+    return re.sub(r"[^a-z0-9_.-]+", "-", normalize_username(username)).strip("-")
+
+
+def load_accounts(spec=None):
+    # {normalized username: (password, user_id)}
+    name, password, user_id = LEGACY_ACCOUNT
+    accounts = {name: (password, user_id)}
+    spec = os.getenv("HABIT_USERS", "") if spec is None else spec
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        username, sep, password = item.partition(":")
+        if not sep or not user_id_for(username):
+            print(f"⚠️ Ignoring malformed HABIT_USERS entry: {username!r}")
+            continue
+        accounts[normalize_username(username)] = (password, user_id_for(username))
+    return accounts
+
+
+def authenticate(username, password, accounts=None):
+    # Returns the user id for valid credentials, else None.
+    accounts = load_accounts() if accounts is None else accounts
+    expected, user_id = accounts.get(normalize_username(username), (None, None))
+    if expected is None or not hmac.compare_digest(expected.encode("utf-8"), (password or "").encode("utf-8")):
+        return None
+    return user_id
@@ -0,0 +1,136 @@
+# benchmarks/bench_async_agent.py
+#
+# Wall-clock per agent turn: the sequential pipeline (save message -> intent + tool
+# -> context -> summaries -> chain.invoke -> save + index reply) vs
+# arun_habit_agent, which overlaps the independent steps and leaves persistence
+# to the write-behind queue. Tool LLM calls go to the stub server, the chat model
+# is a fake chain with a fixed delay, and the embedder sleeps like a CPU model
+# would (releasing the GIL), so no API key, network or model download is needed.
+#
+#   python -m benchmarks.bench_async_agent --turns 24 --llm-ms 400 --tool-llm-ms 150 --embed-ms 25
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from benchmarks.bench_context_builder import HashingEmbedder
+from benchmarks.harness import percentile
+from benchmarks.stub_llm_server import start_stub_server
+from benchmarks.suite import prepare_environment, stub_responder
+
+USER = "bench"
+MESSAGES = [
+    "any tips to stay motivated for leg day?",
+    "analyze food habits from this week please",
+    "suggest a vegetarian dinner, turn {n}",
+    "workout analysis: how consistent was I?",
+]
+
+
+class SlowEmbedder(HashingEmbedder):
+    def __init__(self, encode_ms):
+        self.delay = encode_ms / 1000
+
+    def encode(self, texts):
+        time.sleep(self.delay)
+        return super().encode(texts)
+
+
+class FakeChain:
+    def __init__(self, llm_ms):
+        self.delay = llm_ms / 1000
+
+    def invoke(self, inputs):
+        time.sleep(self.delay)
+        return SimpleNamespace(content="Solid week. Keep protein up and add one mobility session.")
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content="Solid week. Keep protein up and add one mobility session.")
+
+
+def sequential_turn(agent, text):
+    # The pre-async run_habit_agent: every step waits for the previous one.
+    agent.save_message(USER, "user", text)
+    tool_response, inputs = agent._prepare_turn(text, USER)
+    reply = agent.chain.invoke(inputs).content
+    agent._finish_turn(USER, text, reply)
+    return f"{tool_response}\n\nAssistant: {reply}" if tool_response else reply
+
+
+def timed_turns(turns, run_turn):
+    latencies = []
+    for n in range(turns):
+        text = MESSAGES[n % len(MESSAGES)].format(n=n)
+        start = time.perf_counter()
+        run_turn(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label:<22} p50 {percentile(latencies, 50):7.1f} ms   p95 {percentile(latencies, 95):7.1f} ms   "
+          f"mean {sum(latencies) / len(latencies):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--llm-ms", type=float, default=400, help="chat model latency")
+    parser.add_argument("--tool-llm-ms", type=float, default=150, help="stub server latency (recipe intent)")
+    parser.add_argument("--embed-ms", type=float, default=25, help="embedding latency per encode call")
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub_server(latency=args.tool_llm_ms / 1000, responder=stub_responder)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_environment(workdir, base_url)
+        sys.path.insert(0, cwd)
+        try:
+            import agent
+            import food_data
+            import semantic_memory
+            from benchmarks.food_fixture import synthetic_food_frame
+            from nutrition import annotate_nutrition
+            from persistence import get_persist_queue
+
+            food_data._food_df = annotate_nutrition(synthetic_food_frame())
+            semantic_memory._semantic_memory = semantic_memory.SemanticMemory(
+                os.path.join("data", "faiss.index"), embedder=SlowEmbedder(args.embed_ms),
+            )
+            agent.chain = FakeChain(args.llm_ms)
+            from event_store import get_event_store
+            start = datetime.now() - timedelta(days=8)
+            for n in range(8):   # some stats to retrieve
+                get_event_store(USER).append("gym_sessions", USER, start + timedelta(days=n), duration=40, note="cardio")
+                get_event_store(USER).append("food_log", USER, start + timedelta(days=n), note="ate dal rice and salad")
+
+            sequential = timed_turns(args.turns, lambda text: sequential_turn(agent, text))
+            loop = asyncio.new_event_loop()
+            concurrent = timed_turns(args.turns, lambda text: loop.run_until_complete(
+                agent.arun_habit_agent(text, [], USER)))
+            start = time.perf_counter()
+            get_persist_queue().flush()
+            flush_ms = (time.perf_counter() - start) * 1000
+            loop.close()
+            semantic_memory._semantic_memory.close()
+        finally:
+            server.shutdown()
+            os.chdir(cwd)
+
+    print(f"\n== {args.turns} turns: chat LLM {args.llm_ms:.0f} ms, tool LLM {args.tool_llm_ms:.0f} ms, "
+          f"embedding {args.embed_ms:.0f} ms ==")
+    report("sequential", sequential)
+    report("arun_habit_agent", concurrent)
+    saved = sum(sequential) / len(sequential) - sum(concurrent) / len(concurrent)
+    print(f"saved per turn         {saved:7.1f} ms ({saved / (sum(sequential) / len(sequential)):.0%})")
+    print(f"queued writes flushed in {flush_ms:.1f} ms after the last reply")
+
+
+if __name__ == "__main__":
+    main()
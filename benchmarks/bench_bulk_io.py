@@ -0,0 +1,135 @@
+# benchmarks/bench_bulk_io.py
+#
+# Rows/s and peak RSS for bulk_io: importing a multi-year fitness export as CSV,
+# JSONL and Parquet, and exporting it back out, against a load-it-all baseline
+# (pandas.read_csv of the whole file + one append_many). Each phase runs in a
+# fresh process so its peak RSS is its own; "Δ RSS" is the growth over the
+# process's RSS right after imports.
+#
+#   python -m benchmarks.bench_bulk_io --rows 500000 --chunk-size 5000
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ACTIVITIES = ["run", "strength training", "cycling", "swim", "yoga", "hiit", "walk"]
+MEALS = ["poha and tea", "dal rice and curd", "paneer wrap", "oats with banana", "chicken biryani", "idli sambar"]
+
+
+def synthetic_rows(rows, seed=5):
+    # A fitness-app style export: both tables interleaved, several events a day over years.
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1, 6, 0)
+    for n in range(rows):
+        timestamp = (start + timedelta(minutes=97 * n)).isoformat()
+        if n % 3 == 0:
+            yield {"table": "gym", "date": timestamp, "minutes": rng.choice([20, 30, 45, 60, 75]),
+                   "activity": rng.choice(ACTIVITIES)}
+        else:
+            yield {"table": "food", "date": timestamp, "minutes": "", "activity": rng.choice(MEALS)}
+
+
+def write_fixtures(workdir, rows, chunk_size):
+    # Streamed to disk, so the fixture itself never sits in memory.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from bulk_io import _chunks
+
+    paths = {fmt: os.path.join(workdir, f"history.{fmt}") for fmt in ("csv", "jsonl", "parquet")}
+    with open(paths["csv"], "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["table", "date", "minutes", "activity"])
+        writer.writeheader()
+        writer.writerows(synthetic_rows(rows))
+    with open(paths["jsonl"], "w") as f:
+        for row in synthetic_rows(rows):
+            f.write(json.dumps(row) + "\n")
+    writer = None
+    for chunk in _chunks(synthetic_rows(rows), chunk_size):
+        table = pa.Table.from_pylist([{**row, "minutes": float(row["minutes"] or 0)} for row in chunk])
+        writer = writer or pq.ParquetWriter(paths["parquet"], table.schema)
+        writer.write_table(table)
+    writer.close()
+    return paths
+
+
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run_phase(workdir, phase, fmt, path, user_id, chunk_size):
+    # Runs in a fresh process; returns (rows, seconds, peak RSS MB, RSS at start MB).
+    os.chdir(workdir)
+    import pandas as pd
+    import bulk_io
+    from event_store import get_event_store
+
+    baseline = _current_rss_mb()
+    started = time.perf_counter()
+    if phase == "import":
+        totals = bulk_io.import_file(path, user_id, chunk_size=chunk_size)
+        rows = totals["gym_sessions"] + totals["food_log"]
+    elif phase == "export":
+        bulk_io.export_file(path, user_id, chunk_size=chunk_size)
+        rows = sum(get_event_store(user_id).count(table, user_id) for table in ("gym_sessions", "food_log"))
+    else:   # load everything, then one write per table
+        frame = pd.read_csv(path, keep_default_na=False)
+        records = frame.to_dict("records")
+        batches = {"gym_sessions": [], "food_log": []}
+        for record in records:
+            table, event = bulk_io.normalize(record)
+            batches[table].append(event)
+        store = get_event_store(user_id)
+        rows = sum(store.append_many(table, user_id, events) for table, events in batches.items())
+    seconds = time.perf_counter() - started
+    if phase != "export" and get_event_store(user_id).verify_rollups(user_id):
+        print(f"❌ {phase} {fmt}: rollups disagree with the imported events")
+    get_event_store(user_id).close()
+    return rows, seconds, _rss_mb(), baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bulk_io import/export throughput and memory")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--no-baseline", action="store_true", help="skip the load-everything comparison")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"🧪 Writing {args.rows:,}-row fixtures ...")
+        sys.path.insert(0, cwd)
+        paths = write_fixtures(workdir, args.rows, args.chunk_size)
+        phases = [("import", fmt, paths[fmt], f"import-{fmt}") for fmt in paths]
+        phases += [("export", fmt, os.path.join(workdir, f"out.{fmt}"), "import-csv") for fmt in paths]
+        if not args.no_baseline:
+            phases.append(("load-all", "csv", paths["csv"], "load-all"))
+        for phase, fmt, path, user_id in phases:
+            with context.Pool(1, initializer=sys.path.insert, initargs=(0, cwd)) as pool:
+                rows, seconds, peak, base = pool.apply(run_phase, (workdir, phase, fmt, path, user_id, args.chunk_size))
+            size = os.path.getsize(path) / 2**20
+            results.append((phase, fmt, rows, seconds, peak, base, size))
+            print(f"⏱️ {phase} {fmt}: {rows:,} rows in {seconds:.1f} s")
+
+    print(f"\n{'phase':<10}{'format':<9}{'rows':>10}{'rows/s':>11}{'peak RSS':>11}{'Δ RSS':>9}{'file':>10}")
+    for phase, fmt, rows, seconds, peak, base, size in results:
+        print(f"{phase:<10}{fmt:<9}{rows:>10,}{rows / seconds:>11,.0f}{peak:>8.0f} MB{peak - base:>6.0f} MB"
+              f"{size:>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
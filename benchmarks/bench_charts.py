@@ -0,0 +1,80 @@
+# benchmarks/bench_charts.py
+#
+# Chart cost per request: the old pyplot rebuild + savefig + base64 on every call
+# vs the cached chart service, when the data changes only every --change-every
+# requests (a new log entry) and is otherwise re-requested unchanged (reruns).
+#
+#   python -m benchmarks.bench_charts --requests 200 --change-every 20 --points 90
+
+import argparse
+import base64
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+import charts
+from charts import ChartService, render_habit_lines
+
+
+def habit_series(points, bump=0):
+    start = date.today() - timedelta(days=points)
+    return {
+        "hours": {(start + timedelta(days=i)).isoformat(): 1 + (i % 3) * 0.25 for i in range(points)},
+        "calories": {(start + timedelta(days=i)).isoformat(): 1800 + (i * 37) % 400 + bump for i in range(points)},
+    }
+
+
+def legacy_plot_graph(series):
+    # The pre-service HabitMemory.plot_graph rendering path.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 5))
+    for key, date_map in series.items():
+        dates = sorted(date_map.keys())
+        values = [date_map[d] for d in dates]
+        plt.plot(dates, values, marker='o', label=key.capitalize())
+    plt.xlabel("Date")
+    plt.ylabel("Value")
+    plt.title("Habit Progress")
+    plt.xticks(rotation=45)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    buffer = BytesIO()
+    plt.savefig(buffer, format="png")
+    buffer.seek(0)
+    encoded = base64.b64encode(buffer.read()).decode("utf-8")
+    plt.close()
+    return encoded
+
+
+def run(requests, change_every, points, draw):
+    start = time.perf_counter()
+    for i in range(requests):
+        draw(habit_series(points, bump=i // change_every))
+    return (time.perf_counter() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--change-every", type=int, default=20)
+    parser.add_argument("--points", type=int, default=90)
+    args = parser.parse_args()
+
+    legacy_ms = run(args.requests, args.change_every, args.points, legacy_plot_graph)
+    service = ChartService()
+    cached_ms = run(args.requests, args.change_every, args.points,
+                    lambda series: service.png_base64("bench", "habits", series, render_habit_lines))
+    metrics = service.stats()["habits"]
+
+    print(f"\n== {args.requests} requests, data changes every {args.change_every}, {args.points} points/series ==")
+    print(f"pyplot every request    {legacy_ms:8.2f} ms/request")
+    print(f"chart service           {cached_ms:8.2f} ms/request  {legacy_ms / cached_ms:5.1f}x  "
+          f"({metrics['renders']} renders avg {metrics['avg_render_ms']:.0f} ms, {metrics['hits']} cache hits)")
+    print(f"version digest only     {run(args.requests, args.change_every, args.points, charts.data_version):8.3f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
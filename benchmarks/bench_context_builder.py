@@ -0,0 +1,98 @@
+# benchmarks/bench_context_builder.py
+#
+# Prompt tokens per turn: the old last-5 stringified tail vs build_context()
+# (recency window + semantic hits + rollup stats under a budget), plus whether
+# an old fact planted early in the history makes it into the context.
+# Semantic search uses a hashed bag-of-words embedder, so no model download.
+#
+#   python -m benchmarks.bench_context_builder --history 200 2000 --budget 400
+
+import argparse
+import os
+import re
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import context_builder
+import event_store
+import memory
+import semantic_memory
+from event_store import EventStore
+from message_store import MessageStore
+from semantic_memory import SemanticMemory
+from sharding import ShardedStores
+
+USER = "bench"
+FACT = "I am allergic to peanuts so never suggest anything with peanuts"
+QUERY = "any snack ideas that are safe with my peanuts allergy?"
+FILLER = [
+    ("user", "did 45 min chest workout at the gym today"),
+    ("assistant", "✅ Logged gym session: 45 min. Great consistency this week — keep the streak going!"),
+    ("user", "ate poha and tea for breakfast"),
+    ("assistant", "🍽️ Logged food: poha and tea. Consider adding some protein like sprouts or eggs."),
+    ("user", "how was my workout consistency this month?"),
+    ("assistant", "You trained 12 times this month, mostly upper body. Try adding a leg day for balance."),
+]
+
+
+class HashingEmbedder:
+    dimension = 384
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-6)
+
+
+def setup(workdir, history):
+    memory._message_stores = ShardedStores(MessageStore, os.path.join(workdir, "messages.db"))
+    event_store._stores = ShardedStores(EventStore, os.path.join(workdir, "events.db"))
+    semantic_memory._semantic_memory = SemanticMemory(
+        os.path.join(workdir, "faiss.index"), embedder=HashingEmbedder(), background=False
+    )
+    messages = [("user", FACT), ("assistant", "Noted — I'll avoid peanuts in suggestions.")]
+    messages += [FILLER[i % len(FILLER)] for i in range(history)]
+    for role, content in messages:
+        memory.save_message(USER, role, content)
+    context_builder.index_messages(USER, messages)
+    start = datetime.now() - timedelta(days=30)
+    event_store.get_event_store(USER).append_many("gym_sessions", USER, [
+        {"timestamp": start + timedelta(days=d), "duration": 45, "note": "workout"} for d in range(30)
+    ])
+    memory.save_message(USER, "user", QUERY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument("--budget", type=int, default=context_builder.CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    tokenizer = "tiktoken" if context_builder._encoding() is not None else "len/4"
+    for history in args.history:
+        with tempfile.TemporaryDirectory() as workdir:
+            setup(workdir, history)
+            start = time.perf_counter()
+            for _ in range(args.turns):
+                built = context_builder.build_context(USER, QUERY, budget=args.budget)
+            elapsed = (time.perf_counter() - start) / args.turns
+            semantic_memory._semantic_memory.close()
+
+        prompt = built["context"] + "".join(content for _, content in built["history"])
+        print(f"\n== {history:,} stored messages, budget {args.budget} ({tokenizer}) ==")
+        print(f"last-5 tail (old)    {built['baseline_tokens']:5d} tokens   old fact in context: no")
+        print(f"build_context        {built['tokens']:5d} tokens   old fact in context: "
+              f"{'yes' if 'allergic to peanuts' in prompt else 'no'}   {elapsed * 1000:.2f} ms/turn")
+        print(f"saved per turn       {built['saved_tokens']:+5d} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_embedding_service.py
+#
+# Cold-start costs of semantic memory and the effect of micro-batching:
+#   - import time of `memory` (fresh interpreter) and which heavy modules it drags in
+#   - model load + first query vs warm query (needs sentence-transformers installed)
+#   - N threads encoding one text each: direct model calls vs the batching service,
+#     using a fake model with a fixed per-call overhead
+#
+#   python -m benchmarks.bench_embedding_service --threads 32 --backend onnx
+
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from embedding_service import EmbeddingService
+
+HEAVY_MODULES = ["torch", "faiss", "sentence_transformers", "transformers"]
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {heavy!r} if m in sys.modules) or "none")
+"""
+
+
+def import_time(module):
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True,
+    )
+    if out.returncode:
+        return None, out.stderr.strip().splitlines()[-1]
+    elapsed, loaded = out.stdout.strip().splitlines()[-2:]
+    return float(elapsed), loaded
+
+
+class FakeModel:
+    # Fixed overhead per call (tokenizer/session setup) plus a small per-text cost.
+    # A real forward pass saturates the CPU, so concurrent calls run one at a time.
+    def __init__(self, call_ms=8.0, text_ms=0.2, dimension=384):
+        self.call_ms, self.text_ms, self.dimension = call_ms, text_ms, dimension
+        self._busy = threading.Lock()
+
+    def encode(self, texts, **_):
+        with self._busy:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return np.random.default_rng(len(texts)).standard_normal((len(texts), self.dimension)).astype("float32")
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+def concurrent_encode(encode, threads):
+    barrier = threading.Barrier(threads)
+
+    def worker(i):
+        barrier.wait()
+        encode([f"what did I eat on day {i}?"])
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx"])
+    args = parser.parse_args()
+
+    print("== import cost (fresh interpreter) ==")
+    for module in ["memory", "semantic_memory", "sentence_transformers"]:
+        elapsed, loaded = import_time(module)
+        if elapsed is None:
+            print(f"import {module:22s} unavailable: {loaded}")
+        else:
+            print(f"import {module:22s} {elapsed * 1000:8.1f} ms   heavy modules loaded: {loaded}")
+
+    print("\n== first query vs warm query ==")
+    service = EmbeddingService(backend=args.backend)
+    try:
+        start = time.perf_counter()
+        service.encode(["how long did I work out this week?"])
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        service.encode(["what did I have for dinner?"])
+        warm = time.perf_counter() - start
+        start = time.perf_counter()
+        service.encode(["how long did I work out this week?"])
+        cached = time.perf_counter() - start
+        print(f"backend {args.backend}: first {first * 1000:.0f} ms (model load {service.stats()['load_seconds'] * 1000:.0f} ms), "
+              f"warm {warm * 1000:.1f} ms, cached {cached * 1000:.3f} ms")
+    except ImportError as e:
+        print(f"skipped: {e}")
+
+    print(f"\n== {args.threads} concurrent single-text encodes (fake model) ==")
+    model = FakeModel()
+    direct = concurrent_encode(lambda texts: model.encode(texts), args.threads)
+    batched_service = EmbeddingService(model=FakeModel(), cache_size=0)
+    batched = concurrent_encode(batched_service.encode, args.threads)
+    stats = batched_service.stats()
+    print(f"direct calls    {direct * 1000:8.1f} ms  ({args.threads} model calls)")
+    print(f"micro-batched   {batched * 1000:8.1f} ms  ({stats['batches']} model calls)  {direct / batched:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_event_store.py
+#
+# Batched append throughput and indexed per-user range queries on the event store.
+#
+#   python -m benchmarks.bench_event_store --events 1000000 --users 1000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from event_store import EventStore
+
+
+def synthetic_sessions(n, users, rng, start=datetime(2022, 1, 1)):
+    for _ in range(n):
+        yield (
+            f"user{rng.randrange(users)}",
+            {"timestamp": start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)),
+             "duration": rng.choice([20, 30, 45, 60, 90]), "note": "gym session"},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event store benchmark")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as workdir:
+        store = EventStore(os.path.join(workdir, "events.db"))
+
+        start = time.perf_counter()
+        batch = {}
+        written = 0
+        for user_id, event in synthetic_sessions(args.events, args.users, rng):
+            batch.setdefault(user_id, []).append(event)
+            written += 1
+            if written % args.batch == 0:
+                with store.transaction() as conn:
+                    for uid, events in batch.items():
+                        store.append_many("gym_sessions", uid, events, conn=conn)
+                batch = {}
+        with store.transaction() as conn:
+            for uid, events in batch.items():
+                store.append_many("gym_sessions", uid, events, conn=conn)
+        elapsed = time.perf_counter() - start
+        print(f"batched appends: {args.events / elapsed:,.0f} events/s ({elapsed:.1f} s for {args.events:,})")
+
+        start = time.perf_counter()
+        store.append("gym_sessions", "user0", datetime.now(), duration=30, note="single")
+        print(f"single append: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        for label, window in [("30 days", 30), ("1 year", 365), ("all", None)]:
+            end = datetime(2025, 1, 1)
+            begin = end - timedelta(days=window) if window else None
+            start = time.perf_counter()
+            df = store.query_frame("gym_sessions", "user0", begin, end if window else None)
+            ms = (time.perf_counter() - start) * 1000
+            print(f"user range query ({label:>7}): {len(df):6d} rows in {ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
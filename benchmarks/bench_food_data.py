@@ -0,0 +1,52 @@
+# benchmarks/bench_food_data.py
+#
+# Cold (XLSX parse + cache write) vs warm (Parquet cache) food dataset load,
+# plus the cost of `import tools`, which no longer parses the dataset.
+#
+#   python -m benchmarks.bench_food_data [--path IndianFoodDatasetXLS.xlsx]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.food_fixture import write_synthetic_xlsx
+from food_data import load_food_data
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Food dataset cold/warm load benchmark")
+    parser.add_argument("--path", help="dataset to load (default: synthetic XLSX)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.path or write_synthetic_xlsx(os.path.join(workdir, "IndianFoodDatasetXLS.xlsx"))
+        cache_dir = os.path.join(workdir, "cache")
+
+        cold_ms, df = timed(lambda: load_food_data(path, cache_dir))
+        warm = [timed(lambda: load_food_data(path, cache_dir))[0] for _ in range(args.repeat)]
+
+        os.utime(path)  # new mtime, same bytes: falls back to the content hash
+        touched_ms, _ = timed(lambda: load_food_data(path, cache_dir))
+
+        print(f"rows: {len(df)}")
+        print(f"cold start (parse XLSX + write cache): {cold_ms:9.1f} ms")
+        print(f"warm start (Parquet cache):            {min(warm):9.1f} ms")
+        print(f"mtime changed, content unchanged:      {touched_ms:9.1f} ms")
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import tools"], check=True)
+    print(f"`import tools` in a fresh interpreter:  {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_habit_memory.py
+#
+# HabitMemory at large entry counts: the legacy JSON file (full rewrite with
+# indent=4 on every add, strptime + rewrite on every prune/plot) vs the SQLite
+# habit store (indexed insert, range-delete retention, GROUP BY for plots).
+# "plot" times the data path only; PNG rendering is cached by the chart service.
+#
+#   python -m benchmarks.bench_habit_memory --sizes 10000 100000
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from habit_store import HabitStore
+
+USER = "bench"
+
+
+def synthetic_entries(n, days=60):
+    today = date.today()
+    for i in range(n):
+        day = (today - timedelta(days=i % days)).isoformat()
+        if i % 2:
+            yield {"date": day, "type": "calories", "value": 1500 + i % 700}
+        else:
+            yield {"date": day, "type": "hours", "value": round(0.5 + (i % 4) * 0.25, 2)}
+
+
+class LegacyHabitMemory:
+    # The pre-store implementation's storage paths.
+    def __init__(self, memory_file):
+        self.memory_file = memory_file
+        self.memory = {}
+        if os.path.exists(memory_file):
+            with open(memory_file, "r") as f:
+                self.memory = json.load(f)
+
+    def save_memory(self):
+        with open(self.memory_file, "w") as f:
+            json.dump(self.memory, f, indent=4)
+
+    def add(self, user_id, entry):
+        self.memory.setdefault(user_id, []).append(entry)
+        self.save_memory()
+
+    def prune_old_entries(self, user_id, days=30):
+        cutoff = datetime.now().date() - timedelta(days=days)
+        self.memory[user_id] = [
+            e for e in self.memory.get(user_id, []) if datetime.strptime(e["date"], "%Y-%m-%d").date() >= cutoff
+        ]
+        self.save_memory()
+
+    def plot_data(self, user_id):
+        self.prune_old_entries(user_id)
+        data = {}
+        for entry in self.memory.get(user_id, []):
+            data.setdefault(entry["type"], {})
+            data[entry["type"]][entry["date"]] = data[entry["type"]].get(entry["date"], 0) + entry["value"]
+        return data
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--adds", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "habit_memory.json")
+            with open(path, "w") as f:
+                json.dump({USER: list(synthetic_entries(n))}, f)
+            legacy = LegacyHabitMemory(path)
+            store = HabitStore(os.path.join(workdir, "habits.db"))
+            store.append_many(USER, synthetic_entries(n))
+
+            extra = list(synthetic_entries(args.adds))
+            legacy_add = timed(lambda: [legacy.add(USER, e) for e in extra]) / args.adds
+            store_add = timed(lambda: [store.append(USER, e) for e in extra]) / args.adds
+            legacy_plot = timed(lambda: legacy.plot_data(USER), 3)
+            cutoff = date.today() - timedelta(days=30)
+            store_plot = timed(lambda: store.daily_totals(USER, since=cutoff), 3)
+            legacy_prune = timed(lambda: legacy.prune_old_entries(USER, days=15))
+            store_prune = timed(lambda: store.prune(date.today() - timedelta(days=15), user_id=USER))
+            store.close()
+
+        print(f"\n== {n:,} habit entries ==")
+        print(f"{'':8s} {'legacy JSON':>14s} {'SQLite store':>14s}")
+        for name, old, new in (("add", legacy_add, store_add), ("plot", legacy_plot, store_plot),
+                               ("prune", legacy_prune, store_prune)):
+            print(f"{name:8s} {old:11.2f} ms {new:11.3f} ms  {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
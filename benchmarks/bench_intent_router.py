@@ -0,0 +1,128 @@
+# benchmarks/bench_intent_router.py
+#
+# Compares the old serial chain of LLM detect_* calls with intent_router.route_intent.
+# The LLM is replaced by a labelled oracle that sleeps to mimic a network round trip.
+#
+#   python -m benchmarks.bench_intent_router --latency 0.25
+
+import argparse
+import json
+import time
+
+import tools
+from intent_router import route_intent
+
+CORPUS = [
+    ("I did 45 min workout yesterday", "gym"),
+    ("went to the gym for 1 hr", "gym"),
+    ("bench press and squats this morning", "gym"),
+    ("I had oats and milk for breakfast", "food"),
+    ("ate rajma chawal for lunch", "food"),
+    ("show my gym graph", "graph"),
+    ("plot my workouts", "graph"),
+    ("show a pie chart of my food", "pie"),
+    ("set a timer for 5 minutes for reading", "timer"),
+    ("suggest a vegetarian dinner", "recipe"),
+    ("calories in paneer butter masala", "recipe"),
+    ("hi", "chat"),
+    ("analyze food habits", "chat"),
+    ("how can I stay consistent this month?", "chat"),
+    ("what is a good protein target for me", "chat"),
+    ("ate dinner right after the gym", "food"),
+    ("hey, I did a 45 min workout today", "gym"),
+    ("ok I ate rice and dal for lunch", "food"),
+    ("I ate 500 calories in lunch", "food"),
+    ("any tips to stay motivated for leg day?", "chat"),
+    ("is running good for weight loss?", "chat"),
+    ("how often should I go to the gym", "chat"),
+    ("can you show my workout history", "graph"),
+    ("what did I have for dinner yesterday?", "chat"),
+    ("should I skip breakfast?", "chat"),
+]
+
+DETECTOR_KEYS = [
+    ("gym or workout session", "gym"),
+    ("food entry", "food"),
+    ("graph related to gym", "graph"),
+    ("pie chart", "pie"),
+    ("timer with a specific time", "timer"),
+]
+
+
+class FakeLLM:
+    def __init__(self, labels, latency):
+        self.labels = labels
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, user_input, system_instruction, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        label = self.labels.get(user_input, "chat")
+        if "For each key" in system_instruction:
+            return json.dumps({key: key == label for key in ["gym", "food", "graph", "pie", "timer", "recipe"]})
+        if "Understand if the user" in system_instruction:
+            return json.dumps({"intent": "calorie_query" if label == "recipe" else "none", "recipe_name": user_input})
+        if "Extract the timer" in system_instruction:
+            return '{"duration": 300, "task": "Reading"}'
+        for key, intent in DETECTOR_KEYS:
+            if key in system_instruction:
+                return "true" if label == intent else "false"
+        return ""
+
+
+def serial_chain(text):
+    # Mirrors the pre-router decision chain in run_habit_agent.
+    if tools.detect_gym_trigger(text):
+        return "gym"
+    if tools.detect_food_trigger(text):
+        return "food"
+    if tools.detect_graph_command(text):
+        return "graph"
+    if tools.detect_pie_command(text):
+        return "pie"
+    if tools.detect_timer_command(text):
+        tools.parse_timer_command(text)
+        return "timer"
+    tools.handle_recipe_query(text)
+    return "recipe_or_chat"
+
+
+def routed(text):
+    intent = route_intent(text)["intent"]
+    if intent == "timer":
+        tools.parse_timer_command(text)
+    elif intent == "recipe":
+        tools.handle_recipe_query(text)
+    return intent
+
+
+def run(label, fn, fake):
+    fake.calls = 0
+    start = time.perf_counter()
+    for text, _ in CORPUS:
+        fn(text)
+    elapsed = time.perf_counter() - start
+    turns = len(CORPUS)
+    print(f"{label:<14} {elapsed / turns * 1000:9.1f} ms/turn {fake.calls / turns:8.2f} LLM calls/turn")
+    return {"ms_per_turn": elapsed / turns * 1000, "llm_calls_per_turn": fake.calls / turns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent routing latency benchmark")
+    parser.add_argument("--latency", type=float, default=0.25, help="simulated LLM round trip in seconds")
+    args = parser.parse_args()
+
+    fake = FakeLLM(dict(CORPUS), args.latency)
+    tools.query_llm = fake
+    route_intent.cache_clear()
+
+    before = run("serial detect_*", serial_chain, fake)
+    after = run("intent_router", routed, fake)
+    agreement = sum(route_intent(text)["intent"] == label for text, label in CORPUS) / len(CORPUS)
+    print(f"router agreement with labels: {agreement:.0%}")
+    print(f"speedup: {before['ms_per_turn'] / max(after['ms_per_turn'], 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_message_store.py
+#
+# Per-turn cost of the legacy read-modify-write JSON log vs the SQLite message store
+# at a given history size.
+#
+#   python -m benchmarks.bench_message_store --sizes 10000 100000 1000000
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from message_store import MessageStore
+
+USER = "bench"
+
+
+def synthetic_messages(n):
+    now = datetime.now().isoformat()
+    for i in range(n):
+        role = "user" if i % 2 == 0 else "assistant"
+        yield {"role": role, "content": f"message {i}: did 30 min workout and ate dal rice", "timestamp": now}
+
+
+def legacy_save(filepath, role, content):
+    # The pre-store memory.save_message implementation.
+    messages = []
+    if os.path.exists(filepath):
+        with open(filepath, "r") as f:
+            messages = json.load(f)
+    messages.append({"role": role, "content": content, "timestamp": datetime.now().isoformat()})
+    with open(filepath, "w") as f:
+        json.dump(messages, f, indent=2)
+
+
+def legacy_tail(filepath, limit=5):
+    with open(filepath, "r") as f:
+        return json.load(f)[-limit:]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_size(n, repeat, workdir, legacy):
+    row = {"messages": n}
+
+    store = MessageStore(os.path.join(workdir, f"messages_{n}.db"))
+    store.append_many(USER, synthetic_messages(n))
+    row["store_save_ms"] = timed(lambda: store.append(USER, "user", "log 20 min walk"), repeat)
+    row["store_tail_ms"] = timed(lambda: store.tail(USER, 5), repeat)
+    store.close()
+
+    if legacy:
+        filepath = os.path.join(workdir, f"{USER}_{n}_messages.json")
+        with open(filepath, "w") as f:
+            json.dump(list(synthetic_messages(n)), f, indent=2)
+        legacy_repeat = max(1, repeat // 10)
+        row["json_save_ms"] = timed(lambda: legacy_save(filepath, "user", "log 20 min walk"), legacy_repeat)
+        row["json_tail_ms"] = timed(lambda: legacy_tail(filepath), legacy_repeat)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message store benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="skip the JSON baseline above this many messages")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'messages':>10} {'store save':>11} {'store tail':>11} {'json save':>11} {'json tail':>11}")
+        for n in args.sizes:
+            row = bench_size(n, args.repeat, workdir, legacy=n <= args.legacy_max)
+            print(f"{n:>10} {row['store_save_ms']:>9.3f}ms {row['store_tail_ms']:>9.3f}ms "
+                  f"{row.get('json_save_ms', float('nan')):>9.1f}ms {row.get('json_tail_ms', float('nan')):>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
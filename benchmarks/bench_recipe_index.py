@@ -0,0 +1,62 @@
+# benchmarks/bench_recipe_index.py
+#
+# Per-suggestion filter latency: two str.contains column scans vs RecipeIndex.
+#
+#   python -m benchmarks.bench_recipe_index [--path IndianFoodDatasetXLS.xlsx]
+
+import argparse
+import random
+import time
+
+from benchmarks.food_fixture import synthetic_food_frame
+from food_data import load_food_data
+from recipe_index import RecipeIndex
+
+QUERIES = [
+    {"course": "Lunch", "diet": "Vegetarian"},
+    {"course": "Dinner", "diet": "Non-Vegetarian"},
+    {"course": "Breakfast", "diet": "Vegetarian"},
+    {"course": "Dinner", "diet": "Vegetarian", "cuisine": "South Indian", "max_time": 30},
+]
+
+
+def scan_filter(df, course, diet, cuisine=None, max_time=None):
+    # The pre-index suggest_recipe filter, extended with the same optional filters.
+    mask = df['Course'].str.contains(course, case=False, na=False) & df['Diet'].str.contains(diet, case=False, na=False)
+    if cuisine:
+        mask &= df['Cuisine'].str.contains(cuisine, case=False, na=False)
+    if max_time:
+        mask &= df['TotalTimeInMins'] <= max_time
+    return df[mask]
+
+
+def pick(df, row_ids):
+    return df.iloc[int(random.choice(row_ids))] if len(row_ids) else None
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe filter benchmark")
+    parser.add_argument("--path", help="real dataset (default: synthetic)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    df = load_food_data(args.path) if args.path else synthetic_food_frame()
+    start = time.perf_counter()
+    index = RecipeIndex(df)
+    print(f"rows: {len(df)}  index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for query in QUERIES:
+        scan = per_call_us(lambda: scan_filter(df, **query), args.repeat)
+        indexed = per_call_us(lambda: pick(df, index.filter(**query)), args.repeat)
+        print(f"{str(query):<85} scan {scan:9.1f} us   index+pick {indexed:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
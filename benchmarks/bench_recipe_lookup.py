@@ -0,0 +1,75 @@
+# benchmarks/bench_recipe_lookup.py
+#
+# Hit rate and latency of calorie-query name lookups: the old lowercase-column
+# equality check vs RecipeIndex.search_names (exact hash + trigram ranking).
+#
+#   python -m benchmarks.bench_recipe_lookup [--path IndianFoodDatasetXLS.xlsx]
+
+import argparse
+import random
+import time
+
+from benchmarks.food_fixture import synthetic_food_frame
+from food_data import load_food_data
+from recipe_index import RecipeIndex
+
+
+def typo(name, rng):
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:]
+
+
+def make_queries(names, n, rng):
+    # (query, expected row id) with the phrasing users actually type.
+    variants = [
+        lambda s: s.lower(),
+        lambda s: f"{s.lower()} recipe",
+        lambda s: f"calories in {s}",
+        lambda s: typo(s.lower(), rng),
+    ]
+    queries = []
+    for row_id in rng.sample(range(len(names)), n):
+        name = names[row_id]
+        if len(name) > 4:
+            queries.append((rng.choice(variants)(name), row_id))
+    return queries
+
+
+def old_lookup(df, recipe_name):
+    result = df[df['TranslatedRecipeName'].str.lower() == recipe_name]
+    return result.index[0] if not result.empty else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe name lookup benchmark")
+    parser.add_argument("--path", help="real dataset (default: synthetic)")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    df = load_food_data(args.path) if args.path else synthetic_food_frame()
+    index = RecipeIndex(df)
+    names = df['TranslatedRecipeName'].tolist()
+    queries = make_queries(names, args.queries, rng)
+
+    def same_dish(row_id, expected):
+        return row_id is not None and names[row_id].lower() == names[expected].lower()
+
+    start = time.perf_counter()
+    old_hits = sum(same_dish(old_lookup(df, q.strip().lower()), expected) for q, expected in queries)
+    old_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    start = time.perf_counter()
+    results = [(index.search_names(q, k=5), expected) for q, expected in queries]
+    new_us = (time.perf_counter() - start) / len(queries) * 1e6
+    top1 = sum(bool(r) and same_dish(r[0][0], expected) for r, expected in results)
+    top5 = sum(any(same_dish(row_id, expected) for row_id, _ in r) for r, expected in results)
+
+    print(f"rows: {len(df)}  queries: {len(queries)}")
+    print(f"exact column match:  hit rate {old_hits / len(queries):6.1%}   {old_us:8.1f} us/query")
+    print(f"name index top-1:    hit rate {top1 / len(queries):6.1%}   {new_us:8.1f} us/query")
+    print(f"name index top-5:    hit rate {top5 / len(queries):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
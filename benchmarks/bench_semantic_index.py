@@ -0,0 +1,113 @@
+# benchmarks/bench_semantic_index.py
+#
+# Recall@k vs latency for SemanticMemory's vector layout on CPU, using synthetic
+# clustered 384-d vectors (no embedding model needed):
+#   - old layout: one global IndexFlatL2, top_k first, then filter by user
+#   - per-user partitions (what SemanticMemory now does), flat or HNSW
+#
+#   python -m benchmarks.bench_semantic_index --sizes 10000 100000 1000000
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from vector_index import HNSW_M, VectorPartition
+
+DIM = 384
+
+
+PROJECTION = np.random.default_rng(0).standard_normal((24, DIM)).astype("float32")
+
+
+def clustered_vectors(n, rng, clusters=256):
+    # Sentence embeddings have low intrinsic dimension: cluster in a small latent
+    # space, project up to 384-d, then normalize like MiniLM does.
+    centers = np.random.default_rng(1).standard_normal((clusters, PROJECTION.shape[0])).astype("float32")
+    latent = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, PROJECTION.shape[0])).astype("float32")
+    vectors = latent @ PROJECTION + 0.05 * rng.standard_normal((n, DIM)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def recall(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def bench(n, users, k, queries, rng):
+    vectors = clustered_vectors(n, rng)
+    owners = rng.integers(0, users, n)
+    query_vecs = clustered_vectors(queries, rng)
+    query_users = rng.integers(0, users, queries)
+
+    flat = faiss.IndexFlatL2(DIM)
+    flat.add(vectors)
+    truth, flat_ms = timed_search(flat, query_vecs, k)
+    print(f"\n== {n:,} vectors, {users} users, k={k} ==")
+    print(f"single-tenant  flat (exact)          recall 1.000  {flat_ms:8.3f} ms/query")
+
+    start = time.perf_counter()
+    hnsw = faiss.IndexHNSWFlat(DIM, HNSW_M)
+    hnsw.hnsw.efConstruction = 80
+    hnsw.add(vectors)
+    build_s = time.perf_counter() - start
+    for ef in (16, 64, 128):
+        hnsw.hnsw.efSearch = ef
+        found, ms = timed_search(hnsw, query_vecs, k)
+        print(f"single-tenant  HNSW ef={ef:<4}           recall {recall(found, truth):.3f}  {ms:8.3f} ms/query  (build {build_s:.1f}s)")
+
+    # Multi-tenant: what a given user actually gets back.
+    partitions = {}
+    for uid in range(users):
+        rows = np.flatnonzero(owners == uid)
+        part = VectorPartition(DIM)
+        part.add(vectors[rows], rows.tolist())
+        partitions[uid] = part
+
+    user_truth, old_hits, old_ms, part_found, part_ms = [], [], 0.0, [], 0.0
+    for q, uid in zip(query_vecs, query_users):
+        part = partitions[uid]
+        exact = faiss.IndexFlatL2(DIM)
+        exact.add(vectors[owners == uid])
+        _, ids = exact.search(q[None], k)
+        user_truth.append([part.texts[i] for i in ids[0]])
+
+        start = time.perf_counter()
+        _, ids = flat.search(q[None], k)
+        old_ms += time.perf_counter() - start
+        old_hits.append([i for i in ids[0] if owners[i] == uid])
+
+        start = time.perf_counter()
+        _, ids = part.search(q[None], k)
+        part_ms += time.perf_counter() - start
+        part_found.append([part.texts[i] for i in ids[0]])
+
+    old_recall = recall(old_hits, user_truth)
+    empty = np.mean([not hits for hits in old_hits])
+    print(f"multi-tenant   global top_k → filter  recall {old_recall:.3f}  {old_ms / queries * 1000:8.3f} ms/query  "
+          f"({empty:.0%} of users got nothing)")
+    print(f"multi-tenant   per-user partition     recall {recall(part_found, user_truth):.3f}  "
+          f"{part_ms / queries * 1000:8.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic index recall/latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for n in args.sizes:
+        bench(n, args.users, args.k, args.queries, rng)
+
+
+if __name__ == "__main__":
+    main()
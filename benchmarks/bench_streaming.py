@@ -0,0 +1,99 @@
+# benchmarks/bench_streaming.py
+#
+# Time-to-first-token for the agent: blocking run_habit_agent (the page shows
+# nothing until the whole reply exists) vs stream_habit_agent / astream_habit_agent.
+# The LLM is a fake streaming chain with a fixed prefill delay and per-token delay,
+# so no API key or network is needed.
+#
+#   python -m benchmarks.bench_streaming --tokens 300 --prefill-ms 400 --token-ms 15
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import agent
+import event_store
+import memory
+from event_store import EventStore
+from message_store import MessageStore
+from sharding import ShardedStores
+
+USER = "bench"
+QUESTION = "any tips to stay motivated for leg day?"
+
+
+class FakeStreamingChain:
+    # Stands in for `prompt | llm`: yields AIMessageChunk-like objects after a prefill delay.
+    def __init__(self, tokens, prefill_ms, token_ms):
+        self.tokens = [f"word{i} " for i in range(tokens)]
+        self.prefill, self.per_token = prefill_ms / 1000, token_ms / 1000
+
+    def stream(self, inputs):
+        time.sleep(self.prefill)
+        for token in self.tokens:
+            time.sleep(self.per_token)
+            yield SimpleNamespace(content=token)
+
+    async def astream(self, inputs):
+        await asyncio.sleep(self.prefill)
+        for token in self.tokens:
+            await asyncio.sleep(self.per_token)
+            yield SimpleNamespace(content=token)
+
+    def invoke(self, inputs):
+        return SimpleNamespace(content="".join(chunk.content for chunk in self.stream(inputs)))
+
+    async def ainvoke(self, inputs):
+        return SimpleNamespace(content="".join([chunk.content async for chunk in self.astream(inputs)]))
+
+
+def timed(chunks):
+    start = time.perf_counter()
+    first, count = None, 0
+    for chunk in chunks:
+        if first is None and chunk:
+            first = time.perf_counter() - start
+        count += 1
+    return first, time.perf_counter() - start, count
+
+
+async def atimed(chunks):
+    start = time.perf_counter()
+    first, count = None, 0
+    async for chunk in chunks:
+        if first is None and chunk:
+            first = time.perf_counter() - start
+        count += 1
+    return first, time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--prefill-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        memory._message_stores = ShardedStores(MessageStore, os.path.join(workdir, "messages.db"))
+        event_store._stores = ShardedStores(EventStore, os.path.join(workdir, "events.db"))
+        agent.chain = FakeStreamingChain(args.tokens, args.prefill_ms, args.token_ms)
+
+        start = time.perf_counter()
+        agent.run_habit_agent(QUESTION, [], USER)
+        blocking = time.perf_counter() - start
+        sync_first, sync_total, sync_chunks = timed(agent.stream_habit_agent(QUESTION, [], USER))
+        async_first, async_total, _ = agent.run_coroutine(atimed(agent.astream_habit_agent(QUESTION, [], USER)))
+
+    print(f"\n== {args.tokens} tokens, prefill {args.prefill_ms:.0f} ms, {args.token_ms:.0f} ms/token ==")
+    print(f"run_habit_agent (blocking)   first visible {blocking * 1000:8.0f} ms   complete {blocking * 1000:8.0f} ms")
+    print(f"stream_habit_agent           first token   {sync_first * 1000:8.0f} ms   complete {sync_total * 1000:8.0f} ms  ({sync_chunks} chunks)")
+    print(f"astream_habit_agent          first token   {async_first * 1000:8.0f} ms   complete {async_total * 1000:8.0f} ms")
+    print(f"time-to-first-token speedup  {blocking / sync_first:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
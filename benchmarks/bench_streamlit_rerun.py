@@ -0,0 +1,109 @@
+# benchmarks/bench_streamlit_rerun.py
+#
+# Rerun time of main.py against chat history length, driven headlessly with
+# streamlit.testing.v1.AppTest. Each history length is timed twice: windowed
+# (the default: last CHAT_PAGE_SIZE turns, one markdown element per page) and
+# fully expanded (every "show earlier" page opened), plus the number of markdown
+# elements the rerun produced. The first run of the process is reported on its
+# own: it pays for the cached resources (header image, dataset, memory).
+#
+#   python -m benchmarks.bench_streamlit_rerun --history 0 50 200 1000 --reruns 10
+#
+# LLM traffic goes to the local stub server and semantic memory uses the hashed
+# embedder, so no API key or model download is needed.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+from benchmarks.harness import percentile
+from benchmarks.stub_llm_server import start_stub_server
+from benchmarks.suite import prepare_environment, stub_responder
+
+USER = "bench"
+TURNS = [
+    ("user", "did 45 min chest workout at the gym today"),
+    ("assistant", "💪 Logged your gym session: 45 minutes. Nice consistency — keep the streak going!"),
+    ("user", "what should I eat after leg day?"),
+    ("assistant", "Go for protein and carbs: paneer bhurji with rotis, or dal rice with curd and a salad."),
+]
+
+
+def history(length):
+    return [TURNS[n % len(TURNS)] for n in range(length)]
+
+
+def new_app(app_path, length, pages):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=60)
+    app.session_state["authenticated"] = True
+    app.session_state["user_id"] = USER
+    # Unbounded deque, so lengths past MAX_CHAT_HISTORY can be measured too.
+    app.session_state["chat_history"] = deque(history(length))
+    app.session_state["chat_pages"] = pages
+    return app
+
+
+def run_once(app):
+    start = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_reruns(app_path, length, pages, reruns):
+    # (rerun latencies in ms, markdown elements on the page) for one history length.
+    app = new_app(app_path, length, pages)
+    run_once(app)
+    latencies = [run_once(app) for _ in range(reruns)]
+    return latencies, len(app.markdown)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py rerun time vs chat history length")
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 50, 200, 1000])
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    app_path = os.path.abspath("main.py")
+    server, state, base_url = start_stub_server(latency=0.01, responder=stub_responder)
+    cwd = os.getcwd()
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_environment(workdir, base_url)
+        sys.path.insert(0, cwd)
+        try:
+            import food_data
+            import semantic_memory
+            from benchmarks.bench_context_builder import HashingEmbedder
+            from benchmarks.food_fixture import synthetic_food_frame
+            from nutrition import annotate_nutrition
+
+            food_data._food_df = annotate_nutrition(synthetic_food_frame())
+            semantic_memory._semantic_memory = semantic_memory.SemanticMemory(
+                os.path.join("data", "faiss.index"), embedder=HashingEmbedder(),
+            )
+            first = run_once(new_app(app_path, 0, 1))
+            for length in args.history:
+                for label, pages in (("windowed", 1), ("expanded", 10**6)):
+                    latencies, elements = time_reruns(app_path, length, pages, args.reruns)
+                    rows.append((length, label, latencies, elements))
+                    print(f"⏱️ {length} turns, {label}: p50 {percentile(latencies, 50):.1f} ms")
+            semantic_memory._semantic_memory.close()
+        finally:
+            server.shutdown()
+            os.chdir(cwd)
+
+    print(f"\nfirst run in the process (loads cached resources): {first:.0f} ms")
+    print(f"{'history':>8}  {'render':<9}{'p50 ms':>9}{'p95 ms':>9}{'markdown els':>14}")
+    for length, label, latencies, elements in rows:
+        print(f"{length:>8}  {label:<9}{percentile(latencies, 50):>9.1f}{percentile(latencies, 95):>9.1f}{elements:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_text_parsing.py
+#
+# Accuracy and throughput of text_parsing on a labelled corpus of chat messages.
+# Every message has the date, minutes and calories a person would read out of it
+# (relative to a fixed "now"); the run fails if the parser gets any field wrong.
+# Throughput is messages/s for the full parse (date + duration + calories),
+# against the old path that ran dateparser.parse on every gym message.
+#
+#   python -m benchmarks.bench_text_parsing --rounds 200
+
+import argparse
+import sys
+import time
+from datetime import date, datetime
+
+import text_parsing
+from text_parsing import parse_calories, parse_date, parse_duration
+from tracing import metrics
+
+NOW = datetime(2025, 3, 19, 18, 30)   # a Wednesday
+TODAY = NOW.date()
+
+# (message, date, minutes, calories)
+CORPUS = [
+    ("did 45 min chest workout at the gym today", TODAY, 45, None),
+    ("ran for 30 minutes yesterday", date(2025, 3, 18), 30, None),
+    ("2 hrs of gym", TODAY, 120, None),
+    ("gym session 1 hr 20 min", TODAY, 80, None),
+    ("did 1h30m of cardio", TODAY, 90, None),
+    ("1h 15m deadlift day", TODAY, 75, None),
+    ("1.5 hours of badminton", TODAY, 90, None),
+    ("half an hour of yoga this morning", TODAY, 30, None),
+    ("an hour and a half of football last night", TODAY, 90, None),
+    ("two hours of swimming", TODAY, 120, None),
+    ("a 40 mins walk day before yesterday", date(2025, 3, 17), 40, None),
+    ("workout 3 days ago for 50 min", date(2025, 3, 16), 50, None),
+    ("leg day 2 months ago, 45 min", date(2025, 1, 19), 45, None),   # dateparser fallback
+    ("did legs a week ago, 60 minutes", date(2025, 3, 12), 60, None),
+    ("went to the gym last week for an hour", date(2025, 3, 12), 60, None),
+    ("did 40 min gym on 12 march", date(2025, 3, 12), 40, None),
+    ("bench press 25 mins on 3rd of march", date(2025, 3, 3), 25, None),
+    ("gym on march 9th, 55 min", date(2025, 3, 9), 55, None),
+    ("workout on 25 dec for 35 minutes", date(2024, 12, 25), 35, None),
+    ("workout 14 feb 2024 45 min", date(2024, 2, 14), 45, None),
+    ("gym on 14/02 for 30 min", date(2025, 2, 14), 30, None),
+    ("cardio 10/01/2025 20 mins", date(2025, 1, 10), 20, None),
+    ("logged 2025-03-02: 70 minutes gym", date(2025, 3, 2), 70, None),
+    ("stretching 14.02.2025 for 15 min", date(2025, 2, 14), 15, None),
+    ("ran 5k on monday in 28 minutes", date(2025, 3, 17), 28, None),
+    ("last wednesday I did 45 min of gym", date(2025, 3, 12), 45, None),
+    ("gym on sat, 1 hour", date(2025, 3, 15), 60, None),
+    ("sunday workout 50 min", date(2025, 3, 16), 50, None),
+    ("burned 420 calories on the bike", TODAY, None, 420),
+    ("burned 450 kcal yesterday", date(2025, 3, 18), None, 450),
+    ("ate about 1.2k calories for lunch", TODAY, None, 1200),
+    ("spin class 45 min, 380 cals", TODAY, 45, 380),
+    ("slept 7 hours last night", TODAY, 420, None),
+    ("slept 6.5 hrs", TODAY, 390, None),
+    ("meditated 10 mins at 7 am", TODAY, 10, None),
+    ("ate poha and tea for breakfast", TODAY, None, None),
+    ("I sat on the bench and ate 5 mangoes", TODAY, None, None),
+    ("did 2 marathons in my life, 3 sets of 10 reps today", TODAY, None, None),
+    ("french fries with friends", TODAY, None, None),
+    ("how consistent was my training this month?", TODAY, None, None),
+    ("I may skip gym, ran 5k instead", TODAY, None, None),
+    ("ran 400 m sprints", TODAY, None, None),
+    ("walked 800 m to the gym", TODAY, None, None),
+    ("did 45m of rowing", TODAY, 45, None),
+    ("an hour and a half plus 10 min of cycling", TODAY, 100, None),
+]
+
+
+def legacy_parse(text):
+    # The old tools.log_gym_session path: dateparser on the whole message, plus a regex.
+    import re
+    import dateparser
+    dateparser.parse(text, settings={"RELATIVE_BASE": NOW})
+    re.search(r"(\d+)\s*(min|minutes|mins|hrs|hours|hr)", text.lower())
+
+
+def fast_parse(text):
+    parse_date(text, NOW)
+    parse_duration(text)
+    parse_calories(text)
+
+
+def check_accuracy():
+    wrong = []
+    for text, expected_date, minutes, calories in CORPUS:
+        got = (parse_date(text, NOW), parse_duration(text), parse_calories(text))
+        if got != (expected_date, minutes, calories):
+            wrong.append((text, (expected_date, minutes, calories), got))
+    return wrong
+
+
+def throughput(parse, rounds):
+    messages = [text for text, *_ in CORPUS]
+    parse(messages[0])   # imports / pattern compilation out of the timing
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in messages:
+            parse(text)
+    return rounds * len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="text_parsing accuracy and throughput")
+    parser.add_argument("--rounds", type=int, default=200, help="passes over the corpus for the fast parser")
+    parser.add_argument("--legacy-rounds", type=int, default=2, help="passes for the dateparser baseline")
+    args = parser.parse_args()
+
+    wrong = check_accuracy()
+    counters, _ = metrics.snapshot()
+    fallbacks = sum(value for (name, _), value in counters.items() if name == "date_parse_fallbacks")
+    print(f"accuracy     {len(CORPUS) - len(wrong)}/{len(CORPUS)} messages "
+          f"({fallbacks} needed the dateparser fallback)")
+    for text, expected, got in wrong:
+        print(f"  ❌ {text!r}: expected {expected}, got {got}")
+
+    fast = throughput(fast_parse, args.rounds)
+    grammar_only = throughput(lambda text: text_parsing._fast_date(text.lower(), TODAY), args.rounds)
+    legacy = throughput(legacy_parse, args.legacy_rounds)
+    print(f"text_parsing {fast:12,.0f} msg/s   (date grammar alone {grammar_only:,.0f} msg/s)")
+    print(f"dateparser   {legacy:12,.0f} msg/s   → {fast / legacy:,.0f}x faster")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
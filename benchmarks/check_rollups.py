@@ -0,0 +1,62 @@
+# benchmarks/check_rollups.py
+#
+# Randomized consistency check: incremental rollups (including backfilled,
+# out-of-order sessions) must equal a full recompute from the raw events.
+# Also times reading rollups vs rescanning the history.
+#
+#   python -m benchmarks.check_rollups --events 20000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from event_store import EventStore
+from rollups import classify_meal
+
+MEALS = ["oats for breakfast", "rice and dal at lunch", "paneer at night", "chips", "morning smoothie"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollup consistency check")
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start_day = datetime(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as workdir:
+        store = EventStore(os.path.join(workdir, "events.db"))
+        for _ in range(args.events):
+            user_id = f"user{rng.randrange(args.users)}"
+            when = start_day + timedelta(days=rng.randrange(400), minutes=rng.randrange(1440))
+            if rng.random() < 0.5:
+                store.append("gym_sessions", user_id, when, duration=rng.choice([0, 15, 30, 45, 60, 90]), note="gym")
+            else:
+                store.append("food_log", user_id, when, note=rng.choice(MEALS))
+
+        failures = {u: m for u in (f"user{i}" for i in range(args.users)) if (m := store.verify_rollups(u))}
+        print("✅ rollups match a full recompute" if not failures else f"❌ mismatches: {failures}")
+
+        user_id = "user0"
+        start = time.perf_counter()
+        store.gym_daily(user_id), store.meal_counts(user_id), store.streak(user_id)
+        rollup_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        df = store.query_frame("gym_sessions", user_id)
+        df.groupby(df["timestamp"].dt.date)["duration"].sum()
+        notes = store.query_arrays("food_log", user_id, columns=["note"])["note"]
+        pd.Series([classify_meal(n) for n in notes]).value_counts()
+        scan_ms = (time.perf_counter() - start) * 1000
+        print(f"read rollups: {rollup_ms:.2f} ms   rescan history: {scan_ms:.2f} ms")
+        raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
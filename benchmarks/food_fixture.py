@@ -0,0 +1,50 @@
+# benchmarks/food_fixture.py
+#
+# Synthetic stand-in for IndianFoodDatasetXLS.xlsx (same columns, similar size)
+# so the recipe benchmarks run without the real dataset.
+
+import random
+
+import pandas as pd
+
+DATASET_ROWS = 6871
+
+DISHES = ["paneer butter masala", "rajma chawal", "masala dosa", "aloo paratha", "chicken biryani",
+          "dal makhani", "chole bhature", "poha", "upma", "egg curry", "fish curry", "veg pulao",
+          "palak paneer", "idli sambar", "mutton rogan josh", "kadhi pakora", "gajar halwa", "khichdi"]
+PREFIXES = ["", "spicy ", "homestyle ", "quick ", "kerala style ", "punjabi ", "healthy ", "instant "]
+SUFFIXES = ["", " recipe", " with mint chutney", " (restaurant style)", " in pressure cooker"]
+INGREDIENTS = ["rice", "potato", "paneer", "chicken", "egg", "milk", "ghee", "oil", "dal", "bread",
+               "cheese", "curd", "butter", "wheat flour", "sugar", "onion", "tomato", "ginger",
+               "garlic", "green chillies", "turmeric powder", "salt", "cumin seeds", "coriander leaves"]
+COURSES = ["Lunch", "Dinner", "Breakfast", "Snack", "Side Dish", "Main Course", "Dessert",
+           "North Indian Breakfast", "South Indian Breakfast", "Appetizer", "World Breakfast"]
+DIETS = ["Vegetarian", "Non Vegeterian", "High Protein Vegetarian", "Eggetarian", "Diabetic Friendly",
+         "High Protein Non Vegetarian", "Vegan", "Gluten Free", "No Onion No Garlic (Sattvic)"]
+CUISINES = ["Indian", "North Indian", "South Indian Recipes", "Punjabi", "Kerala Recipes",
+            "Bengali Recipes", "Gujarati Recipes", "Continental", "Mughlai", "Chettinad"]
+
+
+def synthetic_food_frame(n=DATASET_ROWS, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        name = f"{rng.choice(PREFIXES)}{rng.choice(DISHES)}{rng.choice(SUFFIXES)}".strip().title()
+        if i >= len(DISHES):
+            name = f"{name} {i}"
+        ingredients = ", ".join(f"{rng.randint(1, 3)} cup {x}" for x in rng.sample(INGREDIENTS, rng.randint(4, 10)))
+        rows.append({
+            "TranslatedRecipeName": name if i >= len(DISHES) else DISHES[i].title(),
+            "TranslatedIngredients": ingredients.title(),
+            "TotalTimeInMins": rng.choice([10, 15, 20, 25, 30, 40, 45, 60, 90, 120, 240]),
+            "Servings": rng.randint(1, 6),
+            "Cuisine": rng.choice(CUISINES),
+            "Course": rng.choice(COURSES),
+            "Diet": rng.choice(DIETS),
+        })
+    return pd.DataFrame(rows)
+
+
+def write_synthetic_xlsx(path, n=DATASET_ROWS):
+    synthetic_food_frame(n).to_excel(path, index=False)
+    return path
@@ -0,0 +1,171 @@
+# benchmarks/harness.py
+#
+# Shared measuring/reporting for the benchmark suite: per-op latency percentiles,
+# throughput, peak Python heap (tracemalloc), JSON result files and run-vs-run
+# comparison. Scenarios only supply a callable op(i).
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# A scenario regresses when p95 latency grows, or throughput drops, by more than this.
+REGRESSION_THRESHOLD = 0.20
+# ...and the slowdown is also at least this large in absolute terms (sub-0.1 ms ops are noisy).
+NOISE_FLOOR_MS = 0.05
+
+
+def percentile(values, q):
+    # Linear interpolation between closest ranks (numpy's default method).
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _timed(op, i):
+    start = time.perf_counter()
+    try:
+        op(i)
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def run_scenario(name, op, ops, warmup=5, threads=1, memory_ops=20):
+    # Timing pass (no tracemalloc, it slows allocation-heavy code), then a short
+    # memory pass for the peak traced heap. Returns one result row.
+    for i in range(warmup):
+        op(i)
+
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(lambda i: _timed(op, i), range(warmup, warmup + ops)))
+    else:
+        samples = [_timed(op, i) for i in range(warmup, warmup + ops)]
+    wall = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        for i in range(memory_ops):
+            op(warmup + ops + i)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies = [seconds * 1000 for seconds, _ in samples]
+    errors = [error for _, error in samples if error]
+    return {
+        "name": name,
+        "ops": ops,
+        "threads": threads,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "max_ms": max(latencies, default=0.0),
+        "throughput_ops_s": ops / wall if wall else 0.0,
+        "peak_mem_kb": peak / 1024,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def skipped(name, reason):
+    return {"name": name, "skipped": reason}
+
+
+# ---------- Reporting ----------
+
+def print_results(results):
+    print(f"\n{'scenario':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10} {'peak KB':>9} {'err':>4}")
+    for row in results:
+        if "skipped" in row:
+            print(f"{row['name']:<32} skipped: {row['skipped']}")
+            continue
+        print(f"{row['name']:<32} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+              f"{row['throughput_ops_s']:>10.1f} {row['peak_mem_kb']:>9.0f} {row['errors']:>4}")
+        if row["first_error"]:
+            print(f"{'':<32} ⚠️ {row['first_error']}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata(args):
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": args,
+    }
+
+
+def write_results(path, meta, results):
+    # ru_maxrss is KB on Linux, bytes on macOS; the whole run's peak RSS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    meta = {**meta, "max_rss_mb": maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# ---------- Run vs Run ----------
+
+def compare(baseline, candidate, threshold=REGRESSION_THRESHOLD, noise_floor_ms=NOISE_FLOOR_MS):
+    # Rows for scenarios present (and not skipped) in both runs.
+    base = {row["name"]: row for row in baseline["results"] if "skipped" not in row}
+    rows = []
+    for row in candidate["results"]:
+        old = base.get(row["name"])
+        if old is None or "skipped" in row:
+            continue
+        p95 = row["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        throughput = row["throughput_ops_s"] / old["throughput_ops_s"] - 1 if old["throughput_ops_s"] else 0.0
+        memory = row["peak_mem_kb"] / old["peak_mem_kb"] - 1 if old["peak_mem_kb"] else 0.0
+        slower = (row["p95_ms"] - old["p95_ms"] > noise_floor_ms and p95 > threshold) or \
+                 (row["mean_ms"] - old["mean_ms"] > noise_floor_ms and throughput < -threshold)
+        rows.append({
+            "name": row["name"], "p95_change": p95, "throughput_change": throughput, "memory_change": memory,
+            "regressed": slower,
+        })
+    return rows
+
+
+def print_comparison(rows, baseline, candidate, threshold=REGRESSION_THRESHOLD):
+    print(f"\nbaseline  {baseline['meta'].get('commit')}  {baseline['meta']['started_at']}")
+    print(f"candidate {candidate['meta'].get('commit')}  {candidate['meta']['started_at']}")
+    print(f"\n{'scenario':<32} {'p95':>9} {'ops/s':>9} {'peak mem':>9}")
+    for row in rows:
+        flag = "  ❌ regression" if row["regressed"] else ""
+        print(f"{row['name']:<32} {row['p95_change']:>+8.1%} {row['throughput_change']:>+8.1%} "
+              f"{row['memory_change']:>+8.1%}{flag}")
+    regressions = sum(row["regressed"] for row in rows)
+    print(f"\n{regressions} regression(s) beyond ±{threshold:.0%}" if regressions else
+          f"\n✅ No regressions beyond ±{threshold:.0%}")
+    return regressions
@@ -0,0 +1,162 @@
+# benchmarks/load_test.py
+#
+# Many simulated users chatting at once, spread over threads and worker processes
+# that share one data directory (like several Streamlit sessions / app workers).
+# Each turn does what the agent does around the LLM call: save the message, log
+# a workout or meal, add a habit entry, build the context, save the reply and
+# index both. Afterwards every user's rows and semantic memory entries are
+# counted and their rollups checked, so any lost or cross-user write shows up as
+# a failure (semantic entries from non-owner processes must survive the restart).
+#
+#   python -m benchmarks.load_test --users 120 --turns 20 --processes 4 --shards 8
+#
+# --llm-ms simulates model time per turn; semantic memory uses the hashed embedder.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.harness import percentile
+
+GYM = "did {n} minutes of strength training at the gym today"
+FOOD = "ate paneer rice and dal for lunch, turn {n}"
+REPLY = "Logged it. Nice consistency — keep the streak going and add some protein at dinner."
+
+
+def user_ids(count):
+    return [f"load-{n:04d}" for n in range(count)]
+
+
+def _setup(workdir, shards):
+    # Runs in each worker process before any app module is imported.
+    os.environ["HABIT_SHARDS"] = str(shards)
+    os.chdir(workdir)
+    import semantic_memory
+    from benchmarks.bench_context_builder import HashingEmbedder
+    semantic_memory._semantic_memory = semantic_memory.SemanticMemory(
+        os.path.join("data", "faiss.index"), embedder=HashingEmbedder(),
+    )
+
+
+def simulate_user(user_id, turns, llm_ms, latencies, errors):
+    import context_builder
+    import memory
+    import tools
+
+    habits = memory.HabitMemory()
+    for n in range(turns):
+        started = time.perf_counter()
+        try:
+            message = GYM.format(n=20 + n) if n % 2 == 0 else FOOD.format(n=n)
+            memory.save_message(user_id, "user", message)
+            if n % 2 == 0:
+                tools.log_gym_session(message, user_id)
+            else:
+                tools.log_food_entry(message, user_id)
+            habits.add_entry(user_id, f"slept {6 + n % 3} hours")
+            context_builder.build_context(user_id, message)
+            if llm_ms:
+                time.sleep(llm_ms / 1000)
+            memory.save_message(user_id, "assistant", REPLY)
+            context_builder.index_messages(user_id, [("user", message), ("assistant", REPLY)])
+        except Exception as e:
+            errors.append(f"{user_id} turn {n}: {type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - started)
+
+
+def run_worker(workdir, shards, users, turns, llm_ms):
+    # One process: a thread per simulated user. Returns (latencies, errors, wall seconds).
+    _setup(workdir, shards)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=simulate_user, args=(user_id, turns, llm_ms, latencies, errors))
+        for user_id in users
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    from semantic_memory import get_semantic_memory
+    get_semantic_memory().close()
+    return latencies, errors, wall
+
+
+def verify(workdir, shards, users, turns):
+    # Expected row counts per user, plus rollups that match a recompute.
+    _setup(workdir, shards)
+    import memory
+    from event_store import get_event_store
+    from semantic_memory import get_semantic_memory
+
+    problems = []
+    gym_turns = (turns + 1) // 2
+    for user_id in users:
+        events = get_event_store(user_id)
+        counts = {
+            "messages": (memory.get_message_store(user_id).count(user_id), 2 * turns),
+            "gym_sessions": (events.count("gym_sessions", user_id), gym_turns),
+            "food_log": (events.count("food_log", user_id), turns - gym_turns),
+            "habits": (memory.get_habit_store(user_id).count(user_id), turns),
+            "semantic entries": (get_semantic_memory().count(user_id), 2 * turns),
+        }
+        for name, (actual, expected) in counts.items():
+            if actual != expected:
+                problems.append(f"{user_id}: {name} {actual} != {expected}")
+        mismatches = events.verify_rollups(user_id)
+        if mismatches:
+            problems.append(f"{user_id}: rollups disagree: {sorted(mismatches)}")
+    get_semantic_memory().close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-user load test")
+    parser.add_argument("--users", type=int, default=120)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--shards", type=int, default=8, help="HABIT_SHARDS for the run")
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="simulated model time per turn")
+    args = parser.parse_args()
+
+    users = user_ids(args.users)
+    groups = [users[i::args.processes] for i in range(args.processes)]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"🚦 {args.users} users × {args.turns} turns over {args.processes} process(es), "
+              f"{args.shards} shard(s)")
+        started = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.processes, initializer=sys.path.insert, initargs=(0, cwd)) as pool:
+            results = pool.starmap(run_worker, [
+                (workdir, args.shards, group, args.turns, args.llm_ms) for group in groups if group
+            ])
+        wall = time.perf_counter() - started
+
+        with context.Pool(1, initializer=sys.path.insert, initargs=(0, cwd)) as pool:
+            problems = pool.apply(verify, (workdir, args.shards, users, args.turns))
+
+    latencies = [seconds * 1000 for worker_latencies, _, _ in results for seconds in worker_latencies]
+    errors = [error for _, worker_errors, _ in results for error in worker_errors]
+    turns = len(latencies)
+    print(f"\nturns        {turns:,} in {wall:.1f} s  →  {turns / wall:,.0f} turns/s "
+          f"({turns / max(w for _, _, w in results):,.0f} turns/s excluding process start-up)")
+    print(f"turn latency p50 {percentile(latencies, 50):.1f} ms   p95 {percentile(latencies, 95):.1f} ms   "
+          f"p99 {percentile(latencies, 99):.1f} ms")
+    print(f"errors       {len(errors)}")
+    for error in errors[:5]:
+        print(f"  ⚠️ {error}")
+    print(f"data check   {'✅ every user has all of their rows, rollups consistent' if not problems else ''}")
+    for problem in problems[:10]:
+        print(f"  ❌ {problem}")
+    sys.exit(1 if errors or problems else 0)
+
+
+if __name__ == "__main__":
+    main()
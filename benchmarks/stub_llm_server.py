@@ -0,0 +1,126 @@
+# benchmarks/stub_llm_server.py
+#
+# Local stand-in for Groq's OpenAI-compatible /chat/completions endpoint.
+#
+#   python -m benchmarks.stub_llm_server --port 8700 --latency 0.2
+#   GROQ_BASE_URL=http://127.0.0.1:8700/openai/v1 streamlit run main.py
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def echo_responder(payload):
+    return "stub reply: " + payload["messages"][-1]["content"]
+
+
+class StubState:
+    def __init__(self, responder=echo_responder, latency=0.0, fail_first=0, fail_status=503, token_latency=0.0):
+        self.responder = responder
+        self.latency = latency
+        self.token_latency = token_latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": "not found"}})
+
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                state.requests += 1
+                attempt = state.requests
+
+            if state.latency:
+                time.sleep(state.latency)
+            if attempt <= state.fail_first:
+                return self._send(state.fail_status, {"error": {"message": "injected failure"}})
+
+            content = state.responder(payload)
+            if payload.get("stream"):
+                return self._stream(payload, attempt, content)
+            self._send(200, {
+                "id": f"chatcmpl-stub-{attempt}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        def _stream(self, payload, attempt, content):
+            # Server-sent events in the OpenAI chunk format, one word per chunk.
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            base = {"id": f"chatcmpl-stub-{attempt}", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": payload.get("model", "stub")}
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                if state.token_latency:
+                    time.sleep(state.token_latency)
+                delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+                self._event({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            usage = {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)}
+            self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                         "usage": usage, "x_groq": {"id": base["id"], "usage": usage}})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _event(self, body):
+            self.wfile.write(b"data: " + json.dumps(body).encode() + b"\n\n")
+            self.wfile.flush()
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def start_stub_server(port=0, **state_kwargs):
+    # Returns (server, state, base_url); call server.shutdown() when done.
+    state = StubState(**state_kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/openai/v1"
+    return server, state, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Groq chat-completions server")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0, help="delay per streamed word")
+    args = parser.parse_args()
+
+    server, _, base_url = start_stub_server(args.port, latency=args.latency, token_latency=args.token_latency)
+    print(f"🧪 Stub LLM listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,243 @@
+# benchmarks/suite.py
+#
+# End-to-end hot-path suite: synthetic users with seeded history drive the agent,
+# message memory, semantic memory, recipe tools and charts against a local stub
+# LLM server, in a throwaway data directory. Reports p50/p95/p99 latency,
+# throughput and peak heap per scenario, writes them as JSON, and compares runs.
+#
+#   python -m benchmarks.suite run --users 20 --ops 200 --out benchmarks/results/base.json
+#   python -m benchmarks.suite run --only memory semantic --threads 8
+#   python -m benchmarks.suite compare benchmarks/results/base.json benchmarks/results/new.json
+#
+# Semantic memory uses a hashed bag-of-words embedder unless --real-embeddings is
+# given, so no model download is needed. The agent scenario needs langchain_groq.
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.harness import (
+    REGRESSION_THRESHOLD, compare, load_results, print_comparison, print_results, run_metadata,
+    run_scenario, skipped, write_results,
+)
+from benchmarks.stub_llm_server import start_stub_server
+
+GROUPS = ["memory", "semantic", "recipe", "charts", "agent"]
+CHART_CHANGE_EVERY = 10   # chart scenarios log a new entry every N requests, forcing a re-render
+
+CHAT = [
+    "how consistent was my training this month?",
+    "any tips to stay motivated for leg day?",
+    "should I eat more protein after workouts?",
+    "what did I eat most this week?",
+    "I felt tired during cardio today, why?",
+]
+LOGS = [
+    "did 45 min chest workout at the gym today",
+    "ran for 30 minutes yesterday",
+    "ate poha and tea for breakfast",
+    "had dal rice and curd for lunch",
+    "burned 420 calories on the bike",
+]
+RECIPE_QUERIES = [
+    "suggest a vegetarian dinner", "quick south indian breakfast under 30 minutes",
+    "calories in paneer butter masala", "calories in masala dosa", "suggest non veg lunch",
+]
+
+
+# ---------- Stub LLM ----------
+
+def stub_responder(payload):
+    # Answers each of the app's prompts in the shape it parses; chat gets canned prose.
+    system = payload["messages"][0]["content"]
+    text = payload["messages"][-1]["content"].lower()
+    if '"suggest_recipe"' in system:
+        if "calories in" in text:
+            return json.dumps({"intent": "calorie_query", "recipe_name": text.split("calories in", 1)[1].strip()})
+        return json.dumps({"intent": "suggest_recipe", "course": "Dinner" if "dinner" in text else "Lunch",
+                           "diet": "Non-Vegetarian" if "non veg" in text else "Vegetarian",
+                           "cuisine": None, "max_time": 30 if "quick" in text else None})
+    if "Classify the user's message" in system:
+        return json.dumps({"gym": "workout" in text, "food": "ate" in text, "graph": False,
+                           "pie": False, "timer": "timer" in text, "recipe": "recipe" in text})
+    if '"duration"' in system:
+        return json.dumps({"duration": 300, "task": "stretching"})
+    return ("Nice work staying on track this week. You trained four times and kept protein steady; "
+            "try adding a short mobility session and keep logging your meals.")
+
+
+# ---------- Environment ----------
+
+def prepare_environment(workdir, base_url):
+    # Everything the app writes lands under workdir/data; LLM traffic goes to the stub.
+    # Must run before the app modules are imported (they read these at import time).
+    os.environ["GROQ_API_KEY"] = "stub"
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ["GROQ_API_BASE"] = base_url.rsplit("/openai/v1", 1)[0]
+    os.environ.pop("LLM_CACHE_PATH", None)
+    os.chdir(workdir)
+
+
+def seed_users(users, history, real_embeddings):
+    import context_builder
+    import food_data
+    import memory
+    import semantic_memory
+    from benchmarks.bench_context_builder import HashingEmbedder
+    from benchmarks.food_fixture import synthetic_food_frame
+    from event_store import get_event_store
+    from nutrition import annotate_nutrition
+
+    food_data._food_df = annotate_nutrition(synthetic_food_frame())
+    semantic_memory._semantic_memory = semantic_memory.SemanticMemory(
+        os.path.join("data", "faiss.index"), embedder=None if real_embeddings else HashingEmbedder(),
+    )
+
+    rng = random.Random(11)
+    start = datetime.now() - timedelta(days=30)
+    habits = memory.HabitMemory()
+    for user_id in users:
+        messages = [("user" if i % 2 == 0 else "assistant", rng.choice(CHAT + LOGS)) for i in range(history)]
+        memory.get_message_store(user_id).append_many(user_id, (
+            {"role": role, "content": content, "timestamp": start.isoformat()} for role, content in messages
+        ))
+        context_builder.index_messages(user_id, messages)
+        get_event_store(user_id).append_many("gym_sessions", user_id, [
+            {"timestamp": start + timedelta(days=d), "duration": rng.choice([30, 45, 60]), "note": "workout"}
+            for d in range(0, 30, 2)
+        ])
+        get_event_store(user_id).append_many("food_log", user_id, [
+            {"timestamp": start + timedelta(days=d, hours=h), "note": rng.choice(LOGS[2:4])}
+            for d in range(30) for h in (8, 13, 20)
+        ])
+        for log in LOGS:
+            habits.add_entry(user_id, log)
+
+
+# ---------- Scenarios ----------
+
+def scenarios(groups, users):
+    # (group, name, op(i)); ops pick their user round-robin.
+    def user(i):
+        return users[i % len(users)]
+
+    if "memory" in groups:
+        import memory
+        yield "memory", "memory.save_message", lambda i: memory.save_message(user(i), "user", LOGS[i % len(LOGS)])
+        yield "memory", "memory.get_contextual_memory", lambda i: memory.get_contextual_memory(user(i), 6)
+
+    if "semantic" in groups:
+        from semantic_memory import get_semantic_memory
+        yield "semantic", "semantic.add_entry", lambda i: get_semantic_memory().add_entry(user(i), CHAT[i % len(CHAT)])
+        yield "semantic", "semantic.search", lambda i: get_semantic_memory().search(
+            CHAT[i % len(CHAT)], user_id=user(i), top_k=5)
+
+    if "recipe" in groups:
+        import tools
+        yield "recipe", "tools.suggest_recipe", lambda i: tools.suggest_recipe(
+            ["Lunch", "Dinner", "Breakfast"][i % 3], ["Vegetarian", "Non Vegeterian"][i % 2])
+        yield "recipe", "tools.handle_recipe_query", lambda i: tools.handle_recipe_query(
+            RECIPE_QUERIES[i % len(RECIPE_QUERIES)])
+
+    if "charts" in groups:
+        import tools
+        from memory import HabitMemory
+        from event_store import get_event_store
+        habits = HabitMemory()
+
+        def gym_chart(i):
+            if i % CHART_CHANGE_EVERY == 0:
+                get_event_store(user(i)).append("gym_sessions", user(i), datetime.now(), duration=40, note="bench")
+            tools.plot_gym_sessions(user(i))
+
+        def food_pie(i):
+            if i % CHART_CHANGE_EVERY == 0:
+                get_event_store(user(i)).append("food_log", user(i), datetime.now(), note="had paneer wrap for dinner")
+            tools.plot_food_pie_chart(user(i))
+
+        def habit_graph(i):
+            if i % CHART_CHANGE_EVERY == 0:
+                habits.add_entry(user(i), f"burned {300 + i} calories")
+            habits.plot_graph(user(i))
+
+        yield "charts", "tools.plot_gym_sessions", gym_chart
+        yield "charts", "tools.plot_food_pie_chart", food_pie
+        yield "charts", "memory.plot_graph", habit_graph
+
+    if "agent" in groups:
+        try:
+            import agent
+        except ImportError as e:
+            yield "agent", "agent.run_habit_agent", str(e)
+        else:
+            yield "agent", "agent.run_habit_agent", lambda i: agent.run_habit_agent(
+                (CHAT + LOGS)[i % (len(CHAT) + len(LOGS))], [], user(i))
+
+
+def run(args):
+    out = os.path.abspath(args.out or os.path.join(
+        "benchmarks", "results", f"run-{datetime.now():%Y%m%d-%H%M%S}.json"))
+    meta = run_metadata(vars(args))
+    server, state, base_url = start_stub_server(latency=args.llm_latency, responder=stub_responder)
+    users = [f"user{n:03d}" for n in range(args.users)]
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_environment(workdir, base_url)
+        sys.path.insert(0, cwd)
+        try:
+            print(f"🌱 Seeding {len(users)} users × {args.history} messages ...")
+            seed_users(users, args.history, args.real_embeddings)
+            for group, name, op in scenarios(args.only, users):
+                if isinstance(op, str):
+                    results.append(skipped(name, op))
+                    continue
+                ops = min(args.ops, args.chart_ops) if group == "charts" else args.ops
+                print(f"⏱️ {name} ({ops} ops, {args.threads} thread(s))")
+                results.append(run_scenario(name, op, ops, warmup=args.warmup, threads=args.threads))
+        finally:
+            from semantic_memory import get_semantic_memory
+            get_semantic_memory().close()
+            server.shutdown()
+            os.chdir(cwd)
+    meta["llm_requests"] = state.requests
+    print_results(results)
+    print(f"\n💾 {write_results(out, meta, results)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Habit agent benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the scenarios and write a JSON result file")
+    run_parser.add_argument("--users", type=int, default=20)
+    run_parser.add_argument("--history", type=int, default=200, help="seeded messages per user")
+    run_parser.add_argument("--ops", type=int, default=200, help="timed operations per scenario")
+    run_parser.add_argument("--chart-ops", type=int, default=60, help="cap for the (slow) chart scenarios")
+    run_parser.add_argument("--warmup", type=int, default=5)
+    run_parser.add_argument("--threads", type=int, default=1, help="concurrent callers per scenario")
+    run_parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM delay per request (s)")
+    run_parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS)
+    run_parser.add_argument("--real-embeddings", action="store_true")
+    run_parser.add_argument("--out", help="result file (default: benchmarks/results/run-<timestamp>.json)")
+
+    compare_parser = sub.add_parser("compare", help="compare two result files; exit 1 on regression")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+        return
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    rows = compare(baseline, candidate, args.threshold)
+    sys.exit(1 if print_comparison(rows, baseline, candidate, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
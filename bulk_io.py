@@ -0,0 +1,298 @@
+# bulk_io.py
+#
+# Bulk import/export of workout and meal history (data/events.db, see event_store.py).
+# Files stream through in fixed-size chunks: each chunk is one batched insert
+# (one transaction, rollups folded per day), and exports read the tables with a
+# cursor and yield encoded chunks, so memory stays flat however long the history.
+#
+#   python -m bulk_io import strava_export.csv --user default --table gym_sessions
+#   python -m bulk_io import history.jsonl --user default
+#   python -m bulk_io export backup.parquet --user default
+#
+# Formats: CSV, JSONL and Parquet (pyarrow), picked from the file extension.
+# Rows name their table in a "table" column (exports always do) or take --table.
+# Column names from common fitness-app exports are accepted (date, start_time,
+# minutes, activity, ...); durations may be text like "1h 20m".
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import re
+from datetime import date, datetime
+
+from event_store import TABLES, from_epoch, get_event_store
+from text_parsing import parse_duration
+from tracing import count, span
+
+CHUNK_ROWS = int(os.getenv("HABIT_BULK_CHUNK", "5000"))
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet", ".pq": "parquet"}
+EXPORT_COLUMNS = ["table", "timestamp", "duration", "note"]
+
+# Accepted source column -> our field, tried in order. Column names are matched
+# case-insensitively with spaces and dashes read as "_" ("Activity Type" is activity_type).
+# A bare "time" column is not a timestamp: exports use it for durations or time of day.
+ALIASES = {
+    "timestamp": ["timestamp", "datetime", "date", "start_time", "start", "start_date", "logged_at"],
+    "duration": ["duration", "minutes", "duration_min", "duration_minutes", "moving_time_min", "elapsed_min"],
+    "note": ["note", "notes", "title", "activity", "activity_type", "workout", "food", "meal", "description", "name"],
+}
+TABLE_ALIASES = {
+    "gym": "gym_sessions", "gym_sessions": "gym_sessions", "workout": "gym_sessions", "workouts": "gym_sessions",
+    "food": "food_log", "food_log": "food_log", "meal": "food_log", "meals": "food_log",
+}
+
+
+def detect_format(path, fmt=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in set(FORMATS.values()):
+        raise ValueError(f"Unsupported file format for {path!r}; use one of {sorted(set(FORMATS.values()))}")
+    return fmt
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import/export needs pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+# ---------- Reading ----------
+
+def iter_records(path, fmt=None, chunk_size=CHUNK_ROWS):
+    # Raw rows, one file chunk at a time: dicts, except JSONL lines, which come
+    # through undecoded so a bad line is skipped by normalize() like any bad row.
+    fmt = detect_format(path, fmt)
+    if fmt == "parquet":
+        _, pq = _parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def _column(name):
+    return re.sub(r"[\s-]+", "_", str(name).strip().lower())
+
+
+def _field(record, name):
+    for key in ALIASES[name]:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def parse_timestamp(value):
+    # Naive local time, like the rest of the store; zoned values and epochs are converted to it.
+    if isinstance(value, datetime):
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)   # epoch seconds or ms
+    value = str(value).strip()
+    if value.isdigit():
+        return parse_timestamp(int(value))
+    return parse_timestamp(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def parse_minutes(value):
+    if value in (None, ""):
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float(parse_duration(str(value)) or 0)
+
+
+def normalize(record, table=None):
+    # (table, event dict for EventStore.append_many); raises ValueError on an unusable row.
+    if isinstance(record, str):
+        record = json.loads(record)   # JSONDecodeError is a ValueError
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    record = {_column(key): value for key, value in record.items()}
+    table = TABLE_ALIASES.get(str(record.get("table") or table or "").strip().lower())
+    if table is None:
+        raise ValueError("no table (add a 'table' column or pass table=)")
+    timestamp = _field(record, "timestamp")
+    if timestamp is None:
+        raise ValueError("no timestamp")
+    event = {"timestamp": parse_timestamp(timestamp), "note": _field(record, "note")}
+    if table == "gym_sessions":
+        event["duration"] = parse_minutes(_field(record, "duration"))
+    return table, event
+
+
+# ---------- Import ----------
+
+def import_records(records, user_id, table=None, chunk_size=CHUNK_ROWS):
+    # Writes an iterable of raw rows in chunks; returns {"gym_sessions": n, ..., "skipped": n}.
+    store = get_event_store(user_id)
+    totals = {name: 0 for name in TABLES}
+    totals["skipped"] = 0
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return totals
+        batches = {name: [] for name in TABLES}
+        for record in chunk:
+            try:
+                name, event = normalize(record, table)
+            except (ValueError, TypeError, OverflowError) as e:
+                if not totals["skipped"]:
+                    print(f"⚠️ Skipping unreadable row {record!r}: {e}")
+                totals["skipped"] += 1
+                continue
+            batches[name].append(event)
+        with span("bulk.import_chunk", rows=len(chunk)), store.transaction() as conn:
+            written = {name: store.append_many(name, user_id, events, conn=conn) for name, events in batches.items()}
+        for name, n in written.items():
+            totals[name] += n
+        count("bulk_rows_imported", sum(written.values()))
+
+
+def import_file(path, user_id, table=None, fmt=None, chunk_size=CHUNK_ROWS):
+    totals = import_records(iter_records(path, fmt, chunk_size), user_id, table, chunk_size)
+    if totals["skipped"]:
+        print(f"⚠️ {totals['skipped']} row(s) in {path} could not be read and were skipped")
+    return totals
+
+
+# ---------- Export ----------
+
+def iter_events(user_id, tables=None, chunk_size=CHUNK_ROWS):
+    # Export rows (EXPORT_COLUMNS dicts), table by table in time order, read a chunk at a time.
+    store = get_event_store(user_id)
+    for table in tables or TABLES:
+        for rows in store.iter_chunks(table, user_id, chunk_size=chunk_size):
+            for ts, *values in rows:
+                fields = dict(zip(TABLES[table], values))
+                yield {"table": table, "timestamp": from_epoch(ts).isoformat(),
+                       "duration": fields.get("duration"), "note": fields.get("note")}
+
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield chunk
+
+
+def export_chunks(user_id, fmt, tables=None, chunk_size=CHUNK_ROWS):
+    # Encoded file content as a generator of bytes; concatenated, it is a complete file.
+    fmt = detect_format(f"export.{fmt}", fmt)
+    rows = iter_events(user_id, tables, chunk_size)
+    if fmt == "jsonl":
+        for chunk in _chunks(rows, chunk_size):
+            yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk).encode("utf-8")
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for chunk in _chunks(rows, chunk_size):
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        yield from _parquet_chunks(rows, chunk_size)
+
+
+class _Drain:
+    # Write-only file object that hands back whatever pyarrow wrote since the last take().
+    closed = False
+
+    def __init__(self):
+        self._parts, self._position = [], 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _parquet_chunks(rows, chunk_size):
+    # One row group per chunk; timestamps stay native so readers get a datetime column.
+    pa, pq = _parquet()
+    schema = pa.schema([("table", pa.string()), ("timestamp", pa.timestamp("s")),
+                        ("duration", pa.float64()), ("note", pa.string())])
+    drain = _Drain()
+    writer = pq.ParquetWriter(drain, schema)
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            columns = {name: [row[name] for row in chunk] for name in EXPORT_COLUMNS}
+            columns["timestamp"] = [datetime.fromisoformat(value) for value in columns["timestamp"]]
+            writer.write_table(pa.table(columns, schema=schema))
+            yield drain.take()
+    finally:
+        writer.close()
+    yield drain.take()
+
+
+def export_file(path, user_id, tables=None, fmt=None, chunk_size=CHUNK_ROWS):
+    # Writes the export to path; returns the number of bytes written.
+    written = 0
+    with open(path, "wb") as f:
+        for data in export_chunks(user_id, detect_format(path, fmt), tables, chunk_size):
+            written += f.write(data)
+    return written
+
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of workout and meal history")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = sub.add_parser("import", help="stream a CSV/JSONL/Parquet file into the event store")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--table", choices=sorted(TABLE_ALIASES), help="table for rows without a 'table' column")
+
+    export_parser = sub.add_parser("export", help="write a user's history as CSV/JSONL/Parquet")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--table", action="append", choices=list(TABLES), help="only these tables")
+
+    for sub_parser in (import_parser, export_parser):
+        sub_parser.add_argument("--user", default="default", help="user id (see auth.py)")
+        sub_parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="override the extension")
+        sub_parser.add_argument("--chunk-size", type=int, default=CHUNK_ROWS)
+
+    args = parser.parse_args()
+    if args.command == "import":
+        totals = import_file(args.path, args.user, args.table, args.format, args.chunk_size)
+        print(f"📥 Imported {totals['gym_sessions']} gym session(s) and {totals['food_log']} meal(s) "
+              f"for {args.user!r}" + (f", skipped {totals['skipped']}" if totals["skipped"] else ""))
+    else:
+        written = export_file(args.path, args.user, args.table, args.format, args.chunk_size)
+        print(f"📤 Wrote {written:,} bytes to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
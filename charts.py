@@ -0,0 +1,211 @@
+# charts.py
+#
+# Every chart in the app goes through one service. A rendered PNG is keyed on
+# (user, chart type, data version), where the version is a digest of the exact
+# data being drawn, so unchanged data never hits matplotlib twice. Interactive
+# views skip matplotlib entirely and hand plain DataFrames to st.line_chart.
+
+import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+from event_store import get_event_store
+from tracing import count, span
+
+DARK_STYLE = {"figure": "#121212", "axes": "#1e1e1e", "text": "white", "grid": "#444", "line": "#81c784"}
+
+
+def data_version(data):
+    # Stable digest of the chart input; any change to the drawn data changes it.
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        payload = pd.util.hash_pandas_object(data, index=True).values.tobytes()
+    else:
+        payload = repr(data).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+# ---------- Renderers (data -> PNG bytes) ----------
+
+def _figure(figsize):
+    # Figure objects (no pyplot state machine): thread-safe and nothing to close.
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def _png(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+def render_gym_bars(daily):
+    # daily: pd.Series of minutes indexed by ISO day
+    fig = _figure((8, 4))
+    ax = fig.subplots()
+    ax.bar(daily.index, daily.values, color="skyblue")
+    ax.set_title("🏋️‍♀️ Gym Sessions Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Duration (minutes)")
+    ax.tick_params(axis="x", rotation=90)
+    fig.tight_layout()
+    return _png(fig)
+
+def render_meal_pie(counts):
+    fig = _figure((5, 5))
+    ax = fig.subplots()
+    ax.pie(counts.values(), labels=counts.keys(), autopct='%1.1f%%', startangle=140)
+    ax.set_title("🍽️ Food Intake Breakdown")
+    ax.axis('equal')
+    return _png(fig)
+
+def render_habit_lines(series):
+    # series: {habit type: {date: value}}
+    fig = _figure((10, 5))
+    ax = fig.subplots()
+    for key, date_map in series.items():
+        dates = sorted(date_map)
+        ax.plot(dates, [date_map[d] for d in dates], marker='o', label=key.capitalize())
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Value")
+    ax.set_title("Habit Progress")
+    ax.tick_params(axis="x", rotation=45)
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    return _png(fig)
+
+def render_duration_trend(df):
+    # df: DateTime / Duration columns, dark theme to match the chat UI
+    fig = _figure((6.4, 4.8))
+    fig.patch.set_facecolor(DARK_STYLE["figure"])
+    ax = fig.subplots()
+    ax.set_facecolor(DARK_STYLE["axes"])
+    ax.plot(df["DateTime"], df["Duration"], marker='o', linestyle='-', color=DARK_STYLE["line"])
+    ax.set_xlabel("Date & Time", color=DARK_STYLE["text"])
+    ax.set_ylabel("Duration (minutes)", color=DARK_STYLE["text"])
+    ax.set_title("Gym Duration Trend", color=DARK_STYLE["text"])
+    ax.tick_params(axis='x', colors=DARK_STYLE["text"], rotation=45)
+    ax.tick_params(axis='y', colors=DARK_STYLE["text"])
+    ax.grid(True, color=DARK_STYLE["grid"])
+    fig.tight_layout()
+    return _png(fig)
+
+
+# ---------- Cached Chart Service ----------
+
+class ChartService:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()   # (user_id, chart) -> (version, png bytes, base64 str or None)
+        self._lock = threading.Lock()
+        self._metrics = {}            # chart -> counters
+
+    def _metric(self, chart):
+        return self._metrics.setdefault(chart, {
+            "renders": 0, "hits": 0, "render_ms_total": 0.0, "last_render_ms": 0.0, "bytes": 0,
+        })
+
+    def png(self, user_id, chart, data, render):
+        # Returns PNG bytes for `data`, rendering only if this user's chart data changed.
+        # Only the latest version per (user, chart) is kept; older ones can't be asked for again.
+        version = data_version(data)
+        key = (user_id, chart)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                self._metric(chart)["hits"] += 1
+                count("chart_cache_hits", chart=chart)
+                return cached[1]
+
+        start = time.perf_counter()
+        with span("chart.render", chart=chart):
+            png = render(data)
+        count("chart_renders", chart=chart)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._cache[key] = (version, png, None)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            metric = self._metric(chart)
+            metric["renders"] += 1
+            metric["render_ms_total"] += elapsed_ms
+            metric["last_render_ms"] = elapsed_ms
+            metric["bytes"] = len(png)
+        return png
+
+    def png_base64(self, user_id, chart, data, render):
+        png = self.png(user_id, chart, data, render)
+        key = (user_id, chart)
+        with self._lock:
+            version, cached_png, encoded = self._cache.get(key, (None, None, None))
+            if cached_png is png and encoded is not None:
+                return encoded
+            encoded = base64.b64encode(png).decode("utf-8")
+            if cached_png is png:
+                self._cache[key] = (version, png, encoded)
+        return encoded
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == user_id]:
+                del self._cache[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                chart: {**m, "avg_render_ms": m["render_ms_total"] / m["renders"] if m["renders"] else 0.0}
+                for chart, m in self._metrics.items()
+            }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_chart_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChartService()
+    return _service
+
+
+# ---------- Chart Data ----------
+
+def gym_daily_series(user_id):
+    daily = get_event_store(user_id).gym_daily(user_id)
+    return pd.Series([minutes for _, minutes, _ in daily], index=[day for day, _, _ in daily], dtype=float)
+
+def meal_breakdown(user_id):
+    return {category: n for category, n in get_event_store(user_id).meal_counts(user_id).items() if n}
+
+def duration_frame(gym_data):
+    # Session gym entries ({"DateTime", "Duration"}) in time order.
+    return pd.DataFrame(gym_data, columns=["DateTime", "Duration"]).sort_values("DateTime").reset_index(drop=True)
+
+
+# ---------- Entry Points ----------
+
+def gym_chart_png(user_id):
+    daily = gym_daily_series(user_id)
+    return get_chart_service().png(user_id, "gym_daily", daily, render_gym_bars) if len(daily) else None
+
+def food_pie_png(user_id):
+    counts = meal_breakdown(user_id)
+    return get_chart_service().png(user_id, "meal_pie", counts, render_meal_pie) if counts else None
+
+def duration_trend_png(user_id, gym_data):
+    df = duration_frame(gym_data)
+    return get_chart_service().png(user_id, "duration_trend", df, render_duration_trend) if len(df) else None
+
+def habit_chart_base64(user_id, series):
+    return get_chart_service().png_base64(user_id, "habits", series, render_habit_lines) if series else None
+
+def duration_trend_data(gym_data):
+    # For st.line_chart: no matplotlib, Vega-Lite renders it client-side.
+    return duration_frame(gym_data).set_index("DateTime")["Duration"]
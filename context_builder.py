@@ -0,0 +1,178 @@
+# context_builder.py
+#
+# Builds the per-turn prompt context for run_habit_agent: a short recency
+# window, the top semantic hits from older conversation, and the user's
+# rollup stats. Everything is de-duplicated and packed into a token budget.
+
+import os
+import re
+from functools import lru_cache
+
+from event_store import get_event_store
+from memory import get_contextual_memory
+from tracing import span
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+RECENT_MESSAGES = 6
+ALWAYS_RECENT = 2          # newest messages that go in before any semantic hit
+SEMANTIC_TOP_K = 5
+BASELINE_TAIL = 5          # what the agent used to send: the last 5 stored messages, stringified
+
+_semantic_disabled = False
+
+
+# ---------- Token Counting ----------
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text):
+    # tiktoken when available (close enough to Llama's tokenizer for budgeting), else ~4 chars/token.
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4) if text else 0
+
+
+def _key(text):
+    text = re.sub(r"^(user|assistant):\s*", "", text.strip().lower())
+    return re.sub(r"\s+", " ", text)
+
+
+# ---------- Sources ----------
+
+def semantic_hits(user_id, query, top_k=SEMANTIC_TOP_K):
+    global _semantic_disabled
+    if _semantic_disabled or top_k <= 0:
+        return []
+    try:
+        from semantic_memory import get_semantic_memory
+        with span("memory.semantic_search", top_k=top_k) as info:
+            hits = get_semantic_memory().search(query, user_id=user_id, top_k=top_k)
+            info["hits"] = len(hits)
+        return hits
+    except ImportError as e:
+        # sentence-transformers / faiss are optional; fall back to recency + stats only.
+        print(f"⚠️ Semantic memory unavailable ({e}); using recent messages only")
+        _semantic_disabled = True
+        return []
+
+def index_messages(user_id, messages):
+    # messages: [(role, content)]; stored as "role: content" so hits keep their speaker.
+    if _semantic_disabled:
+        return
+    try:
+        from semantic_memory import get_semantic_memory
+        with span("memory.semantic_index"):
+            get_semantic_memory().add_entries(
+                (user_id, f"{role}: {content}") for role, content in messages if content
+            )
+    except ImportError:
+        pass
+
+def stats_summary(user_id):
+    store = get_event_store(user_id)
+    lines = []
+    weekly = store.gym_weekly(user_id)
+    if weekly:
+        week, minutes, sessions = weekly[-1]
+        streak = store.streak(user_id)
+        lines.append(
+            f"Gym: {sum(s for _, _, s in weekly)} sessions logged; {week}: {minutes:.0f} min over {sessions} session(s); "
+            f"streak {streak['current']} day(s), best {streak['best']}"
+        )
+    meals = {category: n for category, n in store.meal_counts(user_id).items() if n}
+    if meals:
+        lines.append("Meals logged: " + ", ".join(f"{category} {n}" for category, n in meals.items()))
+    return "\n".join(lines)
+
+
+# ---------- Builder ----------
+
+def gather_context(user_id, user_input, recent=RECENT_MESSAGES, top_k=SEMANTIC_TOP_K, stats=True):
+    # The I/O half of build_context: recent messages, rollup stats and semantic hits.
+    # Messages and hits are independent of tool results, so they can be read while
+    # tools run; the stats are not (a logged workout changes them), so a caller
+    # overlapping this with a tool passes stats=False and fills in "stats" after it.
+    return {
+        "tail": get_contextual_memory(user_id, limit=max(recent, BASELINE_TAIL)),
+        "stats": stats_summary(user_id) if stats else None,
+        "hits": semantic_hits(user_id, user_input, top_k),
+        "recent": recent,
+    }
+
+def build_context(user_id, user_input, budget=CONTEXT_TOKEN_BUDGET, recent=RECENT_MESSAGES,
+                  top_k=SEMANTIC_TOP_K, extra=None):
+    # Returns {"history", "context", "tokens", "baseline_tokens", "saved_tokens"}: `history` is the
+    # recency window (oldest first) for chat_history, `context` holds stats, `extra` lines
+    # (e.g. a tool result) and semantic hits.
+    return assemble_context(gather_context(user_id, user_input, recent, top_k), user_input, budget, extra)
+
+def assemble_context(sources, user_input, budget=CONTEXT_TOKEN_BUDGET, extra=None):
+    # The budgeting half: no I/O, just token counting over what gather_context found.
+    tail, recent = sources["tail"], sources["recent"]
+    window = tail[-recent:] if recent else []
+    seen = {_key(user_input)}
+
+    remaining = budget
+    context_lines = []
+
+    def take(text):
+        nonlocal remaining
+        cost = count_tokens(text)
+        if cost > remaining:
+            return False
+        remaining -= cost
+        return True
+
+    for line in [sources["stats"], *(extra or [])]:
+        if line and take(line):
+            context_lines.append(line)
+            seen.add(_key(line))
+
+    # Newest messages first; the first ALWAYS_RECENT outrank semantic hits, the rest come after.
+    newest_first = []
+    for message in reversed(window):
+        key = _key(message["content"])
+        if key in seen:
+            continue
+        seen.add(key)
+        newest_first.append(message)
+    kept = []
+    for message in newest_first[:ALWAYS_RECENT]:
+        if take(message["content"]):
+            kept.append(message)
+
+    hits = []
+    for text in sources["hits"]:
+        key = _key(text)
+        if key in seen:
+            continue
+        seen.add(key)
+        if take(text):
+            hits.append(text)
+
+    for message in newest_first[ALWAYS_RECENT:]:
+        if take(message["content"]):
+            kept.append(message)
+
+    if hits:
+        context_lines.append("Earlier conversation:\n" + "\n".join(f"- {text}" for text in hits))
+
+    kept_ids = {id(m) for m in kept}
+    history = [(m["role"], m["content"]) for m in window if id(m) in kept_ids]
+    used = budget - remaining
+    # The old prompt put str() of the last 5 stored message dicts in {context}.
+    baseline = count_tokens(str(tail[-BASELINE_TAIL:]))
+    return {
+        "history": history,
+        "context": "\n\n".join(context_lines) or "No stored memory yet.",
+        "tokens": used,
+        "baseline_tokens": baseline,
+        "saved_tokens": baseline - used,
+    }
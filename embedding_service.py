@@ -0,0 +1,182 @@
+# embedding_service.py
+#
+# One sentence-embedding model per process, loaded on first use. Concurrent
+# encode() calls are coalesced into a single model.encode() by a small
+# micro-batching worker, and repeated texts are served from an LRU cache.
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" (default) or "onnx"; the ONNX file defaults to the int8-quantized
+# export that ships with all-MiniLM-L6-v2 (needs optimum[onnxruntime]).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+
+# Known output sizes, so indexes can be opened without loading the model.
+KNOWN_DIMENSIONS = {"all-MiniLM-L6-v2": 384, "all-MiniLM-L12-v2": 384, "all-mpnet-base-v2": 768}
+
+
+class EmbeddingService:
+    def __init__(self, model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND, onnx_file=EMBEDDING_ONNX_FILE,
+                 batch_size=64, max_wait=0.005, cache_size=4096, model=None):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.batch_size = batch_size
+        self.max_wait = max_wait          # seconds the worker waits for more requests to join a batch
+        self.cache_size = cache_size
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()       # text -> read-only float32 vector
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "batches": 0, "requests": 0, "load_seconds": 0.0}
+
+    # ----- model -----
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = self._load_model()
+                    self._stats["load_seconds"] = time.perf_counter() - start
+        return self._model
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+        if self.backend == "onnx":
+            try:
+                return SentenceTransformer(self.model_name, backend="onnx", model_kwargs={"file_name": self.onnx_file})
+            except Exception as e:
+                print(f"⚠️ ONNX embedding backend unavailable ({e}); falling back to torch")
+        return SentenceTransformer(self.model_name)
+
+    @property
+    def dimension(self):
+        if self._model is None and self.model_name in KNOWN_DIMENSIONS:
+            return KNOWN_DIMENSIONS[self.model_name]
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def warm_up(self, background=True):
+        # Loads the model ahead of the first query (e.g. while the UI renders).
+        if background:
+            threading.Thread(target=lambda: self.model, name="embedding-warm-up", daemon=True).start()
+        else:
+            self.model
+
+    # ----- encoding -----
+
+    def _encode_now(self, texts):
+        vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        self._stats["batches"] += 1
+        return np.asarray(vectors, dtype="float32")
+
+    def encode(self, texts):
+        # Returns a (len(texts), dimension) float32 array.
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype="float32")
+
+        found = {}
+        with self._cache_lock:
+            for text in texts:
+                vector = self._cache.get(text)
+                if vector is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = vector
+            misses = list(dict.fromkeys(t for t in texts if t not in found))
+            self._stats["hits"] += len(texts) - len(misses)
+            self._stats["misses"] += len(misses)
+
+        if misses:
+            # A full batch gains nothing from waiting on other callers.
+            if len(misses) >= self.batch_size:
+                vectors = self._encode_now(misses)
+            else:
+                vectors = self._submit(misses).result()
+            found.update(self._remember(misses, vectors))
+        return np.stack([found[text] for text in texts])
+
+    def _remember(self, texts, vectors):
+        fresh = {}
+        with self._cache_lock:
+            for text, vector in zip(texts, vectors):
+                vector = vector.copy()
+                vector.flags.writeable = False
+                fresh[text] = self._cache[text] = vector
+                self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return fresh
+
+    def _submit(self, texts):
+        future = Future()
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+        self._queue.put((texts, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            unique = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+            self._stats["requests"] += len(batch)
+            try:
+                vectors = dict(zip(unique, self._encode_now(unique)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for texts, future in batch:
+                future.set_result(np.stack([vectors[t] for t in texts]))
+
+    def stats(self):
+        with self._cache_lock:
+            return {**self._stats, "cached": len(self._cache), "loaded": self.loaded}
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+
+# ---------- Shared Instances ----------
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_embedding_service(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    key = (model_name, backend)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = EmbeddingService(model_name, backend)
+    return _services[key]
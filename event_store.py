@@ -0,0 +1,212 @@
+# event_store.py
+
+import calendar
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import rollups
+from sharding import ShardedStores
+from tracing import count
+
+EVENTS_DB = os.path.join("data", "events.db")
+
+# Column name -> SQLite type; every table also has user_id and ts (epoch seconds).
+TABLES = {
+    "gym_sessions": {"duration": "REAL NOT NULL DEFAULT 0", "note": "TEXT"},
+    "food_log": {"note": "TEXT"},
+}
+NUMERIC_COLUMNS = {"duration"}
+
+
+def to_epoch(value):
+    # Wall-clock seconds: naive datetimes are stored as-is (no timezone shift),
+    # so pandas reads them back as the same local time.
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return calendar.timegm(value.timetuple())
+
+
+EPOCH = datetime(1970, 1, 1)
+
+def from_epoch(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+
+# ---------- SQLite Event Store (workouts + meals) ----------
+
+class EventStore:
+    def __init__(self, db_path=EVENTS_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            for table, columns in TABLES.items():
+                extra = "".join(f", {name} {kind}" for name, kind in columns.items())
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, ts INTEGER NOT NULL{extra})"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_ts ON {table} (user_id, ts)")
+            conn.executescript(rollups.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self._conn()
+        with conn:
+            yield conn
+
+    # ----- writes -----
+
+    def append_many(self, table, user_id, events, conn=None):
+        # events: iterable of dicts with "timestamp" (datetime or ISO string) plus table columns.
+        columns = list(TABLES[table])
+        rows = [
+            (user_id, to_epoch(e["timestamp"]), *[e.get(c) for c in columns])
+            for e in events
+        ]
+        if not rows:
+            return 0
+        if conn is None:
+            with self.transaction() as conn:
+                return self._insert(conn, table, columns, rows)
+        return self._insert(conn, table, columns, rows)
+
+    def _insert(self, conn, table, columns, rows):
+        conn.executemany(
+            f"INSERT INTO {table} (user_id, ts, {', '.join(columns)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in columns)})",
+            rows,
+        )
+        # Rollups move in the same transaction, so they can never drift from the events.
+        rollups.apply_events(conn, table, [
+            (user_id, from_epoch(ts).date(), dict(zip(columns, values))) for user_id, ts, *values in rows
+        ])
+        count("events_written", len(rows), table=table)
+        return len(rows)
+
+    def append(self, table, user_id, timestamp, **fields):
+        return self.append_many(table, user_id, [{"timestamp": timestamp, **fields}])
+
+    def clear(self, user_id):
+        with self.transaction() as conn:
+            for table in TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            rollups.clear(conn, user_id)
+
+    def rebuild_rollups(self, user_id):
+        expected = rollups.recompute(self._conn(), user_id)
+        with self.transaction() as conn:
+            rollups.clear(conn, user_id)
+            conn.executemany(
+                "INSERT INTO gym_daily (user_id, day, minutes, sessions) VALUES (?, ?, ?, ?)",
+                [(user_id, *row) for row in expected["gym_daily"]],
+            )
+            conn.executemany(
+                "INSERT INTO gym_weekly (user_id, week, minutes, sessions) VALUES (?, ?, ?, ?)",
+                [(user_id, *row) for row in expected["gym_weekly"]],
+            )
+            conn.executemany(
+                "INSERT INTO meal_categories (user_id, category, count) VALUES (?, ?, ?)",
+                [(user_id, category, n) for category, n in expected["meal_counts"].items() if n],
+            )
+            rollups.recompute_streak(conn, user_id)
+
+    # ----- reads -----
+
+    def _select(self, table, user_id, start, end, columns, order="ASC", limit=None):
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE user_id = ?"
+        params = [user_id]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(to_epoch(start))
+        if end is not None:
+            sql += " AND ts < ?"
+            params.append(to_epoch(end))
+        sql += f" ORDER BY ts {order}, id {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._conn().execute(sql, params)
+
+    # ----- rollups -----
+
+    def gym_daily(self, user_id, since=None):
+        return rollups.gym_daily(self._conn(), user_id, since)
+
+    def gym_weekly(self, user_id):
+        return rollups.gym_weekly(self._conn(), user_id)
+
+    def meal_counts(self, user_id):
+        return rollups.meal_counts(self._conn(), user_id)
+
+    def streak(self, user_id):
+        return rollups.streak(self._conn(), user_id)
+
+    def verify_rollups(self, user_id):
+        return rollups.verify(self._conn(), user_id)
+
+    def count(self, table, user_id):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def query_arrays(self, table, user_id, start=None, end=None, columns=None):
+        # Column arrays straight from the (user_id, ts) index range scan; no per-row dicts.
+        columns = ["ts"] + list(columns if columns is not None else TABLES[table])
+        rows = self._select(table, user_id, start, end, columns).fetchall()
+        arrays = {}
+        for i, name in enumerate(columns):
+            if name == "ts":
+                arrays[name] = np.fromiter((r[i] for r in rows), dtype="int64", count=len(rows)).astype("datetime64[s]")
+            elif name in NUMERIC_COLUMNS:
+                arrays[name] = np.fromiter((r[i] for r in rows), dtype="float64", count=len(rows))
+            else:
+                arrays[name] = np.array([r[i] for r in rows], dtype=object)
+        return arrays
+
+    def query_frame(self, table, user_id, start=None, end=None, columns=None):
+        arrays = self.query_arrays(table, user_id, start, end, columns)
+        arrays["timestamp"] = arrays.pop("ts")
+        return pd.DataFrame(arrays, copy=False)
+
+    def iter_chunks(self, table, user_id, start=None, end=None, chunk_size=5000):
+        # (ts, *columns) rows in time order, fetched chunk_size at a time from one cursor.
+        cursor = self._select(table, user_id, start, end, ["ts"] + list(TABLES[table]))
+        while rows := cursor.fetchmany(chunk_size):
+            yield rows
+
+    def recent(self, table, user_id, limit=5):
+        columns = ["ts"] + list(TABLES[table])
+        rows = self._select(table, user_id, None, None, columns, order="DESC", limit=limit).fetchall()
+        return [
+            {"timestamp": from_epoch(r[0]).isoformat(), **dict(zip(columns[1:], r[1:]))}
+            for r in reversed(rows)
+        ]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ---------- Shared Instance ----------
+
+_stores = ShardedStores(EventStore, EVENTS_DB)
+
+def get_event_store(user_id):
+    # The store holding this user's events (see sharding.py).
+    return _stores.for_user(user_id)
@@ -0,0 +1,109 @@
+# food_data.py
+
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from nutrition import annotate_nutrition
+
+FOOD_DATA_PATH = "IndianFoodDatasetXLS.xlsx"
+CACHE_DIR = os.path.join("data", "cache")
+COLUMNS = ['TranslatedRecipeName', 'TranslatedIngredients', 'TotalTimeInMins', 'Servings', 'Cuisine', 'Course', 'Diet']
+
+
+# ---------- Source Fingerprint ----------
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _write_meta(meta_path, meta):
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+# ---------- XLSX Parsing ----------
+
+def parse_food_xlsx(path):
+    df = pd.read_excel(path)
+    df = df[COLUMNS]
+    df = df.dropna(subset=['TranslatedRecipeName', 'TranslatedIngredients'])
+    df['TranslatedIngredients'] = df['TranslatedIngredients'].apply(lambda x: x.lower())
+    return df.reset_index(drop=True)
+
+
+# ---------- Cached Loader ----------
+
+def load_food_data(path=FOOD_DATA_PATH, cache_dir=CACHE_DIR):
+    # The parsed XLSX is kept as Parquet next to a fingerprint of the source.
+    # A matching mtime/size reuses it directly; otherwise the content hash decides.
+    cache_path = os.path.join(cache_dir, os.path.basename(path) + ".parquet")
+    meta_path = cache_path + ".json"
+    meta = _read_meta(meta_path)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if meta and os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+        print(f"❌ Failed to load food data: {path} not found")
+        return pd.DataFrame()
+
+    if meta and os.path.exists(cache_path):
+        if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+            return pd.read_parquet(cache_path)
+        sha256 = _file_sha256(path)
+        if meta.get("sha256") == sha256:
+            _write_meta(meta_path, {**meta, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+            return pd.read_parquet(cache_path)
+    else:
+        sha256 = _file_sha256(path)
+
+    try:
+        df = parse_food_xlsx(path)
+    except Exception as e:
+        print(f"❌ Failed to load food data: {e}")
+        return pd.DataFrame()
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, cache_path)
+        _write_meta(meta_path, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256})
+    except Exception as e:
+        print(f"⚠️ Could not write food data cache: {e}")
+    return df
+
+
+# ---------- Lazy Shared Dataset ----------
+
+_food_df = None
+_food_df_lock = threading.Lock()
+
+def get_food_df():
+    global _food_df
+    with _food_df_lock:
+        if _food_df is None:
+            _food_df = annotate_nutrition(load_food_data())
+    return _food_df
+
+def reset_food_df():
+    global _food_df
+    with _food_df_lock:
+        _food_df = None
@@ -0,0 +1,145 @@
+# habit_store.py
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value REAL NOT NULL
+);
+-- Covering index: per-user range scans and daily totals never touch the table rows.
+CREATE INDEX IF NOT EXISTS idx_habits_user_day ON habits (user_id, day, type, value);
+CREATE INDEX IF NOT EXISTS idx_habits_day ON habits (day);
+CREATE TABLE IF NOT EXISTS habit_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Entries older than this are dropped by a periodic range delete, at most once per interval.
+HABIT_RETENTION_DAYS = 30
+RETENTION_CHECK_INTERVAL = timedelta(days=1)
+
+
+# ---------- SQLite (WAL) Habit Store ----------
+
+class HabitStore:
+    def __init__(self, db_path, retention_days=HABIT_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def cutoff(self, today=None):
+        return (today or date.today()) - timedelta(days=self.retention_days)
+
+    # ----- writes -----
+
+    def append_many(self, user_id, entries):
+        # entries: dicts with "date" (YYYY-MM-DD), "type" and "value".
+        rows = [(user_id, e["date"], e["type"], float(e["value"])) for e in entries]
+        if not rows:
+            return 0
+        with self._conn() as conn:
+            conn.executemany("INSERT INTO habits (user_id, day, type, value) VALUES (?, ?, ?, ?)", rows)
+        self.apply_retention()
+        return len(rows)
+
+    def append(self, user_id, entry):
+        return self.append_many(user_id, [entry])
+
+    def prune(self, before, user_id=None):
+        # Range delete over the day index; returns the number of rows removed.
+        sql, params = "DELETE FROM habits WHERE day < ?", [before.isoformat()]
+        if user_id is not None:
+            sql, params = "DELETE FROM habits WHERE user_id = ? AND day < ?", [user_id, before.isoformat()]
+        with self._conn() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def apply_retention(self, today=None, force=False):
+        # Runs the retention prune if the last one is older than RETENTION_CHECK_INTERVAL.
+        today = today or date.today()
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM habit_meta WHERE key = 'last_prune'").fetchone()
+        if not force and row and date.fromisoformat(row[0]) > today - RETENTION_CHECK_INTERVAL:
+            return 0
+        removed = self.prune(self.cutoff(today))
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO habit_meta (key, value) VALUES ('last_prune', ?)", (today.isoformat(),)
+            )
+        return removed
+
+    def clear(self, user_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM habits WHERE user_id = ?", (user_id,))
+
+    # ----- reads -----
+
+    def entries(self, user_id, since=None):
+        sql, params = "SELECT day, type, value FROM habits WHERE user_id = ?", [user_id]
+        if since is not None:
+            sql += " AND day >= ?"
+            params.append(since.isoformat())
+        rows = self._conn().execute(sql + " ORDER BY day, id", params).fetchall()
+        return [{"date": d, "type": t, "value": v} for d, t, v in rows]
+
+    def daily_totals(self, user_id, since=None):
+        # {type: {day: summed value}} straight from a GROUP BY over the (user_id, day) index.
+        sql = "SELECT type, day, SUM(value) FROM habits WHERE user_id = ?"
+        params = [user_id]
+        if since is not None:
+            sql += " AND day >= ?"
+            params.append(since.isoformat())
+        totals = {}
+        for kind, day, value in self._conn().execute(sql + " GROUP BY type, day ORDER BY type, day", params):
+            totals.setdefault(kind, {})[day] = value
+        return totals
+
+    def count(self, user_id=None):
+        if user_id is None:
+            return self._conn().execute("SELECT COUNT(*) FROM habits").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM habits WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ---------- One-shot Migration from data/habit_memory.json ----------
+
+def migrate_json_habits(store, json_path):
+    # Imports {user_id: [entries]} from the legacy JSON file, then renames it so it runs once.
+    if not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Skipping habit migration for {json_path}: {e}")
+        return 0
+    migrated = 0
+    for user_id, entries in data.items():
+        migrated += store.append_many(user_id, [
+            e for e in entries if {"date", "type", "value"} <= set(e)
+        ])
+    os.replace(json_path, json_path + ".migrated")
+    print(f"📦 Migrated {migrated} habit entries from {json_path}")
+    return migrated
@@ -0,0 +1,228 @@
+# intent_router.py
+
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Intents in the order run_habit_agent acts on them.
+INTENTS = ["gym", "food", "graph", "pie", "timer", "recipe", "chat"]
+
+# When several rules fire with full confidence, the more specific request wins.
+# "gym" and "food" are deliberately absent: if both fire, the message is ambiguous.
+RULE_PRECEDENCE = ["timer", "pie", "graph", "recipe", "chat"]
+
+# The gym/food rules only fire on messages that read like a log ("hey, I did a
+# 45 min workout", "ok I ate dal"): a past-tense verb, a quantity or a day
+# reference, and not a question. "is running good for weight loss?" or "should
+# I skip breakfast?" fall through to the centroid / LLM stages instead of
+# logging a made-up event. A log also beats the greeting and tips/summary chat rules.
+_LOG_EVIDENCE = re.compile(
+    r"\b(did|done|went|ate|eaten|had|drank|finished|completed|logged|ran|trained|lifted|cycled|"
+    r"jogged|worked out|burned|burnt|today|yesterday|tonight|this morning|this evening|last night)\b|\b\d+"
+)
+_QUESTION = re.compile(
+    r"\?\s*$|^\W*(what|how|why|when|where|which|who|is|are|was|were|can|could|should|would|will|do|does|any)\b",
+    re.IGNORECASE,
+)
+LOG_INTENTS = {"gym", "food"}
+
+CENTROID_MIN_SCORE = 0.3
+CENTROID_MIN_MARGIN = 0.08
+
+# 📏 Keyword / regex rules: (intent, weight, pattern)
+_CHART_WORDS = r"(chart|graph|plot|visuali[sz]e|trend)"
+_FOOD_WORDS = r"(food|foods|meal|meals|diet|nutrition|intake|eat|ate|eating|calories)"
+
+RULES = [
+    ("timer", 1.0, re.compile(r"\b(timer|countdown|stopwatch)\b")),
+    ("timer", 1.0, re.compile(r"\bremind me in \d+\s*(s|sec|secs|seconds?|m|mins?|minutes?|h|hrs?|hours?)\b")),
+    ("pie", 1.0, re.compile(r"\bpie\b")),
+    ("pie", 1.0, re.compile(rf"\b{_CHART_WORDS}\b.*\b{_FOOD_WORDS}\b|\b{_FOOD_WORDS}\b.*\b{_CHART_WORDS}\b")),
+    ("graph", 1.0, re.compile(rf"\b{_CHART_WORDS}s?\b")),
+    ("recipe", 1.0, re.compile(r"\b(recipes?|suggest|recommend)\b")),
+    ("recipe", 1.0, re.compile(r"\bwhat (should|can|could) i (eat|cook|make|have)\b")),
+    # "calories in <dish>" is a lookup; "500 calories in lunch" is a food log.
+    ("recipe", 1.0, re.compile(r"(?<![0-9] )\b(calories? in|how many calories)\b")),
+    ("chat", 1.0, re.compile(r"^(hi|hii+|hello|hey|thanks|thank you|ok|okay|bye|good (morning|evening|night))\b")),
+    ("chat", 1.0, re.compile(r"\b(analy[sz]e|analysis|summary|summari[sz]e|tips?|advice|motivat\w*|insights?)\b")),
+    ("gym", 1.0, re.compile(
+        r"\b(gym|workout|workouts|worked out|exercise[sd]?|training|trained|bench press(ed)?|deadlifts?|squats?|"
+        r"cardio|yoga|jog(ged|ging)?|ran|running|cycling|cycled|lifted|lifting|push-?ups?|pull-?ups?|"
+        r"(leg|chest|back|arm|shoulder) day)\b"
+    )),
+    ("food", 1.0, re.compile(r"\b(ate|eaten|eating|drank|breakfast|lunch|dinner|snacks?|meal)\b")),
+    ("food", 0.5, re.compile(r"\b(had|have had|drink)\b")),
+]
+
+# 🎯 Seed utterances for the nearest-centroid fallback
+SEED_UTTERANCES = {
+    "gym": [
+        "did 45 minutes of workout today",
+        "went to the gym for an hour yesterday",
+        "log my workout",
+        "hit legs for 1 hour",
+        "bench press and deadlift session this morning",
+        "30 min cardio at the gym",
+        "just finished my training session",
+        "i exercised for 40 mins",
+    ],
+    "food": [
+        "i ate two rotis and dal for lunch",
+        "had oats with milk for breakfast",
+        "log my food",
+        "dinner was paneer butter masala",
+        "i had a sandwich as a snack",
+        "ate rice and chicken curry",
+        "drank a protein shake after breakfast",
+        "my meal today was poha",
+    ],
+    "graph": [
+        "show my graph",
+        "show my gym progress chart",
+        "plot my workouts",
+        "visualize my gym sessions",
+        "show workout duration over time",
+        "graph of my exercise this week",
+    ],
+    "pie": [
+        "show a pie chart of my food",
+        "food intake breakdown chart",
+        "pie chart of my meals",
+        "visualize what i ate",
+        "nutrition chart please",
+        "show my diet breakdown",
+    ],
+    "timer": [
+        "set a timer for 5 minutes",
+        "start a 10 minute timer for reading",
+        "timer 30 seconds for plank",
+        "remind me in 20 minutes",
+        "start countdown for 2 minutes rest",
+        "set timer 1 hour study",
+    ],
+    "recipe": [
+        "suggest a vegetarian dinner",
+        "what should i eat for lunch",
+        "give me a breakfast recipe",
+        "how many calories in paneer butter masala",
+        "calories in rajma chawal",
+        "recommend a non vegetarian lunch",
+        "any quick recipe for dinner",
+    ],
+    "chat": [
+        "hi",
+        "hello how are you",
+        "how can i stay consistent",
+        "analyze food habits",
+        "diet analysis",
+        "how was my week",
+        "give me some motivation",
+        "what do you think about my progress",
+        "thanks",
+    ],
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text):
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def _features(text):
+    tokens = _TOKEN_RE.findall(text.lower())
+    feats = Counter(tokens)
+    feats.update(f"{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+    norm = math.sqrt(sum(v * v for v in feats.values()))
+    if not norm:
+        return {}
+    return {k: v / norm for k, v in feats.items()}
+
+
+def _build_centroids(seeds):
+    centroids = {}
+    for intent, examples in seeds.items():
+        total = Counter()
+        for example in examples:
+            total.update(_features(example))
+        norm = math.sqrt(sum(v * v for v in total.values()))
+        centroids[intent] = {k: v / norm for k, v in total.items()}
+    return centroids
+
+
+CENTROIDS = _build_centroids(SEED_UTTERANCES)
+
+
+# ⚡ Stage 1: rules
+def classify_by_rules(text):
+    normalized = _normalize(text)
+    reads_as_log = bool(_LOG_EVIDENCE.search(normalized)) and not _QUESTION.search(text.strip())
+    scores = {}
+    for intent, weight, pattern in RULES:
+        if intent in LOG_INTENTS and not reads_as_log:
+            weight = min(weight, 0.5)
+        if weight > scores.get(intent, 0) and pattern.search(normalized):
+            scores[intent] = weight
+
+    confident = [intent for intent, score in scores.items() if score >= 1.0]
+    if "chat" in confident and LOG_INTENTS & set(confident):
+        confident.remove("chat")
+    for intent in RULE_PRECEDENCE:
+        if intent in confident:
+            return intent, scores
+    if len(confident) == 1:
+        return confident[0], scores
+    return None, scores
+
+
+# 📐 Stage 2: nearest centroid
+def classify_by_centroid(text):
+    feats = _features(text)
+    scores = {
+        intent: sum(weight * centroid.get(k, 0.0) for k, weight in feats.items())
+        for intent, centroid in CENTROIDS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score >= CENTROID_MIN_SCORE and best_score - second_score >= CENTROID_MIN_MARGIN:
+        return best, scores
+    return None, scores
+
+
+# 🤖 Stage 3: one batched LLM call for whatever is left
+def classify_by_llm(text):
+    from tools import detect_intents
+
+    flags = detect_intents(text)
+    for intent in INTENTS:
+        if flags.get(intent):
+            return intent
+    return "chat"
+
+
+@lru_cache(maxsize=512)
+def _route_locally(text):
+    # Stages 1-2 are deterministic, so their answer is cached per text; an
+    # unresolved message comes back with intent None and is never cached as chat.
+    intent, scores = classify_by_rules(text)
+    if intent:
+        return {"intent": intent, "source": "rules", "scores": scores}
+
+    intent, scores = classify_by_centroid(text)
+    return {"intent": intent, "source": "centroid" if intent else None, "scores": scores}
+
+
+def route_intent(text, use_llm=True):
+    # Callers get their own copy to mutate. LLM answers are not cached: a failed
+    # call that fell back to chat must not stick for the life of the process.
+    result = _route_locally(text)
+    result = {**result, "scores": dict(result["scores"])}
+    if result["intent"] is None:
+        if use_llm:
+            result.update(intent=classify_by_llm(text), source="llm")
+        else:
+            result.update(intent="chat", source="default")
+    return result
+
+route_intent.cache_clear = _route_locally.cache_clear
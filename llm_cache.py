@@ -0,0 +1,133 @@
+# llm_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_input(text):
+    return _WHITESPACE_RE.sub(" ", text.strip().lower())
+
+
+def cache_key(model, system_instruction, user_input, temperature):
+    raw = json.dumps([model, system_instruction.strip(), normalize_input(user_input), temperature])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ---------- Two-tier (memory LRU + optional SQLite) Response Cache ----------
+
+class LLMCache:
+    def __init__(self, max_entries=2048, ttl=24 * 3600, disk_path=None, disk_max_entries=100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        self._disk = None
+        self._disk_writes = 0
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return item[1]
+                del self._entries[key]
+                self.counters["expirations"] += 1
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._disk_writes += 1
+                if self._disk_writes % 256 == 0:
+                    self._prune_disk()
+                self._disk.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _prune_disk(self):
+        self._disk.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        overflow = self._disk.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.disk_max_entries
+        if overflow > 0:
+            self._disk.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY expires_at LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM llm_cache")
+                self._disk.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+# ---------- Shared Instance ----------
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    # Set LLM_CACHE_PATH (e.g. data/llm_cache.db) to keep answers across restarts.
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+                ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+                disk_path=os.getenv("LLM_CACHE_PATH"),
+            )
+    return _cache
@@ -0,0 +1,227 @@
+# llm_client.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import count, span
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# Status codes worth another attempt; everything else fails fast.
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+# ---------- Pooled Chat-Completions Client ----------
+
+class LLMClient:
+    def __init__(
+        self,
+        api_key,
+        base_url=GROQ_BASE_URL,
+        timeout=15.0,
+        connect_timeout=3.0,
+        max_retries=2,
+        backoff=0.5,
+        max_backoff=4.0,
+        max_concurrency=8,
+        pool_size=16,
+    ):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+        # Keep-alive connections are reused across calls and Streamlit reruns.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self._headers)
+
+        # achat: an httpx.AsyncClient pool and a slot semaphore per event loop,
+        # since both are bound to the loop they were first used on.
+        self._async = {}  # loop -> (httpx.AsyncClient, asyncio.Semaphore)
+        self._async_lock = threading.Lock()
+
+    def _retry_delay(self, attempt, deadline, retry_after=None):
+        # Full jitter, capped; None when the wait would run past the caller's deadline.
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay if delay < deadline - time.monotonic() else None
+
+    def _read_response(self, response, model):
+        # requests or httpx response -> (reply, None, None) on 200, otherwise
+        # (None, the error, Retry-After); raises when the status isn't retryable.
+        if response.status_code == 200:
+            body = response.json()
+            _count_usage(body.get("usage"), model)
+            return body["choices"][0]["message"]["content"], None, None
+        error = LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if response.status_code not in RETRY_STATUS:
+            count("llm_errors", model=model)
+            raise error
+        return None, error, _parse_retry_after(response.headers.get("Retry-After"))
+
+    def chat(self, messages, model, temperature=0.3, timeout=None, **extra):
+        # `timeout` is an overall deadline in seconds covering the wait for a slot and every retry.
+        deadline = time.monotonic() + (timeout or self.timeout)
+        payload = {"model": model, "messages": messages, "temperature": temperature, **extra}
+        last_error = None
+
+        if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            count("llm_errors", model=model)
+            raise LLMError(f"No free LLM slot within {timeout or self.timeout:.1f}s")
+        try:
+            with span("llm.http", model=model) as info:
+                for attempt in range(self.max_retries + 1):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    retry_after = None
+                    info["attempts"] = attempt + 1
+                    count("llm_requests", model=model)
+                    try:
+                        response = self.session.post(
+                            self.url,
+                            json=payload,
+                            timeout=(min(self.connect_timeout, remaining), remaining),
+                        )
+                        reply, last_error, retry_after = self._read_response(response, model)
+                        if reply is not None:
+                            return reply
+                    except (requests.ConnectionError, requests.Timeout) as e:
+                        last_error = e
+
+                    delay = self._retry_delay(attempt, deadline, retry_after)
+                    if attempt == self.max_retries or delay is None:
+                        break
+                    time.sleep(delay)
+                    count("llm_retries", model=model)
+        finally:
+            self._slots.release()
+
+        count("llm_errors", model=model)
+        raise LLMError(f"LLM request failed after {attempt + 1} attempt(s): {last_error!r}")
+
+    def _async_pool(self):
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            if loop not in self._async:
+                for old in [old for old in self._async if old.is_closed()]:
+                    del self._async[old]
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                self._async[loop] = (httpx.AsyncClient(headers=self._headers, limits=limits),
+                                     asyncio.Semaphore(self.max_concurrency))
+            return self._async[loop]
+
+    async def achat(self, messages, model, temperature=0.3, timeout=None, **extra):
+        # Same contract as chat(), on a pooled httpx.AsyncClient: no thread per call,
+        # and at most max_concurrency requests in flight per event loop.
+        deadline = time.monotonic() + (timeout or self.timeout)
+        payload = {"model": model, "messages": messages, "temperature": temperature, **extra}
+        last_error = None
+        client, slots = self._async_pool()
+
+        try:
+            await asyncio.wait_for(slots.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            count("llm_errors", model=model)
+            raise LLMError(f"No free LLM slot within {timeout or self.timeout:.1f}s")
+        try:
+            with span("llm.http", model=model) as info:
+                for attempt in range(self.max_retries + 1):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    retry_after = None
+                    info["attempts"] = attempt + 1
+                    count("llm_requests", model=model)
+                    try:
+                        response = await client.post(
+                            self.url,
+                            json=payload,
+                            timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining)),
+                        )
+                        reply, last_error, retry_after = self._read_response(response, model)
+                        if reply is not None:
+                            return reply
+                    except httpx.TransportError as e:
+                        last_error = e
+
+                    delay = self._retry_delay(attempt, deadline, retry_after)
+                    if attempt == self.max_retries or delay is None:
+                        break
+                    await asyncio.sleep(delay)
+                    count("llm_retries", model=model)
+        finally:
+            slots.release()
+
+        count("llm_errors", model=model)
+        raise LLMError(f"LLM request failed after {attempt + 1} attempt(s): {last_error!r}")
+
+    async def aclose(self):
+        # Closes the async pool of the running loop.
+        with self._async_lock:
+            client, _ = self._async.pop(asyncio.get_running_loop(), (None, None))
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        self.session.close()
+
+
+def _count_usage(usage, model):
+    if usage:
+        count("llm_prompt_tokens", usage.get("prompt_tokens", 0), model=model)
+        count("llm_completion_tokens", usage.get("completion_tokens", 0), model=model)
+
+
+def _parse_retry_after(value):
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# ---------- Shared Instances ----------
+
+# One pooled client per (api_key, base_url), resolved at call time so a key
+# loaded from .env after import (or a different key passed later) is honoured.
+_clients = {}
+_override = None
+_client_lock = threading.Lock()
+
+def get_llm_client(api_key=None, base_url=None):
+    key = (api_key or os.getenv("GROQ_API_KEY", ""), base_url or os.getenv("GROQ_BASE_URL", GROQ_BASE_URL))
+    with _client_lock:
+        if _override is not None:
+            return _override
+        if key not in _clients:
+            _clients[key] = LLMClient(*key)
+    return _clients[key]
+
+def set_llm_client(client):
+    # Swap in a differently configured client (e.g. one pointed at a local stub);
+    # None goes back to the keyed clients.
+    global _override
+    with _client_lock:
+        _override = client
+    return client
@@ -1,23 +1,41 @@
 import streamlit as st
+import os
 import time
-import re
-from datetime import datetime
 import pandas as pd
-import matplotlib.pyplot as plt
 import base64
+from collections import deque
 
-from agent import run_habit_agent
-from tools import detect_timer_command, parse_timer_command
+from agent import stream_habit_agent
+from auth import authenticate
+from intent_router import route_intent
+from tools import parse_timer_command
 from memory import clear_user_memory, is_plot_request
+from timers import format_remaining, get_timer_service
+from charts import duration_trend_data, duration_trend_png, get_chart_service
+from food_data import get_food_df
+from llm_client import get_llm_client
+from semantic_memory import get_semantic_memory
+from text_parsing import parse_datetime, parse_duration
+from tracing import METRICS_PORT, last_trace, metrics, start_metrics_server, trace
 
 # ---------- Session Initialization ----------
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
-if "gym_data" not in st.session_state:
-    st.session_state.gym_data = []
+# Session state is per browser tab and lives in server memory, so the in-page
+# copies are capped; the full history stays in the message and event stores.
+MAX_CHAT_HISTORY = 200
+MAX_GYM_DATA = 500
+CHAT_PAGE_SIZE = 20
+
+if not isinstance(st.session_state.get("chat_history"), deque):
+    st.session_state.chat_history = deque(st.session_state.get("chat_history", []), maxlen=MAX_CHAT_HISTORY)
+if not isinstance(st.session_state.get("gym_data"), deque):
+    st.session_state.gym_data = deque(st.session_state.get("gym_data", []), maxlen=MAX_GYM_DATA)
+if "chat_pages" not in st.session_state:
+    st.session_state.chat_pages = 1
 if "input_area" not in st.session_state:
     if "input_area" not in st.session_state:
         st.session_state.input_area = ""
+if "pending_reply" not in st.session_state:
+    st.session_state.pending_reply = None
 
 
 
@@ -30,8 +48,10 @@ def login():
         submitted = st.form_submit_button("Login")
 
         if submitted:
-            if username.lower().strip() == "hrushikesh mama" and password == "mamamami":
+            user_id = authenticate(username, password)
+            if user_id:
                 st.session_state["authenticated"] = True
+                st.session_state["user_id"] = user_id
                 st.success("✅ Login successful!")
                 st.rerun()
             else:
@@ -41,6 +61,9 @@ if "authenticated" not in st.session_state or not st.session_state["authenticate
     login()
     st.stop()
 
+# Every store, timer and chart below is scoped to the logged-in user.
+USER_ID = st.session_state.get("user_id", "default")
+
 # ---------- Page Configuration ----------
 st.set_page_config(page_title="🏋️‍♀️ Habit Tracker Assistant", layout="centered")
 
@@ -85,13 +108,27 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# ---------- Header with Image ----------
+# ---------- Shared Resources ----------
+# Built once per server process, not on every rerun / session.
+
+HEADER_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unnamed.png")
+
+@st.cache_resource
 def get_base64_image(image_path):
     with open(image_path, "rb") as img_file:
         encoded = base64.b64encode(img_file.read()).decode()
     return f"data:image/png;base64,{encoded}"
 
-image_data_url = get_base64_image("unnamed.png")
+@st.cache_resource(show_spinner="Loading recipes and memory ...")
+def load_shared_resources():
+    # LLM client, recipe dataset and semantic memory (embedding model + index);
+    # loaded up front so the first message doesn't pay for them.
+    return get_llm_client(), get_food_df(), get_semantic_memory()
+
+load_shared_resources()
+
+# ---------- Header with Image ----------
+image_data_url = get_base64_image(HEADER_IMAGE)
 
 st.markdown(f"""
 <div class='container' style='text-align: center;'>
@@ -105,123 +142,80 @@ st.markdown("<hr>", unsafe_allow_html=True)
 # ---------- Clear Data ----------
 with st.expander("🧹 Clear Data & Memory", expanded=False):
     if st.button("Clear All", use_container_width=True):
-        clear_user_memory(user_id="default")
+        clear_user_memory(user_id=USER_ID)
         st.session_state.chat_history.clear()
         st.session_state.gym_data.clear()
+        st.session_state.chat_pages = 1
         st.success("✅ Memory and logs cleared.")
 
 # ---------- Gym Data Extractor ----------
+GYM_KEYWORDS = ["gym", "workout", "bench press", "deadlift"]
+
 def extract_gym_data(text):
-    text = text.lower()
-    gym_keywords = ["gym", "workout", "bench press", "deadlift"]
-    if not any(word in text for word in gym_keywords):
+    if not any(word in text.lower() for word in GYM_KEYWORDS):
         return None
-    match = re.search(r"(\d+)\s*(minutes|min|hrs|hours|hr)", text)
-    if not match:
+    duration = parse_duration(text)
+    if not duration:
         return None
-    duration = int(match.group(1))
-    now = datetime.now()
-    datetime_obj = now
-    if "day before yesterday" in text:
-        datetime_obj = now - pd.Timedelta(days=2)
-    elif "yesterday" in text:
-        datetime_obj = now - pd.Timedelta(days=1)
-    elif "today" in text:
-        datetime_obj = now
-    else:
-        date_match = re.search(r"\b(\d{1,2})(st|nd|rd|th)?\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*", text)
-        if not date_match:
-            date_match = re.search(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+(\d{1,2})(st|nd|rd|th)?", text)
-        try:
-            if date_match:
-                if date_match.lastindex == 3:
-                    day = int(date_match.group(1))
-                    month = date_match.group(3)
-                else:
-                    month = date_match.group(1)
-                    day = int(date_match.group(2))
-                month_num = datetime.strptime(month[:3], "%b").month
-                year = now.year
-                datetime_obj = datetime(year, month_num, day, now.hour, now.minute, now.second)
-        except Exception:
-            pass
-    return {"DateTime": datetime_obj, "Duration": duration}
+    return {"DateTime": parse_datetime(text), "Duration": duration}
+
+# ---------- Charts ----------
+def show_gym_chart(title):
+    # Interactive view: native Vega-Lite line chart, no matplotlib involved.
+    # Static view: PNG from the chart service, re-rendered only when the data changes.
+    st.markdown(title)
+    if st.session_state.get("interactive_charts", True):
+        st.line_chart(duration_trend_data(st.session_state.gym_data))
+        return
+    st.image(duration_trend_png(USER_ID, st.session_state.gym_data))
+    metrics = get_chart_service().stats().get("duration_trend")
+    if metrics:
+        st.caption(f"Rendered {metrics['renders']}× (last {metrics['last_render_ms']:.0f} ms), "
+                   f"served from cache {metrics['hits']}×")
 
 # ---------- Chat Input (Enter to Send) ----------
 st.markdown("### 💬 Talk to Your Habit Assistant")
+st.toggle("⚡ Interactive charts", value=True, key="interactive_charts")
+st.toggle("🔍 Debug panel", value=False, key="debug_panel")
+if METRICS_PORT:
+    start_metrics_server()
 
 # Handle input
 
 def handle_input():
-    user_input = st.session_state.input_area.strip()
-    if not user_input:
-        return
-    st.session_state.chat_history.append(("user", user_input))
-    st.session_state.input_area = ""
-
-    if detect_timer_command(user_input):
-        parsed = parse_timer_command(user_input)
-        if parsed:
-            duration, task = parsed
-            st.success(f"⏱️ Starting a {duration}-second timer for: {task}")
-            placeholder = st.empty()
-            for i in range(duration, 0, -1):
-                mins, secs = divmod(i, 60)
-                placeholder.markdown(f"### ⏳ {mins:02d}:{secs:02d} remaining for **{task}**")
-                time.sleep(1)
-            placeholder.markdown(f"### ✅ Timer complete for: **{task}**")
-            st.session_state.chat_history.append(("assistant", f"Timer complete for: {task}"))
-
-    elif (gym_data := extract_gym_data(user_input)):
-        st.session_state.gym_data.append(gym_data)
-        formatted_time = gym_data['DateTime'].strftime('%B %d, %Y %I:%M %p')
-        msg = f"💪 Logged your gym session: {gym_data['Duration']} minutes on {formatted_time}"
-        st.success(msg)
-        st.session_state.chat_history.append(("assistant", msg))
-
-    elif is_plot_request(user_input):
-        if st.session_state.gym_data:
-            df = pd.DataFrame(st.session_state.gym_data).sort_values("DateTime")
-            st.markdown("### 📊 Gym Progress Chart")
-            fig, ax = plt.subplots()
-            fig.patch.set_facecolor('#121212')
-            ax.set_facecolor('#1e1e1e')
-            ax.plot(df["DateTime"], df["Duration"], marker='o', linestyle='-', color='#81c784')
-            ax.set_xlabel("Date & Time", color='white')
-            ax.set_ylabel("Duration (minutes)", color='white')
-            ax.set_title("Gym Duration Trend", color='white')
-            ax.tick_params(axis='x', colors='white', rotation=45)
-            ax.tick_params(axis='y', colors='white')
-            ax.grid(True, color='#444')
-            st.pyplot(fig)
-            st.session_state.chat_history.append(("assistant", "📈 Here's your gym session chart!"))
-        else:
-            st.warning("⚠️ No gym data available to plot.")
-            st.session_state.chat_history.append(("assistant", "No gym data available to plot."))
+    with trace("ui.handle_input", user_id=USER_ID):
+        user_input = st.session_state.input_area.strip()
+        if not user_input:
+            return
+        st.session_state.chat_history.append(("user", user_input))
+        st.session_state.input_area = ""
 
-    else:
-        reply = run_habit_agent(user_input, st.session_state.chat_history)
-        if reply == "__PLOT_GYM_GRAPH__":
+        if route_intent(user_input)["intent"] == "timer":
+            parsed = parse_timer_command(user_input)
+            if parsed:
+                duration, task = parsed
+                # Runs on the scheduler thread; the timer panel below polls it.
+                get_timer_service().start(USER_ID, task, duration)
+                st.session_state.chat_history.append(("assistant", f"⏱️ Started a {format_remaining(duration)} timer for: {task}"))
+
+        elif (gym_data := extract_gym_data(user_input)):
+            st.session_state.gym_data.append(gym_data)
+            formatted_time = gym_data['DateTime'].strftime('%B %d, %Y %I:%M %p')
+            msg = f"💪 Logged your gym session: {gym_data['Duration']} minutes on {formatted_time}"
+            st.success(msg)
+            st.session_state.chat_history.append(("assistant", msg))
+
+        elif is_plot_request(user_input):
             if st.session_state.gym_data:
-                df = pd.DataFrame(st.session_state.gym_data).sort_values("DateTime")
-                st.markdown("### 📈 Gym Progress Chart")
-                fig, ax = plt.subplots()
-                fig.patch.set_facecolor('#121212')
-                ax.set_facecolor('#1e1e1e')
-                ax.plot(df["DateTime"], df["Duration"], marker='o', linestyle='-', color='#81c784')
-                ax.set_xlabel("Date & Time", color='white')
-                ax.set_ylabel("Duration (minutes)", color='white')
-                ax.set_title("Gym Duration Trend", color='white')
-                ax.tick_params(axis='x', colors='white', rotation=45)
-                ax.tick_params(axis='y', colors='white')
-                ax.grid(True, color='#444')
-                st.pyplot(fig)
+                show_gym_chart("### 📊 Gym Progress Chart")
                 st.session_state.chat_history.append(("assistant", "📈 Here's your gym session chart!"))
             else:
-                st.warning("⚠️ No gym data found to plot.")
-                st.session_state.chat_history.append(("assistant", "No gym data found to plot."))
+                st.warning("⚠️ No gym data available to plot.")
+                st.session_state.chat_history.append(("assistant", "No gym data available to plot."))
+
         else:
-            st.session_state.chat_history.append(("assistant", reply))
+            # Answered below the chat history so the reply can stream in place.
+            st.session_state.pending_reply = user_input
 
 st.text_input(
     label="Message",
@@ -231,18 +225,86 @@ st.text_input(
     label_visibility="collapsed"
 )
 
+# ---------- Running Timers ----------
+timer_service = get_timer_service()
+
+@st.fragment(run_every=1 if timer_service.has_active(USER_ID) else None)
+def timer_panel():
+    # Reruns on its own every second while timers are running; the rest of the page stays put.
+    for timer in timer_service.active(USER_ID):
+        col_time, col_cancel = st.columns([5, 1])
+        col_time.markdown(f"### ⏳ {format_remaining(timer.remaining)} remaining for **{timer.name}**")
+        if col_cancel.button("Cancel", key=f"cancel_timer_{timer.id}"):
+            timer_service.cancel(USER_ID, timer_id=timer.id)
+            st.rerun()
+    finished = timer_service.collect_finished(USER_ID)
+    for timer in finished:
+        st.session_state.chat_history.append(("assistant", f"✅ Timer complete for: {timer.name}"))
+        st.toast(f"✅ Timer complete for: {timer.name}")
+    if finished:
+        st.rerun(scope="app")
+
+timer_panel()
+
 # ---------- Chat History ----------
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown("### 🧾 Chat History")
 st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
-for role, msg in st.session_state.chat_history:
+def bubble_html(role, msg):
     css_class = "user-msg" if role == "user" else "assistant-msg"
-    st.markdown(f"""
+    return f"""
         <div class="chat-bubble {css_class}">
             <strong>{role.capitalize()}:</strong> {msg}
         </div>
-    """, unsafe_allow_html=True)
+    """
+
+def render_bubble(role, msg, target=st):
+    target.markdown(bubble_html(role, msg), unsafe_allow_html=True)
+
+def render_history(history, pages):
+    # Latest `pages` pages of turns, each drawn as a single markdown element;
+    # anything older sits behind a "show earlier" button and isn't sent at all.
+    shown = min(len(history), pages * CHAT_PAGE_SIZE)
+    hidden = len(history) - shown
+    if hidden:
+        if st.button(f"⬆️ Show earlier messages ({hidden} more)", key="chat_show_earlier"):
+            st.session_state.chat_pages += 1
+            st.rerun()
+    turns = list(history)[hidden:]
+    for start in range(0, len(turns), CHAT_PAGE_SIZE):
+        st.markdown("".join(bubble_html(role, msg) for role, msg in turns[start:start + CHAT_PAGE_SIZE]),
+                    unsafe_allow_html=True)
+
+STREAM_REFRESH_SECONDS = 0.05
+
+def stream_reply(user_input):
+    # Redraws one bubble as deltas arrive (throttled), then returns the full reply.
+    placeholder = st.empty()
+    render_bubble("assistant", "▌", placeholder)
+    reply, last_draw = "", 0.0
+    for delta in stream_habit_agent(user_input, st.session_state.chat_history, user_id=USER_ID):
+        reply += delta
+        if time.perf_counter() - last_draw >= STREAM_REFRESH_SECONDS:
+            render_bubble("assistant", reply + "▌", placeholder)
+            last_draw = time.perf_counter()
+    render_bubble("assistant", reply, placeholder)
+    return reply
+
+render_history(st.session_state.chat_history, st.session_state.chat_pages)
+
+if st.session_state.pending_reply:
+    pending, st.session_state.pending_reply = st.session_state.pending_reply, None
+    reply = stream_reply(pending)
+    if reply == "__PLOT_GYM_GRAPH__":
+        if st.session_state.gym_data:
+            show_gym_chart("### 📈 Gym Progress Chart")
+            st.session_state.chat_history.append(("assistant", "📈 Here's your gym session chart!"))
+        else:
+            st.warning("⚠️ No gym data found to plot.")
+            st.session_state.chat_history.append(("assistant", "No gym data found to plot."))
+    else:
+        st.session_state.chat_history.append(("assistant", reply))
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -257,14 +319,24 @@ if st.session_state.gym_data:
         'color': 'white',
         'border-color': 'white'
     }), use_container_width=True)
-def plot_food_graph(food_df):
 
-    # Example: plot total calories per day
-    daily_calories = food_df.groupby("date")["calories"].sum()
+# ---------- Debug Panel ----------
+def show_debug_panel():
+    # Span timings and counters of this user's last agent turn, plus process-wide metrics.
+    turn = last_trace("agent.turn", user_id=USER_ID)
+    with st.expander("🔍 Last turn trace", expanded=True):
+        if turn is None:
+            st.caption("No agent turn traced yet.")
+        else:
+            st.caption(f"{turn.started_at} · {turn.duration * 1000:.0f} ms total")
+            st.dataframe(pd.DataFrame([
+                {"span": "  " * span["depth"] + span["name"], "start ms": span["start"] * 1000,
+                 "ms": span["duration"] * 1000, "attrs": str(span["attrs"] or "")}
+                for span in turn.as_dict()["spans"]
+            ]), use_container_width=True)
+            st.json(turn.counters)
+        st.code(metrics.prometheus(), language="text")
 
-    plt.figure(figsize=(10, 4))
-    daily_calories.plot(kind="bar", color="orange")
-    plt.title("Daily Calorie Intake")
-    plt.xlabel("Date")
-    plt.ylabel("Calories")
-    st.pyplot(plt)
+if st.session_state.get("debug_panel"):
+    st.markdown("---")
+    show_debug_panel()
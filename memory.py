@@ -1,10 +1,16 @@
 import os
-import json
-import re
-import base64
 from datetime import datetime, timedelta
-from io import BytesIO
-import matplotlib.pyplot as plt
+
+from filelock import FileLock
+
+from charts import habit_chart_base64
+from event_store import get_event_store
+from habit_store import HabitStore, migrate_json_habits
+from message_store import MessageStore, migrate_json_messages
+from persistence import get_persist_queue
+from sharding import ShardedStores
+from text_parsing import parse_calories, parse_date, parse_duration
+from tracing import count, span
 
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -22,156 +28,112 @@ def safe_parse_date(date_str):
 
 # ---------- Message Handling ----------
 
+def _migrate_once(migrate):
+    # Legacy JSON imports rename their source when done; the file lock keeps two
+    # processes starting at the same time from importing the same file twice.
+    def run(stores):
+        with FileLock(os.path.join(DATA_DIR, ".migrate.lock")):
+            migrate(stores)
+    return run
+
+MESSAGE_DB = os.path.join(DATA_DIR, "messages.db")
+# Fold any legacy data/{user_id}_messages.json files into the store once.
+_message_stores = ShardedStores(MessageStore, MESSAGE_DB, on_first_open=_migrate_once(
+    lambda stores: migrate_json_messages(stores, DATA_DIR)
+))
+
+def get_message_store(user_id):
+    return _message_stores.for_user(user_id)
+
 def save_message(user_id, role, content):
-    filepath = os.path.join(DATA_DIR, f"{user_id}_messages.json")
-    message = {
-        "role": role,
-        "content": content,
-        "timestamp": datetime.now().isoformat()
-    }
-
-    messages = []
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            try:
-                messages = json.load(f)
-            except json.JSONDecodeError:
-                messages = []
-
-    messages.append(message)
-
-    with open(filepath, "w") as f:
-        json.dump(messages, f, indent=2)
+    with span("memory.save_message", role=role):
+        get_message_store(user_id).append(user_id, role, content)
+    count("bytes_written", len(content.encode("utf-8")), store="messages")
 
 def get_contextual_memory(user_id, limit=5):
-    filepath = os.path.join(DATA_DIR, f"{user_id}_messages.json")
-    if not os.path.exists(filepath):
-        return []
     try:
-        with open(filepath, "r") as f:
-            messages = json.load(f)
-        return messages[-limit:]
+        with span("memory.recent", limit=limit):
+            return get_message_store(user_id).tail(user_id, limit)
     except Exception as e:
         print(f"Failed to load contextual memory: {e}")
         return []
 
 def clear_user_memory(user_id):
-    filepath = os.path.join(DATA_DIR, f"{user_id}_messages.json")
+    # Everything kept about the user: messages, habit entries, gym/food events
+    # (and their rollups) and the semantic memory partition. Queued writes go first
+    # so a reply still being persisted can't reappear after the clear.
+    get_persist_queue().flush(user_id)
     try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        get_message_store(user_id).clear(user_id)
+        get_habit_store(user_id).clear(user_id)
+        get_event_store(user_id).clear(user_id)
     except Exception as e:
         print(f"Failed to clear memory: {e}")
+    try:
+        from semantic_memory import get_semantic_memory
+        get_semantic_memory().clear_user(user_id)
+    except ImportError:
+        pass  # sentence-transformers / faiss not installed: nothing was indexed
+    except Exception as e:
+        print(f"Failed to clear semantic memory: {e}")
 
 # ---------- Memory Class for Habits ----------
 
+HABIT_DB = os.path.join(DATA_DIR, "habits.db")
+# Fold the legacy data/habit_memory.json into the store once.
+_habit_stores = ShardedStores(HabitStore, HABIT_DB, on_first_open=_migrate_once(
+    lambda stores: migrate_json_habits(stores, os.path.join(DATA_DIR, "habit_memory.json"))
+))
+
+def get_habit_store(user_id):
+    return _habit_stores.for_user(user_id)
+
 class HabitMemory:
-    def __init__(self, memory_file=os.path.join(DATA_DIR, "habit_memory.json")):
-        self.memory_file = memory_file
-        self.memory = self.load_memory()
-
-    def load_memory(self):
-        if os.path.exists(self.memory_file):
-            with open(self.memory_file, "r") as f:
-                try:
-                    return json.load(f)
-                except json.JSONDecodeError:
-                    return {}
-        return {}
-
-    def save_memory(self):
-        with open(self.memory_file, "w") as f:
-            json.dump(self.memory, f, indent=4)
+    # Entries live in SQLite indexed by (user_id, day); old ones are removed by the
+    # store's retention policy (a periodic range delete), never on read.
+    # Without an explicit store, each user's entries go to that user's shard.
+    def __init__(self, store=None):
+        self.store = store
+
+    def _store(self, user_id):
+        return self.store or get_habit_store(user_id)
 
     def prune_old_entries(self, user_id, days=30):
-        entries = self.get_entries(user_id)
-        cutoff = datetime.now().date() - timedelta(days=days)
-        pruned = [entry for entry in entries if datetime.strptime(entry["date"], "%Y-%m-%d").date() >= cutoff]
-        self.memory[user_id] = pruned
-        self.save_memory()
+        return self._store(user_id).prune(datetime.now().date() - timedelta(days=days), user_id=user_id)
 
     def add_entry(self, user_id, prompt):
         entry = self.extract_data_from_prompt(prompt)
         if entry is None:
             return False
 
-        if user_id not in self.memory:
-            self.memory[user_id] = []
-
-        self.memory[user_id].append(entry)
-        self.save_memory()
+        self._store(user_id).append(user_id, entry)
         return True
 
     def extract_data_from_prompt(self, prompt):
-        prompt = prompt.lower()
-        now = datetime.now()
-
-        # Parse date
-        date = now
-        if "yesterday" in prompt:
-            date = now - timedelta(days=1)
-        date_str = date.strftime("%Y-%m-%d")
-
-        # Extract values
-        cal_match = re.search(r'(\d+)\s*(k?calories?)', prompt)
-        min_match = re.search(r'(\d+)\s*(minutes?|mins?)', prompt)
-        hr_match = re.search(r'(\d+(?:\.\d+)?)\s*(hours?|hrs?)', prompt)
-
-        if cal_match:
-            return {"date": date_str, "type": "calories", "value": int(cal_match.group(1))}
-        elif hr_match:
-            return {"date": date_str, "type": "hours", "value": float(hr_match.group(1))}
-        elif min_match:
-            minutes = int(min_match.group(1))
+        date_str = parse_date(prompt).strftime("%Y-%m-%d")
+
+        calories = parse_calories(prompt)
+        if calories is not None:
+            return {"date": date_str, "type": "calories", "value": calories}
+        minutes = parse_duration(prompt)
+        if minutes is not None:
             return {"date": date_str, "type": "hours", "value": round(minutes / 60, 2)}
 
         return None
 
-    def get_entries(self, user_id):
-        return self.memory.get(user_id, [])
-
-    def plot_graph(self, user_id):
-        self.prune_old_entries(user_id)
-        entries = self.get_entries(user_id)
-        if not entries:
-            print("⚠️ No entries found.")
-            return None
-
-        data = {}
-        for entry in entries:
-            date = entry["date"]
-            value = entry["value"]
-            key = entry["type"]
-
-            if key not in data:
-                data[key] = {}
-
-            data[key][date] = data[key].get(date, 0) + value
+    def get_entries(self, user_id, days=None):
+        since = datetime.now().date() - timedelta(days=days) if days is not None else None
+        return self._store(user_id).entries(user_id, since)
 
+    def plot_graph(self, user_id, days=30):
+        # Daily totals per habit type for the last `days`, summed in SQL.
+        data = self._store(user_id).daily_totals(user_id, since=datetime.now().date() - timedelta(days=days))
         if not data:
-            print("⚠️ No valid data to plot.")
+            print("⚠️ No entries found.")
             return None
 
-        plt.figure(figsize=(10, 5))
-        for key, date_map in data.items():
-            dates = sorted(date_map.keys())
-            values = [date_map[d] for d in dates]
-            plt.plot(dates, values, marker='o', label=key.capitalize())
-
-        plt.xlabel("Date")
-        plt.ylabel("Value")
-        plt.title("Habit Progress")
-        plt.xticks(rotation=45)
-        plt.grid(True)
-        plt.legend()
-        plt.tight_layout()
-
-        buffer = BytesIO()
-        plt.savefig(buffer, format="png")
-        buffer.seek(0)
-        img_base64 = base64.b64encode(buffer.read()).decode("utf-8")
-        plt.close()
-        return img_base64
+        # Rendered once per distinct data set; repeat calls return the cached base64 PNG.
+        return habit_chart_base64(user_id, data)
 
 # ---------- Graph Wrapper ----------
 
@@ -184,45 +146,14 @@ def plot_memory_graph(user_id="default"):
 def is_plot_request(text):
     keywords = ["plot", "graph", "chart", "visualize", "show", "display"]
     return any(word in text.lower() for word in keywords)
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
-
-class SemanticMemory:
-    def __init__(self, index_path="data/faiss.index", model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
-        self.index_path = index_path
-        self.dimension = 384  # for MiniLM
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.metadata = []  # Stores [ (user_id, original_text) ]
-
-        if os.path.exists(index_path):
-            self.load_index()
-
-    def load_index(self):
-        self.index = faiss.read_index(self.index_path)
-        with open(self.index_path + ".meta", "r") as f:
-            self.metadata = json.load(f)
-
-    def save_index(self):
-        faiss.write_index(self.index, self.index_path)
-        with open(self.index_path + ".meta", "w") as f:
-            json.dump(self.metadata, f)
-
-    def add_entry(self, user_id, text):
-        embedding = self.model.encode([text])
-        self.index.add(np.array(embedding).astype("float32"))
-        self.metadata.append((user_id, text))
-        self.save_index()
-
-    def search(self, query, user_id=None, top_k=5):
-        embedding = self.model.encode([query])
-        D, I = self.index.search(np.array(embedding).astype("float32"), top_k)
-        results = []
-        for i in I[0]:
-            if i < len(self.metadata):
-                uid, text = self.metadata[i]
-                if user_id is None or uid == user_id:
-                    results.append(text)
-        return results
 
+
+# ---------- Semantic Memory (lazy) ----------
+
+def __getattr__(name):
+    # SemanticMemory pulls in FAISS and the embedding model; importing memory for
+    # chat history or habits should not pay for that.
+    if name == "SemanticMemory":
+        from semantic_memory import SemanticMemory
+        return SemanticMemory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,114 @@
+# message_store.py
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages (user_id, id);
+"""
+
+
+# ---------- SQLite (WAL) Message Store ----------
+
+class MessageStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # One connection per thread; WAL lets readers run alongside the writer.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, user_id, role, content, timestamp=None):
+        timestamp = timestamp or datetime.now().isoformat()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO messages (user_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                (user_id, role, content, timestamp),
+            )
+
+    def append_many(self, user_id, messages):
+        rows = [
+            (user_id, m["role"], m["content"], m.get("timestamp") or datetime.now().isoformat())
+            for m in messages
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO messages (user_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def tail(self, user_id, limit=5):
+        rows = self._conn().execute(
+            "SELECT role, content, timestamp FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [{"role": r, "content": c, "timestamp": t} for r, c, t in reversed(rows)]
+
+    def count(self, user_id):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+    def clear(self, user_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ---------- One-shot Migration from data/{user_id}_messages.json ----------
+
+def migrate_json_messages(store, data_dir):
+    migrated = 0
+    for filepath in glob.glob(os.path.join(data_dir, "*_messages.json")):
+        user_id = os.path.basename(filepath)[: -len("_messages.json")]
+        try:
+            with open(filepath, "r") as f:
+                messages = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Skipping {filepath}: {e}")
+            continue
+
+        migrated += store.append_many(user_id, [m for m in messages if "role" in m and "content" in m])
+        # Rename rather than delete so a bad migration can be inspected and rerun.
+        os.replace(filepath, filepath + ".migrated")
+        print(f"📦 Migrated {len(messages)} messages for '{user_id}'")
+    return migrated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate JSON chat logs into the SQLite message store")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db", default=os.path.join("data", "messages.db"))
+    args = parser.parse_args()
+
+    total = migrate_json_messages(MessageStore(args.db), args.data_dir)
+    print(f"✅ Migrated {total} messages into {args.db}")
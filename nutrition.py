@@ -0,0 +1,102 @@
+# nutrition.py
+
+import csv
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+NUTRIENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nutrients.csv")
+NUTRIENT_COLUMNS = {"calories": "Calories", "protein": "Protein", "carbs": "Carbs", "fat": "Fat"}
+
+_WORD_RE = r"[a-z]+"
+
+
+def singular(word):
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def ingredient_key(text):
+    return " ".join(singular(w) for w in re.findall(_WORD_RE, str(text).lower()))
+
+
+# ---------- Nutrient Table ----------
+
+class NutrientTable:
+    def __init__(self, path=NUTRIENTS_PATH):
+        self.keys = []
+        rows = []
+        with open(path, newline="") as f:
+            for record in csv.DictReader(f):
+                self.keys.append(ingredient_key(record["ingredient"]))
+                rows.append([float(record[c]) for c in NUTRIENT_COLUMNS])
+        self.values = np.array(rows, dtype=np.float64)   # ingredients x nutrients
+        self.column_of = {key: i for i, key in enumerate(self.keys)}
+        self.phrase_heads = {key.split()[0] for key in self.keys if " " in key}
+
+    def tokens(self, text):
+        # Whole words and word pairs, so "oil" matches "oil" but not "boil".
+        words = [singular(w) for w in re.findall(_WORD_RE, str(text).lower())]
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    def estimate(self, ingredients_text):
+        cols = [self.column_of[t] for t in self.tokens(ingredients_text) if t in self.column_of]
+        totals = self.values[cols].sum(axis=0) if cols else np.zeros(len(NUTRIENT_COLUMNS))
+        return dict(zip(NUTRIENT_COLUMNS, totals.tolist()))
+
+    def ingredient_matrix(self, ingredients):
+        # Sparse recipes x ingredients presence matrix. Words are factorized once, so
+        # singularizing and vocabulary lookups run per distinct word, not per occurrence.
+        words = ingredients.fillna("").str.lower().str.findall(_WORD_RE).explode().dropna()
+        row_ids = words.index.to_numpy()
+        codes, uniques = pd.factorize(words)
+        unique_keys = [singular(w) for w in uniques]
+        cols = np.array([self.column_of.get(k, -1) for k in unique_keys] + [-1], dtype=np.int64)[codes]
+
+        rows_hit, cols_hit = [row_ids[cols >= 0]], [cols[cols >= 0]]
+        if self.phrase_heads:
+            # Two-word ingredients ("wheat flour"): only pairs starting with a known head word.
+            is_head = np.array([k in self.phrase_heads for k in unique_keys] + [False])[codes]
+            pairs = np.flatnonzero(is_head[:-1] & (row_ids[1:] == row_ids[:-1]))
+            for i in pairs:
+                col = self.column_of.get(f"{unique_keys[codes[i]]} {unique_keys[codes[i + 1]]}")
+                if col is not None:
+                    rows_hit.append([row_ids[i]])
+                    cols_hit.append([col])
+
+        rows_hit, cols_hit = np.concatenate(rows_hit), np.concatenate(cols_hit)
+        matrix = sparse.coo_matrix(
+            (np.ones(len(rows_hit)), (rows_hit, cols_hit)),
+            shape=(len(ingredients), len(self.keys)),
+        ).tocsr()
+        matrix.data[:] = 1.0  # presence, not repetition count
+        return matrix
+
+
+# ---------- Dataset Annotation ----------
+
+_table = None
+
+def get_nutrient_table():
+    global _table
+    if _table is None:
+        _table = NutrientTable()
+    return _table
+
+def annotate_nutrition(df, table=None):
+    # Adds Calories/Protein/Carbs/Fat columns for every recipe in one sparse product.
+    if df.empty or "TranslatedIngredients" not in df:
+        return df
+    table = table or get_nutrient_table()
+    ingredients = df["TranslatedIngredients"].reset_index(drop=True)
+    totals = table.ingredient_matrix(ingredients) @ table.values
+    df = df.copy()
+    for i, column in enumerate(NUTRIENT_COLUMNS.values()):
+        df[column] = np.round(totals[:, i], 1)
+    return df
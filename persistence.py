@@ -0,0 +1,72 @@
+# persistence.py
+#
+# Write-behind queue for turn persistence. The agent hands over "save this
+# message / index these turns" jobs and returns the reply without waiting on
+# SQLite or the vector WAL. One worker runs the jobs in submission order, so a
+# user's messages land in the order they were said. flush(user_id) waits for a
+# user's pending writes (the next turn does this before reading history), and
+# everything still queued is flushed at interpreter exit.
+
+import atexit
+import queue
+import threading
+
+from tracing import count
+
+FLUSH_TIMEOUT = 30.0
+
+
+class PersistQueue:
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._pending = {}              # user_id -> jobs submitted but not finished
+        self._done = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="persist-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, user_id, fn, *args, **kwargs):
+        with self._done:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        self._jobs.put((user_id, fn, args, kwargs))
+
+    def pending(self, user_id=None):
+        with self._done:
+            return sum(self._pending.values()) if user_id is None else self._pending.get(user_id, 0)
+
+    def flush(self, user_id=None, timeout=FLUSH_TIMEOUT):
+        # Blocks until the user's (or everyone's) queued writes are done; False on timeout.
+        with self._done:
+            return self._done.wait_for(
+                lambda: not (self._pending if user_id is None else self._pending.get(user_id)), timeout
+            )
+
+    def _run(self):
+        while True:
+            user_id, fn, args, kwargs = self._jobs.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                count("persist_errors")
+                print(f"⚠️ Background write {getattr(fn, '__name__', fn)} for {user_id!r} failed: {e}")
+            finally:
+                with self._done:
+                    left = self._pending[user_id] - 1
+                    if left:
+                        self._pending[user_id] = left
+                    else:
+                        del self._pending[user_id]
+                    self._done.notify_all()
+
+
+# ---------- Shared Instance ----------
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_persist_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = PersistQueue()
+            atexit.register(_queue.flush)
+    return _queue
@@ -0,0 +1,154 @@
+# recipe_index.py
+
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from food_data import get_food_df
+
+# Dataset spellings folded onto the words users (and the LLM) actually type.
+TOKEN_ALIASES = {"vegeterian": "vegetarian", "nonveg": "non", "veg": "vegetarian"}
+NEGATION_TOKEN = "non"
+
+# Words people add around a dish name that never distinguish one recipe from another.
+NAME_NOISE_WORDS = {"recipe", "recipes", "calories", "calorie", "kcal", "how", "many", "much", "in", "of", "a", "the"}
+NAME_MIN_SCORE = 0.45
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return tuple(TOKEN_ALIASES.get(t, t) for t in _TOKEN_RE.findall(str(text).lower()))
+
+
+def normalize_name(text):
+    return " ".join(t for t in _TOKEN_RE.findall(str(text).lower()) if t not in NAME_NOISE_WORDS)
+
+
+def name_trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _value_matches(value_tokens, query_tokens):
+    # Every query word must prefix some word of the value, and "Non Vegetarian"
+    # only answers queries that ask for "non".
+    if NEGATION_TOKEN in value_tokens and NEGATION_TOKEN not in query_tokens:
+        return False
+    return all(any(v.startswith(q) for v in value_tokens) for q in query_tokens)
+
+
+# ---------- Row-id Indexes: Course / Diet / Cuisine, Cook Time, Recipe Names ----------
+
+class RecipeIndex:
+    CATEGORY_COLUMNS = {"course": "Course", "diet": "Diet", "cuisine": "Cuisine"}
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.postings = {}     # field -> {normalized value tokens: sorted row ids}
+        self._lookups = {}     # (field, query tokens) -> merged row ids
+        for field, column in self.CATEGORY_COLUMNS.items():
+            values = df[column].fillna("").map(tokenize) if column in df else pd.Series([()] * self.size)
+            groups = pd.Series(np.arange(self.size)).groupby(values.to_numpy()).indices
+            self.postings[field] = {tokens: ids.astype(np.int32) for tokens, ids in groups.items() if tokens}
+
+        times = pd.to_numeric(df.get("TotalTimeInMins", pd.Series(dtype=float)), errors="coerce")
+        times = times.to_numpy(dtype=float) if len(times) == self.size else np.full(self.size, np.nan)
+        self._time_order = np.argsort(times, kind="stable").astype(np.int32)  # NaNs sort last
+        self._sorted_times = times[self._time_order]
+
+        # Exact name hash plus a trigram inverted index for fuzzy lookups.
+        names = df["TranslatedRecipeName"].fillna("").map(normalize_name) if "TranslatedRecipeName" in df else pd.Series([], dtype=str)
+        self.exact_names = {}
+        postings = {}
+        self._name_gram_counts = np.zeros(self.size, dtype=np.int32)
+        for row_id, name in enumerate(names):
+            if not name:
+                continue
+            self.exact_names.setdefault(name, row_id)
+            grams = name_trigrams(name)
+            self._name_gram_counts[row_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row_id)
+        self.name_postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def values(self, field):
+        return [" ".join(tokens) for tokens in self.postings[field]]
+
+    def lookup(self, field, query):
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return None
+        key = (field, query_tokens)
+        if key not in self._lookups:
+            hits = [ids for tokens, ids in self.postings[field].items() if _value_matches(tokens, query_tokens)]
+            if not hits:
+                ids = np.empty(0, dtype=np.int32)
+            else:
+                ids = hits[0] if len(hits) == 1 else np.unique(np.concatenate(hits))
+            self._lookups[key] = ids
+        return self._lookups[key]
+
+    def search_names(self, query, k=5, min_score=NAME_MIN_SCORE):
+        # Returns [(row_id, score)] best first; an exact name match scores 1.0.
+        name = normalize_name(query)
+        if not name:
+            return []
+        exact = self.exact_names.get(name)
+
+        grams = name_trigrams(name)
+        hits = [self.name_postings[g] for g in grams if g in self.name_postings]
+        results = [(exact, 1.0)] if exact is not None else []
+        if hits:
+            shared = np.bincount(np.concatenate(hits), minlength=self.size)
+            candidates = np.flatnonzero(shared)
+            # Dice coefficient over trigram sets.
+            scores = 2.0 * shared[candidates] / (len(grams) + self._name_gram_counts[candidates])
+            keep = scores >= min_score
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) > k:
+                top = np.argpartition(-scores, k)[:k]
+                candidates, scores = candidates[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            results += [(int(candidates[i]), float(scores[i])) for i in order if candidates[i] != exact]
+        return results[:k]
+
+    def within_time(self, max_minutes):
+        cut = np.searchsorted(self._sorted_times, max_minutes, side="right")
+        return np.sort(self._time_order[:cut])
+
+    def filter(self, course=None, diet=None, cuisine=None, max_time=None):
+        # Returns sorted row ids matching every given filter (None = no constraint).
+        candidates = [self.lookup(field, query) for field, query in
+                      (("course", course), ("diet", diet), ("cuisine", cuisine)) if query]
+        if max_time:
+            candidates.append(self.within_time(float(max_time)))
+        candidates = [ids for ids in candidates if ids is not None]
+        if not candidates:
+            return np.arange(self.size, dtype=np.int32)
+
+        candidates.sort(key=len)
+        result = candidates[0]
+        for ids in candidates[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+
+# ---------- Lazy Shared Index ----------
+
+_index = None
+_index_source = None
+_index_lock = threading.Lock()
+
+def get_recipe_index():
+    global _index, _index_source
+    df = get_food_df()
+    with _index_lock:
+        if _index is None or _index_source is not df:
+            _index = RecipeIndex(df)
+            _index_source = df
+    return _index
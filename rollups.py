@@ -0,0 +1,237 @@
+# rollups.py
+#
+# Materialized per-user aggregates kept next to the raw events in data/events.db.
+# They are updated inside the same transaction as each append, so charts and
+# summaries never have to rescan the full history.
+
+from datetime import date, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gym_daily (
+    user_id TEXT NOT NULL, day TEXT NOT NULL, minutes REAL NOT NULL, sessions INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+CREATE TABLE IF NOT EXISTS gym_weekly (
+    user_id TEXT NOT NULL, week TEXT NOT NULL, minutes REAL NOT NULL, sessions INTEGER NOT NULL,
+    PRIMARY KEY (user_id, week)
+);
+CREATE TABLE IF NOT EXISTS gym_streaks (
+    user_id TEXT PRIMARY KEY, last_day TEXT NOT NULL, current INTEGER NOT NULL, best INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meal_categories (
+    user_id TEXT NOT NULL, category TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, category)
+);
+"""
+
+ROLLUP_TABLES = ["gym_daily", "gym_weekly", "gym_streaks", "meal_categories"]
+
+MEAL_CATEGORIES = ["Breakfast", "Lunch", "Dinner", "Snack/Other"]
+MEAL_KEYWORDS = [
+    ("Breakfast", ["breakfast", "morning"]),
+    ("Lunch", ["lunch", "afternoon"]),
+    ("Dinner", ["dinner", "night", "evening"]),
+]
+
+
+def classify_meal(note):
+    text = note.lower()
+    for category, words in MEAL_KEYWORDS:
+        if any(word in text for word in words):
+            return category
+    return "Snack/Other"
+
+
+def iso_week(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+# ---------- Incremental Updates ----------
+
+def apply_gym(conn, user_id, day, minutes, sessions=1, streak=True):
+    conn.execute(
+        "INSERT INTO gym_daily (user_id, day, minutes, sessions) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (user_id, day) DO UPDATE SET "
+        "minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions",
+        (user_id, day.isoformat(), minutes, sessions),
+    )
+    conn.execute(
+        "INSERT INTO gym_weekly (user_id, week, minutes, sessions) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (user_id, week) DO UPDATE SET "
+        "minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions",
+        (user_id, iso_week(day), minutes, sessions),
+    )
+    if streak:
+        _advance_streak(conn, user_id, day)
+
+
+def _advance_streak(conn, user_id, day):
+    row = conn.execute(
+        "SELECT last_day, current, best FROM gym_streaks WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        current = best = 1
+    else:
+        last_day, current, best = date.fromisoformat(row[0]), row[1], row[2]
+        if day == last_day:
+            return
+        if day < last_day:
+            # Backfilled history can join or split earlier runs; rebuild from the daily table.
+            recompute_streak(conn, user_id)
+            return
+        current = current + 1 if day == last_day + timedelta(days=1) else 1
+        best = max(best, current)
+    conn.execute(
+        "INSERT OR REPLACE INTO gym_streaks (user_id, last_day, current, best) VALUES (?, ?, ?, ?)",
+        (user_id, day.isoformat(), current, best),
+    )
+
+
+def _streak_last_day(conn, user_id):
+    row = conn.execute("SELECT last_day FROM gym_streaks WHERE user_id = ?", (user_id,)).fetchone()
+    return date.fromisoformat(row[0]) if row else None
+
+
+def _streak_of(days):
+    # (last_day, current run, best run) for sorted distinct days.
+    current = best = 1
+    for prev, day in zip(days, days[1:]):
+        current = current + 1 if day == prev + timedelta(days=1) else 1
+        best = max(best, current)
+    return days[-1].isoformat(), current, best
+
+
+def _gym_days(conn, user_id):
+    return [date.fromisoformat(d) for (d,) in conn.execute(
+        "SELECT day FROM gym_daily WHERE user_id = ? ORDER BY day", (user_id,)
+    )]
+
+
+def recompute_streak(conn, user_id):
+    days = _gym_days(conn, user_id)
+    if not days:
+        conn.execute("DELETE FROM gym_streaks WHERE user_id = ?", (user_id,))
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO gym_streaks (user_id, last_day, current, best) VALUES (?, ?, ?, ?)",
+        (user_id, *_streak_of(days)),
+    )
+
+
+def apply_meals(conn, user_id, category, count=1):
+    conn.execute(
+        "INSERT INTO meal_categories (user_id, category, count) VALUES (?, ?, ?) "
+        "ON CONFLICT (user_id, category) DO UPDATE SET count = count + excluded.count",
+        (user_id, category, count),
+    )
+
+
+def apply_events(conn, table, rows):
+    # rows: (user_id, day, fields) for one batch. Totals are folded per user/day
+    # (and per category) first, so a bulk append costs one upsert per group.
+    if table == "gym_sessions":
+        totals = {}
+        for user_id, day, fields in rows:
+            total = totals.setdefault((user_id, day), [0.0, 0])
+            total[0] += fields.get("duration") or 0
+            total[1] += 1
+        # A batch reaching behind a user's streak (a history import) rebuilds the
+        # streak once at the end instead of once per backfilled day.
+        last_days = {user_id: _streak_last_day(conn, user_id) for user_id in {user_id for user_id, _ in totals}}
+        backfill = {user_id for user_id, day in totals if last_days[user_id] and day < last_days[user_id]}
+        for (user_id, day), (minutes, sessions) in sorted(totals.items()):
+            apply_gym(conn, user_id, day, minutes, sessions, streak=user_id not in backfill)
+        for user_id in backfill:
+            recompute_streak(conn, user_id)
+    elif table == "food_log":
+        counts = {}
+        for user_id, _, fields in rows:
+            key = (user_id, classify_meal(fields.get("note") or ""))
+            counts[key] = counts.get(key, 0) + 1
+        for (user_id, category), count in counts.items():
+            apply_meals(conn, user_id, category, count)
+
+
+def clear(conn, user_id):
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+
+
+# ---------- Reads ----------
+
+def gym_daily(conn, user_id, since=None):
+    sql = "SELECT day, minutes, sessions FROM gym_daily WHERE user_id = ?"
+    params = [user_id]
+    if since is not None:
+        sql += " AND day >= ?"
+        params.append(since.isoformat())
+    return conn.execute(sql + " ORDER BY day", params).fetchall()
+
+
+def gym_weekly(conn, user_id):
+    return conn.execute(
+        "SELECT week, minutes, sessions FROM gym_weekly WHERE user_id = ? ORDER BY week", (user_id,)
+    ).fetchall()
+
+
+def meal_counts(conn, user_id):
+    counts = dict(conn.execute(
+        "SELECT category, count FROM meal_categories WHERE user_id = ?", (user_id,)
+    ).fetchall())
+    return {category: counts.get(category, 0) for category in MEAL_CATEGORIES}
+
+
+def streak(conn, user_id, today=None):
+    row = conn.execute(
+        "SELECT last_day, current, best FROM gym_streaks WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        return {"current": 0, "best": 0, "last_day": None}
+    today = today or date.today()
+    last_day = date.fromisoformat(row[0])
+    # A run is still alive until a full day passes without a session.
+    current = row[1] if last_day >= today - timedelta(days=1) else 0
+    return {"current": current, "best": row[2], "last_day": row[0]}
+
+
+# ---------- Full Recompute (consistency check) ----------
+
+def recompute(conn, user_id):
+    # Rebuilds every rollup for one user from the raw event tables.
+    daily, weekly, meals = {}, {}, {category: 0 for category in MEAL_CATEGORIES}
+    for ts, minutes in conn.execute(
+        "SELECT ts, duration FROM gym_sessions WHERE user_id = ? ORDER BY ts", (user_id,)
+    ):
+        day = date(1970, 1, 1) + timedelta(days=ts // 86400)
+        for bucket, key in ((daily, day.isoformat()), (weekly, iso_week(day))):
+            total = bucket.setdefault(key, [0.0, 0])
+            total[0] += minutes
+            total[1] += 1
+    for (note,) in conn.execute("SELECT note FROM food_log WHERE user_id = ?", (user_id,)):
+        meals[classify_meal(note or "")] += 1
+    return {
+        "gym_daily": [(k, v[0], v[1]) for k, v in sorted(daily.items())],
+        "gym_weekly": [(k, v[0], v[1]) for k, v in sorted(weekly.items())],
+        "meal_counts": meals,
+    }
+
+
+def verify(conn, user_id):
+    # Returns the rollups that disagree with a full recompute (empty dict = consistent).
+    expected = recompute(conn, user_id)
+    actual = {
+        "gym_daily": [tuple(r) for r in gym_daily(conn, user_id)],
+        "gym_weekly": [tuple(r) for r in gym_weekly(conn, user_id)],
+        "meal_counts": meal_counts(conn, user_id),
+    }
+    mismatches = {k: (actual[k], expected[k]) for k in expected if actual[k] != expected[k]}
+
+    stored = conn.execute(
+        "SELECT last_day, current, best FROM gym_streaks WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    days = sorted({date.fromisoformat(day) for day, _, _ in expected["gym_daily"]})
+    rebuilt = _streak_of(days) if days else None
+    if stored != rebuilt:
+        mismatches["gym_streaks"] = (stored, rebuilt)
+    return mismatches
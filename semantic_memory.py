@@ -0,0 +1,394 @@
+# semantic_memory.py
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import suppress
+
+import numpy as np
+from filelock import FileLock, Timeout
+
+from embedding_service import EMBEDDING_MODEL, get_embedding_service
+from vector_index import HNSW_THRESHOLD, VectorLog, VectorPartition, partition_key
+
+# Appends go to a write-ahead log; full partition snapshots happen in the
+# background once this many records are pending or this many seconds pass.
+SNAPSHOT_EVERY = 1000
+SNAPSHOT_INTERVAL = 60.0
+
+class SemanticMemory:
+    # One vector partition per user: searches only rank that user's entries, so
+    # other tenants can never crowd them out of the top_k.
+    def __init__(self, index_path="data/faiss.index", model_name=EMBEDDING_MODEL,
+                 hnsw_threshold=HNSW_THRESHOLD, batch_size=64,
+                 snapshot_every=SNAPSHOT_EVERY, snapshot_interval=SNAPSHOT_INTERVAL, background=True,
+                 embedder=None):
+        # The model itself is shared process-wide and only loads on the first encode.
+        self.embedder = embedder or get_embedding_service(model_name)
+        self.index_path = index_path
+        self.index_dir = index_path + ".d"
+        self.dimension = self.embedder.dimension
+        self.hnsw_threshold = hnsw_threshold
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.partitions = {}  # user_id -> VectorPartition
+        self._dirty = set()
+        self._seq = 0         # last WAL sequence number handed out
+        self._pending = 0     # WAL records not yet covered by a snapshot
+        self._kept_gen = None  # WAL segment closed by the previous snapshot round
+        self._unpaired = set()  # written last round, so their .prev still lags (see save_index)
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        # One writer process per index directory: a second process (another app
+        # worker, a CLI) loads the same data but logs its own additions to a
+        # pending WAL of its own instead of interleaving records into the owner's.
+        # The owner merges a pending log into its WAL once that process exits.
+        self._owner = FileLock(os.path.join(self.index_dir, "writer.lock"))
+        try:
+            self._owner.acquire(timeout=0)
+            self.read_only = False
+        except Timeout:
+            self.read_only = True
+            print(f"⚠️ {self.index_dir} is owned by another process; new semantic entries go to a pending log")
+        self.pending_dir = os.path.join(self.index_dir, "pending")
+        self._side = None  # this process's pending log, when it isn't the owner
+        # user_id -> time of their last clear_user(); shared by every process
+        # through clears.json. Entries and snapshots from before it are ignored.
+        self.clears_path = os.path.join(self.index_dir, "clears.json")
+        self._clears = self._read_clears()
+
+        if os.path.exists(os.path.join(self.index_dir, "partitions.json")):
+            self.load_index()
+        self.wal = VectorLog(self.index_dir, self.dimension, read_only=self.read_only)
+        self._replay_wal()
+        if self.read_only:
+            self._replay_pending()
+            self._open_pending_log()
+        else:
+            self._merge_pending()
+        if os.path.exists(index_path) and not self.read_only:
+            self._migrate_flat_index()
+
+        self._snapshotter = None
+        if background and not self.read_only:
+            self._snapshotter = threading.Thread(target=self._snapshot_loop, name="semantic-snapshot", daemon=True)
+            self._snapshotter.start()
+
+    def _partition(self, user_id):
+        if user_id not in self.partitions:
+            self.partitions[user_id] = VectorPartition(self.dimension, self.hnsw_threshold)
+        return self.partitions[user_id]
+
+    def _partition_path(self, user_id):
+        return os.path.join(self.index_dir, partition_key(user_id) + ".index")
+
+    def _migrate_flat_index(self):
+        # Split the old single IndexFlatL2 + [(user_id, text)] metadata into partitions.
+        import faiss
+        legacy = faiss.read_index(self.index_path)
+        with open(self.index_path + ".meta", "r") as f:
+            metadata = json.load(f)
+        vectors = legacy.reconstruct_n(0, legacy.ntotal) if legacy.ntotal else np.empty((0, self.dimension))
+        by_user = {}
+        for row, (uid, text) in enumerate(metadata[:len(vectors)]):
+            by_user.setdefault(uid, []).append(row)
+        with self._lock:
+            for uid, rows in by_user.items():
+                self._partition(uid).add(vectors[rows], [metadata[r][1] for r in rows])
+                self._dirty.add(uid)
+        self.save_index()
+        os.replace(self.index_path, self.index_path + ".migrated")
+        os.replace(self.index_path + ".meta", self.index_path + ".meta.migrated")
+
+    # ----- persistence: snapshot + write-ahead log -----
+
+    def load_index(self):
+        with open(os.path.join(self.index_dir, "partitions.json"), "r") as f:
+            listing = json.load(f)
+        if isinstance(listing, list):  # before unpaired partitions were recorded
+            listing = {"users": listing, "unpaired": []}
+        self._unpaired = set(listing["unpaired"])
+        for uid in listing["users"]:
+            path = self._partition_path(uid)
+            if not (os.path.exists(path) or os.path.exists(path + ".prev")):
+                continue  # never snapshotted; its entries are still in the WAL
+            partition = VectorPartition.load_latest(path, self.dimension, self.hnsw_threshold)
+            self._seq = max(self._seq, partition.seq)
+            if self._cleared(uid, partition.taken_at):
+                self._remove_snapshots(uid)
+                continue
+            self.partitions[uid] = partition
+
+    def _replay_wal(self):
+        # Re-apply logged entries newer than each partition's snapshot.
+        replayed = 0
+        for seq, uid, text, vector, ts in self.wal.replay():
+            self._seq = max(self._seq, seq)
+            if self._cleared(uid, ts):
+                continue
+            partition = self._partition(uid)
+            if seq <= partition.seq:
+                continue
+            partition.add(vector[None, :], [text], seq)
+            self._dirty.add(uid)
+            replayed += 1
+        self._pending = replayed
+        if replayed:
+            print(f"🔁 Replayed {replayed} semantic memory entries from the WAL")
+
+    # ----- pending logs of non-owner processes -----
+
+    def _pending_logs(self):
+        # (name, directory) of every pending log; each has a <directory>.lock held by its writer.
+        if not os.path.isdir(self.pending_dir):
+            return []
+        return [(name, os.path.join(self.pending_dir, name)) for name in sorted(os.listdir(self.pending_dir))
+                if os.path.isdir(os.path.join(self.pending_dir, name))]
+
+    def _open_pending_log(self):
+        # The lock is taken before the directory exists, so the owner never
+        # mistakes a log that is just being created for a finished one.
+        name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.pending_dir, name)
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self._side_lock = FileLock(path + ".lock")
+        self._side_lock.acquire()
+        self._side = VectorLog(path, self.dimension)
+
+    def _replay_pending(self):
+        # A non-owner also sees entries other non-owners logged but the owner hasn't merged yet.
+        for name, path in self._pending_logs():
+            if name in self.wal.sources:
+                continue  # merged, its directory just not removed yet
+            try:
+                for _, uid, text, vector, ts in VectorLog(path, self.dimension, read_only=True).replay():
+                    if not self._cleared(uid, ts):
+                        self._partition(uid).add(vector[None, :], [text])
+            except OSError:
+                continue  # merged and removed while we read it
+
+    def _merge_pending(self):
+        # Owner only: copy each finished pending log into our WAL, then delete it.
+        # Copied records carry the log's name, so a crash before the delete
+        # doesn't merge it twice on the next start.
+        for name, path in self._pending_logs():
+            lock = FileLock(path + ".lock")
+            try:
+                lock.acquire(timeout=0)
+            except Timeout:
+                continue  # its process is still running
+            try:
+                if name not in self.wal.sources:
+                    records = [record for record in VectorLog(path, self.dimension, read_only=True).replay()
+                               if not self._cleared(record[1], record[4])]
+                    if records:
+                        self._log_and_add([(uid, text) for _, uid, text, _, _ in records],
+                                          np.stack([vector for _, _, _, vector, _ in records]),
+                                          source=name, stamps=[ts for *_, ts in records])
+                        print(f"📥 Merged {len(records)} semantic memory entries from {path}")
+                shutil.rmtree(path)
+            finally:
+                lock.release()
+            os.remove(path + ".lock")
+
+    def save_index(self):
+        # Snapshot dirty partitions, then drop WAL segments up to the previous
+        # round: those stay one round longer so a partition whose newest snapshot
+        # is unreadable can still load its .prev and replay forward from there.
+        # That only holds if every partition's .prev covers its records in those
+        # segments, so a partition written last round is written once more even
+        # when it's clean; the set survives restarts in partitions.json.
+        # Only the in-memory copy is taken under the lock; writers keep going
+        # (into a fresh WAL segment) while the files are written.
+        if self.read_only:
+            return
+        with self._snapshot_lock:
+            with self._lock:
+                taken_at = time.time()  # before the clears are read, so a later clear still wins
+                self._apply_clears()
+                written = {uid for uid in self._dirty | self._unpaired if uid in self.partitions}
+                snapshots = {uid: self.partitions[uid].snapshot(taken_at) for uid in written}
+                unpaired = set(self._dirty)
+                user_ids = list(self.partitions)
+                self._dirty.clear()
+                self._pending = 0
+                covered = self.wal.rotate()
+            try:
+                for uid, snapshot in snapshots.items():
+                    VectorPartition.write_snapshot(self._partition_path(uid), snapshot)
+                tmp = os.path.join(self.index_dir, "partitions.json.tmp")
+                with open(tmp, "w") as f:
+                    json.dump({"users": user_ids, "unpaired": sorted(unpaired)}, f)
+                os.replace(tmp, os.path.join(self.index_dir, "partitions.json"))
+            except Exception:
+                with self._lock:
+                    self._dirty.update(unpaired)  # keep the WAL; retry next round
+                raise
+            self._unpaired = unpaired
+            if self._kept_gen is not None:
+                self.wal.drop_through(self._kept_gen)
+            self._kept_gen = covered
+
+    def _snapshot_loop(self):
+        while True:
+            with self._lock:
+                self._wake.wait_for(lambda: self._closed or self._pending >= self.snapshot_every,
+                                    timeout=self.snapshot_interval)
+                if self._closed:
+                    return
+            try:
+                with self._lock:
+                    self._apply_clears()
+                self._merge_pending()
+                if self._dirty:
+                    self.save_index()
+            except Exception as e:
+                print(f"⚠️ Semantic memory snapshot failed: {e}")
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        if self.read_only:
+            self.wal.close()
+            self._side.close()
+            self._side_lock.release()  # the owner may merge it from now on
+            return
+        with self._lock:
+            self._apply_clears()
+        self._merge_pending()
+        if self._dirty:
+            self.save_index()
+        self.wal.close()
+        self._owner.release()
+
+    # ----- reads / writes -----
+
+    def encode(self, texts):
+        return self.embedder.encode(texts)
+
+    def add_entries(self, entries):
+        # entries: iterable of (user_id, text); encoded in batches of self.batch_size.
+        # Each chunk is durable once its WAL append is fsynced.
+        entries = list(entries)
+        for start in range(0, len(entries), self.batch_size * 16):
+            chunk = entries[start:start + self.batch_size * 16]
+            embeddings = self.encode([text for _, text in chunk])
+            self._log_and_add(chunk, embeddings)
+            if self._snapshotter is None and self._pending >= self.snapshot_every:
+                self.save_index()
+        return len(entries)
+
+    def _log_and_add(self, chunk, embeddings, source=None, stamps=None):
+        # chunk: [(user_id, text)] with one embedding row each; durable once the append is fsynced.
+        # stamps: when each entry was first written (merged entries keep theirs).
+        stamps = stamps or [time.time()] * len(chunk)
+        with self._lock:
+            first = self._seq + 1
+            self._seq += len(chunk)
+            (self._side if self.read_only else self.wal).append([
+                (first + row, uid, text, embeddings[row], stamps[row]) for row, (uid, text) in enumerate(chunk)
+            ], source)
+            by_user = {}
+            for row, (uid, _) in enumerate(chunk):
+                by_user.setdefault(uid, []).append(row)
+            for uid, rows in by_user.items():
+                self._partition(uid).add(embeddings[rows], [chunk[r][1] for r in rows], first + rows[-1])
+                self._dirty.add(uid)
+            self._pending += len(chunk)
+            if self._pending >= self.snapshot_every:
+                self._wake.notify()
+
+    def add_entry(self, user_id, text):
+        self.add_entries([(user_id, text)])
+
+    # ----- clearing a user -----
+
+    def _read_clears(self):
+        try:
+            with open(self.clears_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _cleared(self, user_id, ts):
+        # True for an entry or snapshot written before the user's last clear.
+        return user_id in self._clears and ts <= self._clears[user_id]
+
+    def _remove_snapshots(self, user_id):
+        if self.read_only:
+            return
+        path = self._partition_path(user_id)
+        for name in (path, path + ".prev"):
+            with suppress(FileNotFoundError):
+                os.remove(name)
+
+    def _drop(self, user_id):
+        self.partitions.pop(user_id, None)
+        self._dirty.discard(user_id)
+        self._remove_snapshots(user_id)
+
+    def _apply_clears(self):
+        # Owner only: picks up clears made by other processes since the last look.
+        for uid, cleared_at in self._read_clears().items():
+            if cleared_at > self._clears.get(uid, -1):
+                self._clears[uid] = cleared_at
+                self._drop(uid)
+
+    def clear_user(self, user_id):
+        # Forgets every entry of user_id, in this and (through clears.json) every
+        # other process: its partition and snapshots go now, and WAL / pending-log
+        # records written before this moment are skipped on every replay and merge.
+        with FileLock(self.clears_path + ".lock"):
+            clears = self._read_clears()
+            clears[user_id] = time.time()
+            tmp = self.clears_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(clears, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.clears_path)
+        with self._lock:
+            self._clears[user_id] = clears[user_id]
+            self._drop(user_id)
+
+    def count(self, user_id):
+        with self._lock:
+            partition = self.partitions.get(user_id)
+            return len(partition.texts) if partition else 0
+
+    def search(self, query, user_id=None, top_k=5):
+        if user_id is not None and user_id not in self.partitions:
+            return []
+        embedding = self.encode([query])
+        with self._lock:
+            targets = [self.partitions[user_id]] if user_id is not None else list(self.partitions.values())
+            hits = []
+            for partition in targets:
+                D, I = partition.search(embedding, top_k)
+                hits.extend((dist, partition.texts[i]) for dist, i in zip(D[0], I[0]) if i >= 0)
+        hits.sort(key=lambda hit: hit[0])
+        return [text for _, text in hits[:top_k]]
+
+
+# ---------- Shared Instance ----------
+
+_semantic_memory = None
+_semantic_memory_lock = threading.Lock()
+
+def get_semantic_memory():
+    global _semantic_memory
+    with _semantic_memory_lock:
+        if _semantic_memory is None:
+            _semantic_memory = SemanticMemory()
+    return _semantic_memory
@@ -0,0 +1,66 @@
+# sharding.py
+#
+# Per-user sharding of the SQLite stores. A user always maps to the same shard
+# (crc32 of the id), so all of a user's rows live in one file and writers for
+# different users rarely wait on the same SQLite write lock. HABIT_SHARDS=1 (the
+# default) keeps the single-file layout: data/messages.db, data/events.db, ...
+#
+# The shard count is part of the on-disk layout; changing it remaps users, so
+# pick it once per deployment.
+
+import os
+import threading
+import zlib
+
+SHARD_COUNT = max(1, int(os.getenv("HABIT_SHARDS", "1")))
+
+
+def shard_of(user_id, shards=SHARD_COUNT):
+    return zlib.crc32(str(user_id).encode("utf-8")) % shards
+
+
+def shard_path(path, shard, shards=SHARD_COUNT):
+    # data/messages.db -> data/messages.db (one shard) or data/shards/messages-03.db
+    if shards <= 1:
+        return path
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, "shards", f"{stem}-{shard:02d}{ext}")
+
+
+class ShardedStores:
+    # Lazily opens one store per shard. on_first_open(stores) runs once, before the
+    # first store is handed out (e.g. a legacy import routed through append_many).
+    def __init__(self, factory, path, shards=SHARD_COUNT, on_first_open=None):
+        self.factory = factory
+        self.path = path
+        self.shards = shards
+        self._stores = {}
+        self._first_open = on_first_open
+        self._lock = threading.RLock()
+
+    def shard(self, n):
+        with self._lock:
+            store = self._stores.get(n)
+            if store is None:
+                store = self._stores[n] = self.factory(shard_path(self.path, n, self.shards))
+                if self._first_open is not None:
+                    first_open, self._first_open = self._first_open, None
+                    first_open(self)
+        return store
+
+    def for_user(self, user_id):
+        return self.shard(shard_of(user_id, self.shards))
+
+    def all(self):
+        return [self.shard(n) for n in range(self.shards)]
+
+    def append_many(self, user_id, rows):
+        # Lets the one-shot migrations write through the shards like a single store.
+        return self.for_user(user_id).append_many(user_id, rows)
+
+    def close(self):
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
@@ -0,0 +1,181 @@
+# text_parsing.py
+#
+# One parser for the dates, durations and calories in chat messages ("did 1 hr 20
+# min at the gym yesterday", "burned 450 kcal on 12th march"). Precompiled
+# patterns and a small grammar cover the phrasings people actually type; only a
+# message that carries a date-like word the grammar can't read goes to
+# dateparser, which is ~100x slower and imported on first use.
+#
+# Dates resolve to the past: logs describe things that already happened, so
+# "monday" is the latest Monday and "12 dec" in March is last December.
+# Numeric dates are day-first (14/02 is 14 February).
+
+import re
+from datetime import datetime, timedelta
+
+from tracing import count
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40, "forty-five": 45, "sixty": 60, "ninety": 90,
+}
+UNIT_DAYS = {"day": 1, "week": 7, "fortnight": 14}
+
+_WORD_NUM = "|".join(sorted(map(re.escape, NUMBER_WORDS), key=len, reverse=True))
+_NUM = r"\d+(?:\.\d+)?|" + _WORD_NUM
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?")
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_WEEKDAY = (r"(mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?"
+            r"|sat(?:urday)?|sun(?:day)?)\b")
+
+# ---------- Patterns ----------
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+# 14/02, 14/02/25, 14.02.2025 ("1.5" is a number, so dots need the year).
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})(?:/(\d{1,2})(?:/(\d{4}|\d{2}))?|\.(\d{1,2})\.(\d{4}|\d{2}))\b")
+_DAY_MONTH = re.compile(rf"\b{_DAY}(?:\s+of)?\s+{_MONTH}(?:,?\s+(\d{{4}}))?\b")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+{_DAY}\b(?:,?\s+(\d{{4}}))?")
+_DAY_BEFORE_YESTERDAY = re.compile(r"\bday before yesterday\b")
+_YESTERDAY = re.compile(r"\byesterday\b")
+_TODAY = re.compile(r"\b(?:today|tonight|last night|this (?:morning|afternoon|evening))\b")
+_AGO = re.compile(rf"\b({_NUM})\s+(day|week|fortnight)s?\s+ago\b")
+_LAST_UNIT = re.compile(r"\b(?:last|past|previous)\s+(week|fortnight)\b")
+# An abbreviation ("sat", "sun") counts only after "on" / "last"; "monday" counts anywhere.
+_WEEKDAY_REF = re.compile(rf"\b(?:(last|past|previous|on)\s+)?{_WEEKDAY}")
+
+# Words that suggest a date the grammar didn't catch; without one we don't pay for dateparser.
+_DATE_HINT = re.compile(
+    r"\b(?:january|february|march|april|june|july|august|september|october|november|december"
+    r"|(?:mon|tues|wednes|thurs|fri|satur|sun)day|ago|last|previous)\b|\d[/-]\d|\d\.\d+\.\d"
+)
+
+# A bare "h" / "m" counts only written onto the number ("45m", "1h30m"): "400 m" is a distance.
+_DURATION_PART = re.compile(
+    rf"(?:(?<![\w.])(\d+(?:\.\d+)?)|(?<=\d[hm])(\d+)|\b({_WORD_NUM})(?=\s))"
+    rf"(?:\s*(hours?|hrs?|minutes?|mins?)|(?<=\d)(h|m))(?![a-z])"
+)
+_HALF_HOUR = re.compile(r"\bhalf(?: an)? hour\b")
+_AND_A_HALF = re.compile(r"\b(an?|one|\d+)\s+(?:hours?|hrs?)\s+and\s+a\s+half\b")
+_CALORIES = re.compile(r"\b(\d+(?:\.\d+)?)\s*(k(?!cal))?\s*(?:kcals?|calories|calorie|cals?)\b")
+
+
+def _number(token):
+    return NUMBER_WORDS[token] if token in NUMBER_WORDS else float(token)
+
+
+def _past_date(year, month, day, today):
+    # The date in `year` (or the latest past one when no year was given); None if invalid.
+    try:
+        date = datetime(year or today.year, month, day).date()
+    except ValueError:
+        return None
+    if year is None and date > today + timedelta(days=1):
+        date = date.replace(year=date.year - 1)
+    return date
+
+
+# ---------- Dates ----------
+
+def _fast_date(text, today):
+    # The grammar: returns a date, or None when the text has no phrase it can read.
+    if _DAY_BEFORE_YESTERDAY.search(text):
+        return today - timedelta(days=2)
+    if _YESTERDAY.search(text):
+        return today - timedelta(days=1)
+    if _TODAY.search(text):
+        return today
+
+    match = _AGO.search(text)
+    if match:
+        return today - timedelta(days=int(_number(match.group(1)) * UNIT_DAYS[match.group(2)]))
+    match = _LAST_UNIT.search(text)
+    if match:
+        return today - timedelta(days=UNIT_DAYS[match.group(1)])
+
+    match = _ISO_DATE.search(text)
+    if match:
+        year, month, day = map(int, match.groups())
+        return _past_date(year, month, day, today) if 1 <= month <= 12 else None
+    for pattern, day_group, month_group, year_group in (
+        (_DAY_MONTH, 1, 2, 3), (_MONTH_DAY, 2, 1, 3),
+    ):
+        match = pattern.search(text)
+        if match:
+            year = match.group(year_group)
+            return _past_date(int(year) if year else None, MONTHS[match.group(month_group)[:3]],
+                              int(match.group(day_group)), today)
+    match = _NUMERIC_DATE.search(text)
+    if match:
+        day, slash_month, slash_year, dot_month, dot_year = match.groups()
+        month, year = slash_month or dot_month, slash_year or dot_year
+        if year and len(year) == 2:
+            year = "20" + year
+        return _past_date(int(year) if year else None, int(month), int(day), today)
+
+    for match in _WEEKDAY_REF.finditer(text):
+        qualifier, name = match.groups()
+        if not (qualifier or name.endswith("day")):
+            continue
+        back = (today.weekday() - WEEKDAYS[name[:3]]) % 7
+        if qualifier and qualifier != "on" and back == 0:
+            back = 7
+        return today - timedelta(days=back)
+    return None
+
+
+def _dateparser_date(text, now):
+    # Slow path: dateparser's sentence search, with durations blanked out first
+    # (it would otherwise read "45 min" as a time of day).
+    from dateparser.search import search_dates
+
+    text = _DURATION_PART.sub(" ", _HALF_HOUR.sub(" ", text))
+    found = search_dates(text, settings={"RELATIVE_BASE": now, "PREFER_DATES_FROM": "past"})
+    return found[0][1].date() if found else None
+
+
+def parse_date(text, now=None, fallback=True):
+    # Calendar date the message refers to; today when it names none.
+    now = now or datetime.now()
+    text = text.lower()
+    date = _fast_date(text, now.date())
+    if date is None and fallback and _DATE_HINT.search(text):
+        count("date_parse_fallbacks")
+        date = _dateparser_date(text, now)
+    return date or now.date()
+
+
+def parse_datetime(text, now=None, fallback=True):
+    # parse_date at the current time of day (what the gym logs store).
+    now = now or datetime.now()
+    return datetime.combine(parse_date(text, now, fallback), now.time())
+
+
+# ---------- Durations and Calories ----------
+
+def parse_duration(text):
+    # Total minutes in "1 hr 20 min", "1h30m", "90 mins", "half an hour", "2.5 hours"; None if absent.
+    text = text.lower()
+    minutes = sum(_number(count) * 60 + 30 for count in _AND_A_HALF.findall(text))
+    text, spans = _AND_A_HALF.subn(" ", text)
+    text, halves = _HALF_HOUR.subn(" ", text)
+    minutes, found = minutes + 30.0 * halves, bool(spans or halves)
+    for digits, compact, word, unit, bare in _DURATION_PART.findall(text):
+        found = True
+        minutes += _number(digits or compact or word) * (60 if (unit or bare).startswith("h") else 1)
+    return int(round(minutes)) if found else None
+
+
+def parse_calories(text):
+    # "450 kcal", "1.2k calories", "300 cals" -> int; None if absent.
+    match = _CALORIES.search(text.lower())
+    if not match:
+        return None
+    value = float(match.group(1)) * (1000 if match.group(2) else 1)
+    return int(round(value))
@@ -0,0 +1,124 @@
+# timers.py
+#
+# Countdown timers that run off the UI thread. One worker sleeps until the
+# earliest deadline in a heap, so any number of timers costs a single thread;
+# the UI just asks for remaining time when it redraws.
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Timer:
+    __slots__ = ("id", "user_id", "name", "seconds", "started_at", "deadline", "state")
+
+    def __init__(self, timer_id, user_id, name, seconds):
+        self.id = timer_id
+        self.user_id = user_id
+        self.name = name
+        self.seconds = seconds
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + seconds
+        self.state = "running"   # running -> finished | cancelled
+
+    @property
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic()) if self.state == "running" else 0.0
+
+    def as_dict(self):
+        return {"id": self.id, "name": self.name, "seconds": self.seconds,
+                "remaining": self.remaining, "state": self.state}
+
+
+class TimerService:
+    def __init__(self):
+        self._heap = []                 # (deadline, timer id); cancelled ids are skipped lazily
+        self._timers = {}               # timer id -> (Timer, on_finish); running only
+        self._finished = {}             # user_id -> [Timer] not yet collected by the UI
+        self._ids = itertools.count(1)
+        self._wake = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="timer-scheduler", daemon=True)
+        self._worker.start()
+
+    def start(self, user_id, name, seconds, on_finish=None):
+        with self._wake:
+            timer = Timer(next(self._ids), user_id, name, float(seconds))
+            self._timers[timer.id] = (timer, on_finish)
+            heapq.heappush(self._heap, (timer.deadline, timer.id))
+            # Only the new earliest deadline changes how long the worker should sleep.
+            if self._heap[0][1] == timer.id:
+                self._wake.notify()
+        return timer
+
+    def cancel(self, user_id, name=None, timer_id=None):
+        # Cancels the user's timers matching the name and/or id; returns how many.
+        cancelled = 0
+        with self._wake:
+            for timer, _ in list(self._timers.values()):
+                if timer.user_id != user_id:
+                    continue
+                if (name is not None and timer.name != name) or (timer_id is not None and timer.id != timer_id):
+                    continue
+                timer.state = "cancelled"
+                del self._timers[timer.id]
+                cancelled += 1
+        return cancelled
+
+    def active(self, user_id):
+        with self._wake:
+            timers = [timer for timer, _ in self._timers.values() if timer.user_id == user_id]
+        return sorted(timers, key=lambda timer: timer.deadline)
+
+    def has_active(self, user_id):
+        with self._wake:
+            return any(timer.user_id == user_id for timer, _ in self._timers.values())
+
+    def collect_finished(self, user_id):
+        # Finished timers the UI has not announced yet (each is returned once).
+        with self._wake:
+            return self._finished.pop(user_id, [])
+
+    def _run(self):
+        while True:
+            due = []
+            with self._wake:
+                while not due:
+                    now = time.monotonic()
+                    while self._heap and self._heap[0][0] <= now:
+                        _, timer_id = heapq.heappop(self._heap)
+                        entry = self._timers.pop(timer_id, None)
+                        if entry is not None:
+                            entry[0].state = "finished"
+                            self._finished.setdefault(entry[0].user_id, []).append(entry[0])
+                            due.append(entry)
+                    if due:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._wake.wait(timeout)
+            for timer, callback in due:
+                if callback is None:
+                    continue
+                try:
+                    callback(timer)
+                except Exception as e:
+                    print(f"⚠️ Timer callback for {timer.name!r} failed: {e}")
+
+
+# ---------- Shared Instance ----------
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_timer_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TimerService()
+    return _service
+
+
+def format_remaining(seconds):
+    mins, secs = divmod(int(round(seconds)), 60)
+    hours, mins = divmod(mins, 60)
+    return f"{hours:d}:{mins:02d}:{secs:02d}" if hours else f"{mins:02d}:{secs:02d}"
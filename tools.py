@@ -1,108 +1,134 @@
 from datetime import datetime
+import json
+import os
+import random
 import re
-import matplotlib.pyplot as plt
-from collections import Counter
-import pandas as pd
-import dateparser
-import requests
+
+from charts import food_pie_png, gym_chart_png
+from event_store import get_event_store
+from food_data import get_food_df
+from llm_cache import cache_key, get_llm_cache
+from llm_client import get_llm_client
+from nutrition import NUTRIENT_COLUMNS, get_nutrient_table
+from recipe_index import get_recipe_index
+from text_parsing import parse_datetime, parse_duration
+from tracing import count, span
 
 # 🧠 LLM utility (Groq-based)
-GROQ_API_KEY = "your_groq_api_key_here"
 GROQ_MODEL = "llama3-8b-8192"
 
-def query_llm(user_input, system_instruction):
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {"role": "system", "content": system_instruction},
-            {"role": "user", "content": user_input}
-        ],
-        "temperature": 0.3
-    }
+def _llm_messages(user_input, system_instruction):
+    return [
+        {"role": "system", "content": system_instruction},
+        {"role": "user", "content": user_input}
+    ]
+
+# Classification prompts are deterministic enough to answer repeats from cache.
+def query_llm(user_input, system_instruction, timeout=None, cache=False):
+    key = cache_key(GROQ_MODEL, system_instruction, user_input, 0.3) if cache else None
+    if key and (cached := get_llm_cache().get(key)) is not None:
+        count("llm_cache_hits")
+        return cached
+    if key:
+        count("llm_cache_misses")
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        return response.json()["choices"][0]["message"]["content"]
+        with span("llm.query", cached=bool(key)):
+            reply = get_llm_client().chat(
+                _llm_messages(user_input, system_instruction), GROQ_MODEL, temperature=0.3, timeout=timeout
+            )
     except Exception as e:
         print("❌ LLM API Error:", e)
         return ""
+    if key and reply:
+        get_llm_cache().set(key, reply)
+    return reply
 
-# 🧾 Storage
-gym_sessions = []
-food_log = []
+# 🧾 Storage: workouts and meals persist in data/events.db (see event_store.py)
 
-# 📥 Load Indian Food Dataset
-def load_food_data(path="IndianFoodDatasetXLS.xlsx"):
-    try:
-        df = pd.read_excel(path)
-        df = df[['TranslatedRecipeName', 'TranslatedIngredients', 'TotalTimeInMins', 'Servings', 'Cuisine', 'Course', 'Diet']]
-        df.dropna(subset=['TranslatedRecipeName', 'TranslatedIngredients'], inplace=True)
-        df['TranslatedIngredients'] = df['TranslatedIngredients'].apply(lambda x: x.lower())
-        return df
-    except Exception as e:
-        print(f"❌ Failed to load food data: {e}")
-        return pd.DataFrame()
+# 📥 Indian Food Dataset (loaded on first recipe query, see food_data.py)
+def __getattr__(name):
+    # Keeps `tools.food_df` working without parsing the dataset at import time.
+    if name == "food_df":
+        return get_food_df()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-food_df = load_food_data()
-
-# 🔥 Calorie Estimation
+# 🔥 Calorie Estimation (nutrient table in nutrients.csv, see nutrition.py)
 def estimate_calories(ingredients_text):
-    calorie_dict = {
-        "rice": 130, "potato": 110, "paneer": 265, "chicken": 239, "egg": 78,
-        "milk": 42, "ghee": 115, "oil": 120, "dal": 120, "bread": 80,
-        "cheese": 113, "curd": 60, "butter": 102, "flour": 100, "sugar": 60
-    }
-    calories = sum(cal for item, cal in calorie_dict.items() if item in ingredients_text)
-    return calories
+    return round(get_nutrient_table().estimate(ingredients_text)["calories"])
+
+def recipe_nutrition(recipe):
+    # Loaded recipes carry precomputed columns; fall back to estimating one row.
+    if "Calories" in recipe:
+        return {key: recipe[column] for key, column in NUTRIENT_COLUMNS.items()}
+    return get_nutrient_table().estimate(recipe['TranslatedIngredients'])
 
 # 🍽️ Recipe Suggestion
-def suggest_recipe(course="Lunch", diet="Vegetarian"):
+def suggest_recipe(course="Lunch", diet="Vegetarian", cuisine=None, max_time=None):
+    food_df = get_food_df()
     if food_df.empty:
         return "⚠️ Recipe data not available."
 
-    filtered = food_df[
-        (food_df['Course'].str.contains(course, case=False, na=False)) &
-        (food_df['Diet'].str.contains(diet, case=False, na=False))
-    ]
+    row_ids = get_recipe_index().filter(course=course, diet=diet, cuisine=cuisine, max_time=max_time)
 
-    if filtered.empty:
+    if not len(row_ids):
         return f"⚠️ No {diet} {course.lower()} recipes found."
 
-    recipe = filtered.sample(1).iloc[0]
-    calories = estimate_calories(recipe['TranslatedIngredients'])
+    recipe = food_df.iloc[int(random.choice(row_ids))]
+    nutrition = recipe_nutrition(recipe)
 
     return f"""
 🍽️ {recipe['TranslatedRecipeName']}
 🕒 Time: {recipe['TotalTimeInMins']} mins | 🍛 Course: {recipe['Course']} | 🥗 Diet: {recipe['Diet']}
-🔥 Estimated Calories: ~{calories} kcal
+🔥 Estimated Calories: ~{nutrition['calories']:.0f} kcal | 🥩 Protein: {nutrition['protein']:.0f} g | 🍚 Carbs: {nutrition['carbs']:.0f} g | 🧈 Fat: {nutrition['fat']:.0f} g
 📋 Ingredients: {recipe['TranslatedIngredients']}
 """
 
 # 🤖 Intent Detection using LLM
+def parse_json_reply(reply):
+    # LLMs wrap JSON in prose or code fences; take the outermost object.
+    match = re.search(r"\{.*\}", reply or "", re.DOTALL)
+    try:
+        return json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        return None
+
 def detect_gym_trigger(text):
-    reply = query_llm(text, "Does this message describe a gym or workout session? Reply with true or false.")
+    reply = query_llm(text, "Does this message describe a gym or workout session? Reply with true or false.", cache=True)
     return "true" in reply.lower()
 
 def detect_food_trigger(text):
-    reply = query_llm(text, "Is this message logging a food entry or something the user ate? Reply with true or false.")
+    reply = query_llm(text, "Is this message logging a food entry or something the user ate? Reply with true or false.", cache=True)
     return "true" in reply.lower()
 
 def detect_graph_command(text):
-    reply = query_llm(text, "Is the user asking to show a graph related to gym/workout? Reply with true or false.")
+    reply = query_llm(text, "Is the user asking to show a graph related to gym/workout? Reply with true or false.", cache=True)
     return "true" in reply.lower()
 
 def detect_pie_command(text):
-    reply = query_llm(text, "Is the user asking for a pie chart or graph related to food/nutrition? Reply with true or false.")
+    reply = query_llm(text, "Is the user asking for a pie chart or graph related to food/nutrition? Reply with true or false.", cache=True)
     return "true" in reply.lower()
 
 def detect_timer_command(text):
-    reply = query_llm(text, "Does the message ask to start or set a timer with a specific time? Reply with true or false.")
+    reply = query_llm(text, "Does the message ask to start or set a timer with a specific time? Reply with true or false.", cache=True)
     return "true" in reply.lower()
 
+def detect_intents(text):
+    instruction = """
+Classify the user's message. For each key answer true or false:
+- "gym": describes a gym or workout session
+- "food": logs a food entry or something the user ate
+- "graph": asks to show a graph related to gym/workout
+- "pie": asks for a pie chart or graph related to food/nutrition
+- "timer": asks to start or set a timer with a specific time
+- "recipe": asks for recipe suggestions or calorie info for an Indian dish
+
+Return only JSON like:
+{"gym": false, "food": true, "graph": false, "pie": false, "timer": false, "recipe": false}
+"""
+    reply = query_llm(text, instruction, cache=True)
+    parsed = parse_json_reply(reply) or {}
+    return {key: str(value).lower() == "true" for key, value in parsed.items()}
+
 # ⏱️ Timer Parsing
 def parse_timer_command(text):
     instruction = """
@@ -110,10 +136,10 @@ Extract the timer duration in seconds and task name from this message.
 Return JSON like: {"duration": 300, "task": "Reading"}
 If no task found, use "your task".
 """
-    reply = query_llm(text, instruction)
+    reply = query_llm(text, instruction, cache=True)
     try:
-        parsed = eval(reply) if isinstance(reply, str) else reply
-        return parsed["duration"], parsed["task"]
+        parsed = parse_json_reply(reply)
+        return int(parsed["duration"]), parsed["task"]
     except:
         return None
 
@@ -129,150 +155,119 @@ Return a JSON:
   "intent": "suggest_recipe" or "calorie_query",
   "course": "Lunch" or "Dinner" or "Breakfast",
   "diet": "Vegetarian" or "Non-Vegetarian",
+  "cuisine": "South Indian" or null,
+  "max_time": 30 or null,
   "recipe_name": "rajma chawal"
 }
+Use null for "cuisine" and "max_time" (minutes) unless the user asks for them.
 """
-    reply = query_llm(text, instruction)
+    reply = query_llm(text, instruction, cache=True)
     try:
-        parsed = eval(reply) if isinstance(reply, str) else reply
+        parsed = parse_json_reply(reply)
         if parsed["intent"] == "suggest_recipe":
-            return suggest_recipe(parsed.get("course", "Lunch"), parsed.get("diet", "Vegetarian"))
+            return suggest_recipe(
+                parsed.get("course") or "Lunch",
+                parsed.get("diet") or "Vegetarian",
+                cuisine=parsed.get("cuisine"),
+                max_time=parsed.get("max_time"),
+            )
         elif parsed["intent"] == "calorie_query":
-            recipe_name = parsed.get("recipe_name", "").strip().lower()
-            result = food_df[food_df['TranslatedRecipeName'].str.lower() == recipe_name]
-            if not result.empty:
-                recipe = result.iloc[0]
-                calories = estimate_calories(recipe['TranslatedIngredients'])
-                return f"🔥 Calories in {recipe['TranslatedRecipeName']}: ~{calories} kcal"
+            recipe_name = (parsed.get("recipe_name") or "").strip().lower()
+            food_df = get_food_df()
+            matches = get_recipe_index().search_names(recipe_name, k=3)
+            if matches:
+                recipe = food_df.iloc[matches[0][0]]
+                nutrition = recipe_nutrition(recipe)
+                reply = (
+                    f"🔥 Calories in {recipe['TranslatedRecipeName']}: ~{nutrition['calories']:.0f} kcal "
+                    f"(protein {nutrition['protein']:.0f} g, carbs {nutrition['carbs']:.0f} g, fat {nutrition['fat']:.0f} g)"
+                )
+                if matches[0][1] < 1.0 and len(matches) > 1:
+                    others = ", ".join(food_df.iloc[row_id]['TranslatedRecipeName'] for row_id, _ in matches[1:])
+                    reply += f"\n🔎 Best match for '{recipe_name}'. Similar: {others}"
+                return reply
             else:
                 return f"❌ Could not find recipe '{recipe_name}'."
     except:
         return "❓ Try asking: 'Suggest dinner for vegetarian' or 'Calories in Paneer Butter Masala'"
 
-# 📅 Helpers
-def extract_date_from_text(text):
-    parsed = dateparser.parse(text, settings={'RELATIVE_BASE': datetime.now()})
-    return parsed.date() if parsed else datetime.now().date()
-
-def extract_duration(text):
-    match = re.search(r'(\d+)\s*(min|minutes|mins|hrs|hours|hr)', text.lower())
-    if match:
-        value = int(match.group(1))
-        unit = match.group(2)
-        return value * 60 if 'hour' in unit or 'hr' in unit else value
-    return 0
-
 # ✅ Logging
 def log_gym_session(text, user_id="default"):
-    date = extract_date_from_text(text)
-    duration = extract_duration(text)
-    session = {
-        "user": user_id,
-        "timestamp": datetime.combine(date, datetime.now().time()).isoformat(),
-        "note": text,
-        "duration": duration
-    }
-    gym_sessions.append(session)
+    timestamp = parse_datetime(text)
+    date = timestamp.date()
+    duration = parse_duration(text) or 0
+    get_event_store(user_id).append("gym_sessions", user_id, timestamp, duration=duration, note=text)
     return f"💪 Logged your gym session: \"{text}\" ({duration} min) on {date}"
 
 def log_food_entry(text, user_id="default"):
-    entry = {
-        "user": user_id,
-        "timestamp": datetime.now().isoformat(),
-        "note": text
-    }
-    food_log.append(entry)
-    return f"🍽️ Noted what you ate: \"{text}\" at {entry['timestamp']}"
+    timestamp = datetime.now()
+    get_event_store(user_id).append("food_log", user_id, timestamp, note=text)
+    return f"🍽️ Noted what you ate: \"{text}\" at {timestamp.isoformat()}"
 
 # 📊 Plotting
-def plot_gym_sessions():
-    if not gym_sessions:
+def plot_gym_sessions(user_id="default"):
+    # PNG bytes of the daily-minutes bar chart (cached until new sessions land), or None.
+    png = gym_chart_png(user_id)
+    if png is None:
         print("No gym sessions to plot.")
-        return
-    df = pd.DataFrame(gym_sessions)
-    df['date'] = pd.to_datetime(df['timestamp']).dt.date
-    total_duration = df.groupby('date')['duration'].sum()
-    plt.figure(figsize=(8, 4))
-    total_duration.plot(kind='bar', color='skyblue')
-    plt.title("🏋️‍♀️ Gym Sessions Over Time")
-    plt.xlabel("Date")
-    plt.ylabel("Duration (minutes)")
-    plt.tight_layout()
-    plt.show()
-
-def plot_food_pie_chart():
-    if not food_log:
+    return png
+
+def plot_food_pie_chart(user_id="default"):
+    png = food_pie_png(user_id)
+    if png is None:
         print("No food entries to plot.")
-        return
-    categories = []
-    for entry in food_log:
-        text = entry['note'].lower()
-        if any(word in text for word in ["breakfast", "morning"]):
-            categories.append("Breakfast")
-        elif any(word in text for word in ["lunch", "afternoon"]):
-            categories.append("Lunch")
-        elif any(word in text for word in ["dinner", "night", "evening"]):
-            categories.append("Dinner")
-        else:
-            categories.append("Snack/Other")
-    counts = Counter(categories)
-    plt.figure(figsize=(5, 5))
-    plt.pie(counts.values(), labels=counts.keys(), autopct='%1.1f%%', startangle=140)
-    plt.title("🍽️ Food Intake Breakdown")
-    plt.axis('equal')
-    plt.show()
+    return png
+
+def save_chart(png, name):
+    path = os.path.join("data", "charts", f"{name}.png")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(png)
+    return path
 
 # 🧪 CLI for Testing (Optional)
 if __name__ == "__main__":
     while True:
         user_input = input("You: ")
+        if user_input.lower() in ["exit", "quit"]:
+            print("👋 Exiting Habit Tracker. Stay consistent!")
+            break
 
-        if detect_graph_command(user_input):
-            plot_gym_sessions()
-        elif detect_pie_command(user_input):
-            plot_food_pie_chart()
-        elif detect_timer_command(user_input):
+        from intent_router import route_intent
+        intent = route_intent(user_input)["intent"]
+
+        if intent == "graph":
+            png = plot_gym_sessions()
+            if png:
+                print(f"📊 Saved chart to {save_chart(png, 'gym_sessions')}")
+        elif intent == "pie":
+            png = plot_food_pie_chart()
+            if png:
+                print(f"🥧 Saved chart to {save_chart(png, 'food_pie')}")
+        elif intent == "timer":
             result = parse_timer_command(user_input)
             if result:
                 duration, task = result
                 print(f"⏱️ Timer started for {task} — {duration} seconds.")
-        elif detect_food_trigger(user_input):
+        elif intent == "food":
             print(log_food_entry(user_input))
-        elif detect_gym_trigger(user_input):
+        elif intent == "gym":
             print(log_gym_session(user_input))
-        elif user_input.lower() in ["exit", "quit"]:
-            print("👋 Exiting Habit Tracker. Stay consistent!")
-            break
         else:
             print(handle_recipe_query(user_input))
 # tools.py
 
-def summarize_food_logs():
-    if not food_log:
+def summarize_food_logs(user_id="default"):
+    store = get_event_store(user_id)
+    counts = store.meal_counts(user_id)
+    if not any(counts.values()):
         return "No food logs available for analysis."
 
     summary = {
-        "Breakfast": 0,
-        "Lunch": 0,
-        "Dinner": 0,
-        "Snack/Other": 0,
-        "Sample Entries": [],
+        **counts,
+        "Sample Entries": [entry["note"] for entry in store.recent("food_log", user_id, limit=5)],
     }
 
-    for entry in food_log:
-        note = entry["note"].lower()
-        if any(w in note for w in ["breakfast", "morning"]):
-            summary["Breakfast"] += 1
-        elif any(w in note for w in ["lunch", "afternoon"]):
-            summary["Lunch"] += 1
-        elif any(w in note for w in ["dinner", "night", "evening"]):
-            summary["Dinner"] += 1
-        else:
-            summary["Snack/Other"] += 1
-
-        if len(summary["Sample Entries"]) < 5:
-            summary["Sample Entries"].append(entry["note"])
-
     summary_text = f"""
 🍽️ Food Log Summary:
 - Breakfasts: {summary['Breakfast']}
@@ -284,3 +279,21 @@ Recent Sample Entries:
 {chr(10).join('• ' + s for s in summary['Sample Entries'])}
 """
     return summary_text
+
+def summarize_gym_logs(user_id="default"):
+    store = get_event_store(user_id)
+    weekly = store.gym_weekly(user_id)
+    if not weekly:
+        return "No gym sessions available for analysis."
+
+    streak = store.streak(user_id)
+    recent_weeks = weekly[-4:]
+    return f"""
+🏋️ Gym Log Summary:
+- Total sessions: {sum(sessions for _, _, sessions in weekly)}
+- Current streak: {streak['current']} day(s) (best: {streak['best']})
+- Last session day: {streak['last_day']}
+
+Minutes per week (most recent {len(recent_weeks)}):
+{chr(10).join(f'• {week}: {minutes:.0f} min over {sessions} session(s)' for week, minutes, sessions in recent_weeks)}
+"""
@@ -0,0 +1,223 @@
+# tracing.py
+#
+# Lightweight per-turn tracing and process-wide counters.
+#
+#   with trace("agent.turn", user_id=uid):      # root: one per request/turn
+#       with span("route_intent"):              # nested stages, timed
+#           ...
+#       count("llm_calls")                      # counters (also kept per trace)
+#
+# Finished traces are kept in memory for the UI debug panel, optionally appended
+# to a JSONL file (HABIT_TRACE_PATH), and every span/counter feeds the Prometheus
+# text output served by start_metrics_server() (HABIT_METRICS_PORT).
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_PATH = os.getenv("HABIT_TRACE_PATH")          # e.g. data/traces.jsonl; unset = no file export
+METRICS_PORT = os.getenv("HABIT_METRICS_PORT")      # e.g. 9464; unset = no endpoint
+RECENT_TRACES = 50
+
+_current = contextvars.ContextVar("habit_trace", default=None)
+# Nesting depth travels with the context, so spans on worker threads (to_thread,
+# asyncio.gather) nest under their caller instead of sharing one counter.
+_depth = contextvars.ContextVar("habit_span_depth", default=0)
+
+
+# ---------- Process-wide Metrics ----------
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}       # (name, labels) -> value
+        self.spans = {}          # span name -> [count, total seconds, max seconds]
+
+    def inc(self, name, value=1, labels=()):
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, span_name, seconds):
+        with self._lock:
+            stat = self.spans.setdefault(span_name, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters), {name: list(stat) for name, stat in self.spans.items()}
+
+    def prometheus(self):
+        counters, spans = self.snapshot()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE habit_{name}_total counter")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f"habit_{name}_total{_labels(labels)} {value}")
+        if spans:
+            lines.append("# TYPE habit_span_seconds summary")
+            for name, (n, total, _) in sorted(spans.items()):
+                lines.append(f'habit_span_seconds_count{{span="{name}"}} {n}')
+                lines.append(f'habit_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append("# TYPE habit_span_seconds_max gauge")
+            for name, (_, _, worst) in sorted(spans.items()):
+                lines.append(f'habit_span_seconds_max{{span="{name}"}} {worst:.6f}')
+        return "\n".join(lines) + "\n"
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels) + "}"
+
+metrics = Metrics()
+
+
+# ---------- Traces and Spans ----------
+
+class Trace:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []          # dicts: name, start (s from trace start), duration, depth, attrs
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def active(self):
+        # Makes this the current trace for the enclosed code (not across generator yields).
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def record(self, name, start, duration, depth=None, **attrs):
+        with self._lock:
+            self.spans.append({
+                "name": name, "start": round(start - self.start, 6), "duration": round(duration, 6),
+                "depth": _depth.get() if depth is None else depth, "attrs": attrs,
+            })
+        metrics.observe(name, duration)
+
+    def finish(self):
+        if self.duration is not None:
+            return self
+        self.duration = time.perf_counter() - self.start
+        metrics.observe(self.name, self.duration)
+        _finished(self)
+        return self
+
+    def as_dict(self):
+        return {
+            "trace": self.name, "started_at": self.started_at, "duration": round(self.duration or 0.0, 6),
+            "attrs": self.attrs, "counters": dict(self.counters),
+            "spans": sorted(self.spans, key=lambda s: s["start"]),
+        }
+
+
+def current_trace():
+    return _current.get()
+
+@contextmanager
+def trace(name, **attrs):
+    # Root of one request/turn. Nested trace() calls become spans of the outer one.
+    outer = _current.get()
+    if outer is not None:
+        with span(name, **attrs):
+            yield outer
+        return
+    root = Trace(name, **attrs)
+    with root.active():
+        try:
+            yield root
+        finally:
+            root.finish()
+
+@contextmanager
+def span(name, **attrs):
+    # Times the enclosed block; yields a dict the block may add attributes to.
+    root = _current.get()
+    start = time.perf_counter()
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - start
+        _depth.reset(token)
+        if root is None:
+            metrics.observe(name, duration)
+        else:
+            root.record(name, start, duration, depth, **attrs)
+
+def count(name, value=1, **labels):
+    metrics.inc(name, value, tuple(sorted(labels.items())))
+    root = _current.get()
+    if root is not None:
+        with root._lock:
+            root.counters[name] = root.counters.get(name, 0) + value
+
+
+# ---------- Export ----------
+
+_recent = deque(maxlen=RECENT_TRACES)
+_export_lock = threading.Lock()
+
+def _finished(root):
+    _recent.append(root)
+    if TRACE_PATH:
+        line = json.dumps(root.as_dict(), default=str)
+        with _export_lock:
+            os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+            with open(TRACE_PATH, "a") as f:
+                f.write(line + "\n")
+
+def recent_traces(name=None, **attrs):
+    # Finished root traces, oldest first; attrs (e.g. user_id=...) must all match.
+    return [t for t in list(_recent)
+            if (name is None or t.name == name) and all(t.attrs.get(k) == v for k, v in attrs.items())]
+
+def last_trace(name=None, **attrs):
+    traces = recent_traces(name, **attrs)
+    return traces[-1] if traces else None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    # Serves Prometheus text on http://host:port/metrics from a daemon thread (once per process).
+    global _server
+    port = int(port if port is not None else (METRICS_PORT or 9464))
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
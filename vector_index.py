@@ -0,0 +1,228 @@
+# vector_index.py
+
+import glob
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import zlib
+
+import faiss
+import numpy as np
+
+from tracing import count
+
+# Partitions stay exact (flat) until they grow past this, then switch to HNSW.
+HNSW_THRESHOLD = 20_000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# Snapshot file: magic + meta length, the {"seq", "ts", "texts"} JSON, then the serialized index.
+SNAPSHOT_MAGIC = b"HVS1"
+SNAPSHOT_HEADER = struct.Struct("<4sQ")
+
+
+def partition_key(user_id):
+    # Filesystem-safe, collision-free name for a user's partition files.
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", str(user_id))[:40]
+    return f"{slug}-{hashlib.sha1(str(user_id).encode()).hexdigest()[:10]}"
+
+
+# ---------- One User's Vectors ----------
+
+class VectorPartition:
+    def __init__(self, dimension, hnsw_threshold=HNSW_THRESHOLD):
+        self.dimension = dimension
+        self.hnsw_threshold = hnsw_threshold
+        self.index = faiss.IndexFlatL2(dimension)
+        self.texts = []
+        self.seq = 0  # highest WAL sequence number applied to this partition
+        self.taken_at = 0.0  # when the loaded snapshot was taken (time.time())
+
+    @property
+    def is_hnsw(self):
+        return isinstance(self.index, faiss.IndexHNSWFlat)
+
+    def add(self, vectors, texts, seq=None):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if not self.is_hnsw and self.index.ntotal + len(vectors) > self.hnsw_threshold:
+            self._promote()
+        self.index.add(vectors)
+        self.texts.extend(texts)
+        if seq is not None:
+            self.seq = max(self.seq, seq)
+
+    def _promote(self):
+        hnsw = faiss.IndexHNSWFlat(self.dimension, HNSW_M)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        if self.index.ntotal:
+            hnsw.add(self.index.reconstruct_n(0, self.index.ntotal))
+        self.index = hnsw
+
+    def search(self, vectors, k):
+        k = min(k, self.index.ntotal)
+        if not k:
+            return np.empty((len(vectors), 0), dtype="float32"), np.empty((len(vectors), 0), dtype="int64")
+        return self.index.search(np.ascontiguousarray(vectors, dtype="float32"), k)
+
+    def snapshot(self, taken_at=None):
+        # Point-in-time copy, cheap enough to take under the owner's lock;
+        # the slow disk write happens later in write_snapshot().
+        return faiss.serialize_index(self.index), list(self.texts), self.seq, taken_at or time.time()
+
+    @staticmethod
+    def write_snapshot(path, snapshot):
+        # Texts, seq and index go into one file behind one os.replace, so a crash
+        # leaves either the old snapshot or the new one, never half of each. The
+        # snapshot it replaces is kept as <path>.prev for load_latest().
+        blob, texts, seq, taken_at = snapshot
+        meta = json.dumps({"seq": seq, "ts": taken_at, "texts": texts}).encode("utf-8")
+        with open(path + ".tmp", "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(meta)))
+            f.write(meta)
+            f.write(blob.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.replace(path, path + ".prev")
+        os.replace(path + ".tmp", path)
+        if os.path.exists(path + ".meta"):
+            os.remove(path + ".meta")  # sidecar of the old two-file format
+
+    def save(self, path):
+        self.write_snapshot(path, self.snapshot())
+
+    @classmethod
+    def load(cls, path, dimension, hnsw_threshold=HNSW_THRESHOLD):
+        partition = cls(dimension, hnsw_threshold)
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC:
+            _, meta_len = SNAPSHOT_HEADER.unpack_from(data)
+            start = SNAPSHOT_HEADER.size
+            meta = json.loads(data[start:start + meta_len])
+            partition.index = faiss.deserialize_index(np.frombuffer(data, dtype="uint8", offset=start + meta_len))
+        else:  # two-file format: raw index plus a <path>.meta sidecar
+            partition.index = faiss.deserialize_index(np.frombuffer(data, dtype="uint8"))
+            with open(path + ".meta", "r") as f:
+                meta = json.load(f)
+            if isinstance(meta, list):  # pre-WAL format: just the texts
+                meta = {"seq": 0, "texts": meta}
+        if partition.is_hnsw:
+            partition.index.hnsw.efSearch = HNSW_EF_SEARCH
+        partition.texts = meta["texts"]
+        partition.seq = meta["seq"]
+        partition.taken_at = meta.get("ts", 0.0)
+        if partition.index.ntotal != len(partition.texts):
+            raise ValueError(f"{path}: {partition.index.ntotal} vectors but {len(partition.texts)} texts")
+        return partition
+
+    @classmethod
+    def load_latest(cls, path, dimension, hnsw_threshold=HNSW_THRESHOLD):
+        # The newest readable snapshot of path, falling back to <path>.prev and then
+        # to an empty partition (seq 0); the caller replays the WAL past its seq.
+        for candidate in (path, path + ".prev"):
+            if not os.path.exists(candidate):
+                continue
+            try:
+                return cls.load(candidate, dimension, hnsw_threshold)
+            except (OSError, ValueError, KeyError, RuntimeError, struct.error) as e:
+                print(f"⚠️ Unreadable vector snapshot {candidate} ({e}); trying an older one")
+                count("vector_snapshot_fallbacks")
+        return cls(dimension, hnsw_threshold)
+
+
+# ---------- Write-ahead Log of Appended Vectors ----------
+
+class VectorLog:
+    # Segments wal-<gen>.log of records: <header len, crc32> + JSON header + float32 vector.
+    RECORD = struct.Struct("<II")
+
+    def __init__(self, directory, dimension, fsync=True, read_only=False):
+        # read_only: replay another process's log without appending or repairing it.
+        self.directory = directory
+        self.dimension = dimension
+        self.fsync = fsync
+        self.read_only = read_only
+        self.sources = set()  # source= names seen by replay()
+        os.makedirs(directory, exist_ok=True)
+        gens = self.generations()
+        self.gen = gens[-1] if gens else 1
+        self._file = None if read_only else open(self._path(self.gen), "ab")
+
+    def _path(self, gen):
+        return os.path.join(self.directory, f"wal-{gen:06d}.log")
+
+    def generations(self):
+        paths = glob.glob(os.path.join(self.directory, "wal-*.log"))
+        return sorted(int(os.path.basename(p)[4:-4]) for p in paths)
+
+    def append(self, records, source=None):
+        # records: [(seq, user_id, text, vector, ts)], ts being when the entry was
+        # first written (time.time()); one write + one fsync per batch.
+        # source tags the records with where they were copied from (see replay()).
+        chunks = []
+        for seq, user_id, text, vector, ts in records:
+            header = {"seq": seq, "user": user_id, "text": text, "ts": ts}
+            if source is not None:
+                header["src"] = source
+            header = json.dumps(header).encode("utf-8")
+            body = header + np.asarray(vector, dtype="float32").tobytes()
+            chunks.append(self.RECORD.pack(len(header), zlib.crc32(body)) + body)
+        payload = b"".join(chunks)
+        self._file.write(payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        count("bytes_written", len(payload), store="vector_wal")
+
+    def replay(self):
+        # Yields (seq, user_id, text, vector, ts) from every segment, oldest first.
+        # A torn record at the tail (crash mid-write) ends replay and is cut off.
+        vector_bytes = self.dimension * 4
+        for gen in self.generations():
+            path = self._path(gen)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + self.RECORD.size <= len(data):
+                header_len, crc = self.RECORD.unpack_from(data, offset)
+                start = offset + self.RECORD.size
+                end = start + header_len + vector_bytes
+                body = data[start:end]
+                if len(body) < header_len + vector_bytes or zlib.crc32(body) != crc:
+                    break
+                header = json.loads(body[:header_len])
+                if "src" in header:
+                    self.sources.add(header["src"])
+                vector = np.frombuffer(body[header_len:], dtype="float32")
+                yield header["seq"], header["user"], header["text"], vector, header.get("ts", 0.0)
+                offset = end
+            if offset < len(data) and not self.read_only:
+                print(f"⚠️ Truncating {len(data) - offset} torn bytes from {path}")
+                if gen == self.gen:
+                    self._file.truncate(offset)
+                else:
+                    with open(path, "r+b") as f:
+                        f.truncate(offset)
+
+    def rotate(self):
+        # Starts a new segment; returns the generation that was closed.
+        closed = self.gen
+        self._file.close()
+        self.gen += 1
+        self._file = open(self._path(self.gen), "ab")
+        return closed
+
+    def drop_through(self, gen):
+        for old in self.generations():
+            if old <= gen:
+                os.remove(self._path(old))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()